@@ -0,0 +1,116 @@
+"""
+Advisory computation off the event loop
+
+Optimising and formatting an advisory is synchronous, CPU-bound work.
+Run on the event loop, it makes every concurrent request (and the /stream
+and /jobs handlers) wait behind it. AdvisoryExecutor hands it to a pool
+instead:
+
+- thread  (default) a thread pool; the loop stays responsive and numpy
+          releases the GIL for part of the work
+- process a pool of spawned processes, each with its own chatbot; true
+          parallelism at the cost of pickling requests and bodies
+- inline  on the event loop, as before (for comparison)
+
+The mode comes from $ADVISORY_EXECUTOR and the pool size from
+$ADVISORY_WORKERS (default: the pool's own default for the mode).
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from chatbot.response_formatter import ResponseFormatter
+from chatbot.traffic_advisor import ChatbotResponse, TrafficAdvisoryChatbot
+
+EXECUTOR_ENV = "ADVISORY_EXECUTOR"
+WORKERS_ENV = "ADVISORY_WORKERS"
+
+THREAD, PROCESS, INLINE = "thread", "process", "inline"
+MODES = (THREAD, PROCESS, INLINE)
+
+_chatbot: Optional[TrafficAdvisoryChatbot] = None
+
+
+def get_chatbot() -> TrafficAdvisoryChatbot:
+    """This process's chatbot (built on first use)"""
+    global _chatbot
+    if _chatbot is None:
+        _chatbot = TrafficAdvisoryChatbot(area_type="urban")
+    return _chatbot
+
+
+def format_response(response: ChatbotResponse, fmt: str):
+    if fmt == "json":
+        return ResponseFormatter.to_json(response)
+    elif fmt == "html":
+        return ResponseFormatter.to_html(response)
+    else:  # default to text
+        return ResponseFormatter.to_plain_text(response)
+
+
+# ------------------------------
+# WORK (module level, so process workers can unpickle it)
+# ------------------------------
+def advise(request_data: Dict, fmt: str):
+    """One request → formatted advisory"""
+    return format_response(get_chatbot().process_request(request_data), fmt)
+
+
+def advise_batch(request_data: List[Dict], formats: List[str]) -> List:
+    """Many requests, optimised in one vectorised pass → formatted advisories"""
+    responses = get_chatbot().process_batch(request_data)
+    return [format_response(r, fmt) for r, fmt in zip(responses, formats)]
+
+
+class AdvisoryExecutor:
+    """
+    mode:    thread / process / inline
+    workers: pool size (None = executor default)
+    """
+
+    def __init__(self, mode: str = THREAD, workers: Optional[int] = None):
+        if mode not in MODES:
+            raise ValueError(
+                f"Unknown advisory executor '{mode}' (available: {', '.join(MODES)})"
+            )
+        self.mode = mode
+        self.workers = workers
+        self._pool: Optional[Executor] = None
+
+    @classmethod
+    def from_env(cls) -> "AdvisoryExecutor":
+        workers = os.environ.get(WORKERS_ENV)
+        return cls(
+            mode=os.environ.get(EXECUTOR_ENV, THREAD).lower(),
+            workers=int(workers) if workers else None,
+        )
+
+    def _get_pool(self) -> Executor:
+        # lazily: nothing is started until the first request
+        if self._pool is None:
+            if self.mode == PROCESS:
+                self._pool = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=get_chatbot,
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="advisory"
+                )
+        return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        if self.mode == INLINE:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_pool(), fn, *args
+        )
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
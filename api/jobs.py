@@ -0,0 +1,358 @@
+"""
+Asynchronous video analysis jobs on a process pool
+
+POST /jobs hands a video to JobManager.submit, which streams it through
+iter_tracked_frames → StreamingAggregator → build_traffic_data in a
+worker process (spawned, so workers never inherit the server's threads
+or sockets). Memory stays constant whatever the video length, and each
+tracked vehicle is counted once. The event loop only records the job and
+returns its id.
+
+Videos, models and backends come from clients, so JobPolicy only admits
+files under a configured root (and allowlisted stream URL prefixes),
+allowlisted model weights (loading weights can execute code) and
+allowlisted backends.
+
+Workers report frames analysed and poll for cancellation through two
+multiprocessing.Manager dicts, throttled to a few updates per second.
+Queued jobs are cancelled before they start; running ones stop at their
+next progress update. At most max_workers jobs run and max_queued wait;
+beyond that submit() raises JobQueueFull. Finished jobs are kept for
+lookup up to `history`, oldest first out.
+"""
+
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED = (
+    "queued", "running", "completed", "failed", "cancelled"
+)
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+PROGRESS_INTERVAL = 0.25  # seconds between progress / cancel round trips
+
+
+class JobQueueFull(Exception):
+    """Every worker is busy and the backlog is at max_queued"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker whose job was cancelled"""
+
+
+class JobRejected(ValueError):
+    """Video, model or backend not allowed by the JobPolicy"""
+
+
+def _env_list(name: str, default: str) -> List[str]:
+    return [item.strip() for item in os.environ.get(name, default).split(",") if item.strip()]
+
+
+class JobPolicy:
+    """
+    video_root:   directory every video file must resolve inside
+    video_urls:   stream URL prefixes allowed (none by default)
+    models:       model weights clients may choose
+    backends:     detector backends clients may choose
+    """
+
+    def __init__(
+        self,
+        video_root: str = ".",
+        video_urls: Sequence[str] = (),
+        models: Sequence[str] = ("yolov8n.pt",),
+        backends: Sequence[str] = ("torch",),
+    ):
+        self.video_root = os.path.realpath(video_root)
+        self.video_urls = tuple(video_urls)
+        self.models = frozenset(models)
+        self.backends = frozenset(backends)
+
+    @classmethod
+    def from_env(cls) -> "JobPolicy":
+        """
+        $JOB_VIDEO_ROOT (default: working directory), $JOB_VIDEO_URLS,
+        $JOB_MODELS (default yolov8n.pt), $JOB_BACKENDS (default torch);
+        lists are comma-separated
+        """
+        return cls(
+            video_root=os.environ.get("JOB_VIDEO_ROOT", "."),
+            video_urls=_env_list("JOB_VIDEO_URLS", ""),
+            models=_env_list("JOB_MODELS", "yolov8n.pt"),
+            backends=_env_list("JOB_BACKENDS", "torch"),
+        )
+
+    def resolve_video(self, video_path: str) -> str:
+        """
+        Allowed video → path / URL to open; raises JobRejected
+        """
+        if "://" in video_path:
+            if not any(video_path.startswith(prefix) for prefix in self.video_urls):
+                raise JobRejected(f"Video URL not allowed: {video_path}")
+            return video_path
+
+        # relative paths are taken from the root; symlinks and ".." resolved
+        path = os.path.realpath(os.path.join(self.video_root, video_path))
+        if os.path.commonpath([path, self.video_root]) != self.video_root:
+            raise JobRejected(f"Video outside {self.video_root}: {video_path}")
+        if not os.path.isfile(path):
+            raise JobRejected(f"Video not found: {video_path}")
+        return path
+
+    def check_options(self, options: Dict):
+        model_path = options.get("model_path", "yolov8n.pt")
+        if model_path not in self.models:
+            raise JobRejected(
+                f"Model not allowed: {model_path} (allowed: {', '.join(sorted(self.models))})"
+            )
+        backend = options.get("backend", "torch")
+        if backend not in self.backends:
+            raise JobRejected(
+                f"Backend not allowed: {backend} (allowed: {', '.join(sorted(self.backends))})"
+            )
+
+
+@dataclass
+class Job:
+    job_id: str
+    video_path: str
+    options: Dict[str, Any]
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    total_frames: Optional[int] = None
+    result: Optional[Dict] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    future: Any = field(default=None, repr=False)
+
+
+def _expected_frames(video_path: str, max_frames, stride: int) -> Optional[int]:
+    import cv2
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        cap.release()
+
+    if frames <= 0:   # live stream / unknown length
+        return max_frames
+    frames = frames // max(stride, 1)
+    return min(frames, max_frames) if max_frames is not None else frames
+
+
+def run_video_job(job_id: str, video_path: str, options: Dict, progress, cancel) -> Dict:
+    """
+    Worker body: analyse the video and return its trafficData JSON
+    """
+    from detector.object_detector import ObjectDetector
+    from detector.stream_aggregator import StreamingAggregator
+    from detector.video_pipeline import build_traffic_data, iter_tracked_frames
+
+    if cancel.get(job_id):
+        raise JobCancelled(job_id)
+    progress[job_id] = 0
+
+    # detections are cached (DETECTION_CACHE_DIR) under this detector's
+    # own weights / conf / backend
+    detector = ObjectDetector(
+        options.get("model_path", "yolov8n.pt"),
+        options.get("conf", 0.25),
+        backend=options.get("backend", "torch"),
+    )
+    aggregator = StreamingAggregator()
+    last_report = time.monotonic()
+
+    for frame_index, objects in iter_tracked_frames(
+        video_path,
+        max_frames=options.get("max_frames"),
+        batch_size=options.get("batch_size", 1),
+        stride=options.get("stride", 1),
+        detector=detector,
+    ):
+        aggregator.update(frame_index, objects)
+
+        now = time.monotonic()
+        if now - last_report >= PROGRESS_INTERVAL:
+            last_report = now
+            progress[job_id] = aggregator.frames_seen
+            if cancel.get(job_id):
+                raise JobCancelled(job_id)
+
+    progress[job_id] = aggregator.frames_seen
+
+    traffic_data = build_traffic_data(aggregator.snapshot())
+    traffic_data["frames_analysed"] = aggregator.frames_seen
+    return traffic_data
+
+
+class JobManager:
+    """
+    max_workers: concurrent analysis processes
+    max_queued:  jobs allowed to wait for a worker
+    history:     finished jobs kept for GET /jobs/{id}
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        max_queued: int = 8,
+        history: int = 100,
+        policy: Optional[JobPolicy] = None,
+    ):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.history = history
+        self.policy = policy or JobPolicy()
+
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress = None
+        self._cancel = None
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        return cls(
+            max_workers=int(os.environ.get("JOB_WORKERS", 1)),
+            max_queued=int(os.environ.get("JOB_QUEUE_SIZE", 8)),
+            policy=JobPolicy.from_env(),
+        )
+
+    def _start(self):
+        # lazily: nothing is spawned until the first job arrives
+        if self._executor is None:
+            ctx = mp.get_context("spawn")
+            self._manager = ctx.Manager()
+            self._progress = self._manager.dict()
+            self._cancel = self._manager.dict()
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=ctx)
+
+    # ------------------------------
+    # SUBMIT / CANCEL
+    # ------------------------------
+    def submit(self, video_path: str, **options) -> Job:
+        """
+        Queue a video; raises JobRejected (policy) or JobQueueFull
+        """
+        self.policy.check_options(options)
+        source = self.policy.resolve_video(video_path)
+        total_frames = _expected_frames(
+            source, options.get("max_frames"), options.get("stride", 1)
+        )
+
+        with self._lock:
+            active = sum(job.status not in FINISHED for job in self._jobs.values())
+            if active >= self.max_workers + self.max_queued:
+                raise JobQueueFull(
+                    f"{active} jobs already queued or running "
+                    f"(limit {self.max_workers + self.max_queued})"
+                )
+
+            self._start()
+            job = Job(uuid.uuid4().hex, video_path, options, total_frames=total_frames)
+            job.future = self._executor.submit(
+                run_video_job, job.job_id, source, options,
+                self._progress, self._cancel,
+            )
+            self._jobs[job.job_id] = job
+
+        job.future.add_done_callback(lambda _, job=job: self._finish(job))
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+
+        job.cancel_requested = True
+        self._cancel[job_id] = True
+        job.future.cancel()   # only succeeds while still queued
+        return job
+
+    def _finish(self, job: Job):
+        with self._lock:
+            try:
+                job.result = job.future.result()
+                job.status = COMPLETED
+            except (CancelledError, JobCancelled):
+                job.status = CANCELLED
+            except Exception as exc:
+                job.status = FAILED
+                job.error = f"{type(exc).__name__}: {exc}"
+            job.finished_at = time.time()
+            self._prune()
+
+    def _prune(self):
+        finished = [jid for jid, job in self._jobs.items() if job.status in FINISHED]
+        for job_id in finished[:max(len(finished) - self.history, 0)]:
+            del self._jobs[job_id]
+            for shared in (self._progress, self._cancel):
+                shared.pop(job_id, None)
+
+    # ------------------------------
+    # STATUS
+    # ------------------------------
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def frames_analysed(self, job: Job) -> int:
+        if self._progress is None:
+            return 0
+        return self._progress.get(job.job_id, 0)
+
+    def describe(self, job: Job, include_result: bool = True) -> Dict[str, Any]:
+        status = job.status
+        # a worker registers its progress entry as it starts
+        if status == QUEUED and self._progress is not None and job.job_id in self._progress:
+            status = RUNNING
+        frames = (
+            self.frames_analysed(job) if status in (QUEUED, RUNNING)
+            else (job.result or {}).get("frames_analysed", self.frames_analysed(job))
+        )
+
+        info = {
+            "job_id": job.job_id,
+            "status": status,
+            "video_path": job.video_path,
+            "options": job.options,
+            "submitted_at": job.submitted_at,
+            "finished_at": job.finished_at,
+            "progress": {
+                "frames_analysed": frames,
+                "total_frames": job.total_frames,
+                "fraction": (
+                    1.0 if status == COMPLETED
+                    else round(min(frames / job.total_frames, 1.0), 3)
+                    if job.total_frames else None
+                ),
+            },
+            "cancel_requested": job.cancel_requested,
+            "error": job.error,
+        }
+        if include_result:
+            info["trafficData"] = job.result
+        return info
+
+    def shutdown(self):
+        if self._executor is not None:
+            for job in self.jobs():
+                if job.status not in FINISHED:
+                    self._cancel[job.job_id] = True
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = None
@@ -0,0 +1,220 @@
+"""
+Live per-approach metrics and green times pushed to clients
+
+CameraFeed runs a MultiCameraSupervisor in a background thread. It turns
+every MetricsSnapshot into a compact per-camera state (per-approach
+metrics plus green times recomputed by the SignalOptimizer) and hands it
+to the LiveHub on the event loop.
+
+The hub keeps the latest state per camera. On connect, a client gets a
+"snapshot" event with the full state, then "delta" events that carry only
+the fields that changed (diff_state; removed fields are listed under
+"$removed", so null always means a None value). Each client reads from its own
+bounded queue. A client that falls behind does not slow the others: when
+its queue overflows, the queue is emptied and a fresh snapshot is queued
+in its place.
+"""
+
+import asyncio
+import json
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from config.constants import TrafficConstants
+
+SNAPSHOT, DELTA = "snapshot", "delta"
+
+# Key listing the fields removed at that level of a delta (a null value
+# is a field that is now None, e.g. demand_flow)
+REMOVED = "$removed"
+
+# Event = (sequence number, kind, payload)
+Event = Tuple[int, str, Dict[str, Any]]
+
+
+def diff_state(old: Optional[Dict], new: Dict) -> Dict:
+    """
+    Nested changes turning `old` into `new`: changed / added leaves with
+    their new value, removed keys listed under REMOVED ({} = unchanged)
+    """
+    if old is None:
+        return new
+
+    changes = {}
+    for key, value in new.items():
+        if key not in old:
+            changes[key] = value
+        elif isinstance(value, dict) and isinstance(old[key], dict):
+            nested = diff_state(old[key], value)
+            if nested:
+                changes[key] = nested
+        elif old[key] != value:
+            changes[key] = value
+
+    removed = sorted(old.keys() - new.keys())
+    if removed:
+        changes[REMOVED] = removed
+    return changes
+
+
+def snapshot_state(snapshot, optimizer) -> Dict[str, Any]:
+    """
+    MetricsSnapshot → streamed camera state
+    """
+    if snapshot.error:
+        return {"frame_index": snapshot.frame_index, "error": snapshot.error}
+
+    metrics = snapshot.metrics
+    approaches = {
+        approach: {
+            "vehicles": sum(m.vehicle_counts.values()),
+            "pcu": round(m.demand_pcu, 2),
+            "density": round(m.density, 2),
+            "queue_length": m.queue_length,
+            "congestion_level": m.congestion_level,
+            "pedestrian_count": m.pedestrian_count,
+            "demand_flow": m.demand_flow,
+        }
+        for approach, m in metrics.items()
+    }
+
+    state = {
+        "frame_index": snapshot.frame_index,
+        "approaches": approaches,
+        "final": snapshot.final,
+    }
+
+    if metrics:
+        timings, cycle_time, _ = optimizer.optimize_timings(
+            list(metrics.values()), TrafficConstants.DEFAULT_CYCLE_TIME
+        )
+        state["green_times"] = {t.approach_id: t.green_time for t in timings}
+        state["cycle_time"] = round(cycle_time, 1)
+
+    return state
+
+
+class _Client:
+    __slots__ = ("queue", "resyncs")
+
+    def __init__(self, queue_size: int):
+        self.queue: "asyncio.Queue[Event]" = asyncio.Queue(maxsize=queue_size)
+        self.resyncs = 0
+
+
+class LiveHub:
+    """
+    Latest state per camera and the connected clients' queues
+    (publish / subscribe must run on the event loop; use
+    publish_threadsafe from other threads)
+    """
+
+    def __init__(self, queue_size: int = 64):
+        self.queue_size = queue_size
+        self.state: Dict[str, Dict] = {}
+        self.sequence = 0
+        self._clients: Set[_Client] = set()
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def _snapshot(self) -> Event:
+        # states are replaced, never mutated, so a shallow copy is enough
+        return (self.sequence, SNAPSHOT, dict(self.state))
+
+    def publish(self, camera_id: str, state: Dict):
+        changes = diff_state(self.state.get(camera_id), state)
+        if not changes:
+            return
+
+        self.state[camera_id] = state
+        self.sequence += 1
+        event = (self.sequence, DELTA, {camera_id: changes})
+
+        for client in self._clients:
+            try:
+                client.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # slow consumer: replace its backlog with one snapshot
+                while not client.queue.empty():
+                    client.queue.get_nowait()
+                client.queue.put_nowait(self._snapshot())
+                client.resyncs += 1
+
+    def publish_threadsafe(self, loop, camera_id: str, state: Dict):
+        loop.call_soon_threadsafe(self.publish, camera_id, state)
+
+    async def subscribe(self, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Event]]:
+        """
+        Snapshot, then deltas as they are published; yields None after
+        `heartbeat` idle seconds so callers can keep the connection alive
+        """
+        client = _Client(self.queue_size)
+        client.queue.put_nowait(self._snapshot())
+        self._clients.add(client)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(client.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._clients.discard(client)
+
+
+def sse_format(event: Optional[Event]) -> str:
+    """
+    Server-Sent Events framing (None → comment line heartbeat)
+    """
+    if event is None:
+        return ": keep-alive\n\n"
+    sequence, kind, payload = event
+    data = json.dumps(payload, separators=(",", ":"), default=str)
+    return f"id: {sequence}\nevent: {kind}\ndata: {data}\n\n"
+
+
+class CameraFeed(threading.Thread):
+    """
+    Background thread: MultiCameraSupervisor snapshots → hub
+
+    snapshot_every: frames between snapshots per camera (10 frames at
+    30 FPS ≈ 3 updates per second)
+    """
+
+    def __init__(
+        self,
+        hub: LiveHub,
+        loop,
+        sources: List,
+        optimizer,
+        snapshot_every: int = 10,
+        **supervisor_options,
+    ):
+        super().__init__(name="camera-feed", daemon=True)
+        from detector.multi_camera import MultiCameraSupervisor
+
+        self.hub = hub
+        self.loop = loop
+        self.optimizer = optimizer
+        self.supervisor = MultiCameraSupervisor(
+            sources, snapshot_every=snapshot_every, **supervisor_options
+        )
+        self._stopping = threading.Event()
+
+    def run(self):
+        with self.supervisor:
+            for snapshot in self.supervisor.snapshots():
+                if self._stopping.is_set():
+                    break
+                self.hub.publish_threadsafe(
+                    self.loop,
+                    snapshot.camera_id,
+                    snapshot_state(snapshot, self.optimizer),
+                )
+
+    def stop(self, timeout: float = 5.0):
+        # workers send their final snapshots, run() then joins them
+        self._stopping.set()
+        self.supervisor.request_stop()
+        self.join(timeout)
@@ -2,8 +2,15 @@
 FastAPI server for Traffic Advisory Chatbot
 """
 
-from fastapi import FastAPI, HTTPException, Query
+import argparse
+import asyncio
+import os
+import time
+from contextlib import ExitStack, asynccontextmanager
+
+from fastapi import Body, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 import uvicorn
@@ -11,14 +18,88 @@ from typing import Literal
 from datetime import datetime
 
 
-from chatbot.traffic_advisor import TrafficAdvisoryChatbot, ChatbotResponse
-from chatbot.response_formatter import ResponseFormatter
+from chatbot.advisory_cache import AdvisoryCache, request_key
+from api.advisory_executor import (
+    AdvisoryExecutor, advise, advise_batch, get_chatbot
+)
+from api.live_stream import CameraFeed, LiveHub, sse_format
+from api.jobs import JobManager, JobQueueFull, JobRejected
+from monitoring import (
+    HTTP_REQUESTS, HTTP_SECONDS, REGISTRY, enabled, render_prometheus
+)
+
+
+# Initialize chatbot
+chatbot = get_chatbot()
+
+# Formatted advisories for repeated identical requests
+advisory_cache = AdvisoryCache.from_env()
+
+# Intersections accepted in one /advise/batch request
+MAX_BATCH_SIZE = int(os.environ.get("ADVISE_BATCH_LIMIT", 500))
+
+# Live metrics / green times from running cameras (see /stream)
+live_hub = LiveHub()
+LIVE_CONFIG_ENV = "LIVE_CAMERA_CONFIG"
+
+# Created by lifespan() when the server starts
+advisory_executor: Optional[AdvisoryExecutor] = None
+job_manager: Optional[JobManager] = None
+camera_feed: Optional[CameraFeed] = None
+
+
+def start_camera_feed() -> Optional[CameraFeed]:
+    """
+    With $LIVE_CAMERA_CONFIG pointing at a config.yaml, analyse its
+    cameras in the background and stream the results on /stream
+    """
+    path = os.environ.get(LIVE_CONFIG_ENV)
+    if not path:
+        return None
+
+    from detector.multi_camera import load_camera_sources
+
+    feed = CameraFeed(
+        live_hub,
+        asyncio.get_running_loop(),
+        load_camera_sources(path),
+        chatbot.optimizer,
+        snapshot_every=int(os.environ.get("LIVE_SNAPSHOT_EVERY", 10)),
+    )
+    feed.start()
+    return feed
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the server's resources in order; ExitStack stops them in
+    reverse (camera feed, then jobs, then the advisory pool)
+    """
+    global advisory_executor, job_manager, camera_feed
+
+    with ExitStack() as stack:
+        # Advisory work runs here, not on the event loop
+        advisory_executor = AdvisoryExecutor.from_env()
+        stack.callback(advisory_executor.shutdown)
+
+        # Video analysis jobs on a process pool (see /jobs)
+        job_manager = JobManager.from_env()
+        stack.callback(job_manager.shutdown)
+
+        camera_feed = start_camera_feed()
+        if camera_feed is not None:
+            stack.callback(camera_feed.stop)
+
+        yield
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Adaptive Traffic Signal Advisory System",
     description="AI-powered traffic signal timing recommendations for traffic police",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -30,8 +111,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize chatbot
-chatbot = TrafficAdvisoryChatbot(area_type="urban")
+# Request latency / count per route (skipped entirely when monitoring is off)
+if enabled():
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        began = time.perf_counter()
+        response = await call_next(request)
+        elapsed = time.perf_counter() - began
+
+        # route template, not the raw path, to keep label cardinality bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        REGISTRY.histogram(HTTP_SECONDS, method=request.method, path=path).observe(elapsed)
+        REGISTRY.counter(
+            HTTP_REQUESTS, method=request.method, path=path,
+            status=str(response.status_code)
+        ).inc()
+        return response
 
 # Pydantic models
 class VehicleCounts(BaseModel):
@@ -56,6 +152,19 @@ class ApproachData(BaseModel):
     pedestrian_count: int = Field(..., ge=0)
     current_green_time: float = Field(..., gt=0)
     link_length: Optional[float] = None
+    # Measured flow rate (PCU/hour); preferred over counts when every
+    # approach provides one
+    demand_flow: Optional[float] = Field(None, ge=0)
+
+
+class VideoJobRequest(BaseModel):
+    video_path: str
+    max_frames: Optional[int] = Field(300, ge=1)
+    stride: int = Field(1, ge=1, le=30)
+    batch_size: int = Field(1, ge=1, le=64)
+    backend: str = "torch"
+    model_path: str = "yolov8n.pt"
+    conf: float = Field(0.25, gt=0, lt=1)
 
 
 class TrafficRequest(BaseModel):
@@ -65,6 +174,7 @@ class TrafficRequest(BaseModel):
     time_of_day: Optional[str] = None
     format: Literal["text", "json", "html"] = "text"
 
+
 @app.get("/")
 async def root():
     """Root endpoint with system info"""
@@ -75,7 +185,14 @@ async def root():
         "endpoints": {
             "GET /": "This information",
             "POST /advise": "Get signal timing recommendations",
-            "GET /health": "System health check"
+            "POST /advise/batch": "Recommendations for many intersections at once",
+            "GET /advise/cache": "Advisory cache hit-rate statistics",
+            "GET /stream": "Live per-approach metrics and green times (Server-Sent Events)",
+            "POST /jobs": "Analyse a video in the background",
+            "GET /jobs/{job_id}": "Job progress and resulting trafficData",
+            "DELETE /jobs/{job_id}": "Cancel a job",
+            "GET /health": "System health check",
+            "GET /metrics": "Stage / request timings (Prometheus text format)"
         }
     }
 
@@ -88,6 +205,13 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Latency histograms and counters in Prometheus text format"""
+    return PlainTextResponse(
+        render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
 @app.post("/advise")
 async def get_signal_advice(request: TrafficRequest):
     """
@@ -127,23 +251,122 @@ async def get_signal_advice(request: TrafficRequest):
     try:
         # Convert to dict for processing
         request_dict = request.model_dump()
-        
-        # Process with chatbot
-        response = chatbot.process_request(request_dict)
-        
-        # Format response based on requested format
-        if request.format == "json":
-            return ResponseFormatter.to_json(response)
-        elif request.format == "html":
-            return ResponseFormatter.to_html(response)
-        else:  # default to text
-            return ResponseFormatter.to_plain_text(response)
+
+        # Process with chatbot and format based on requested format
+        # (identical recent requests are served from the cache)
+        return await advisory_cache.get_or_compute_async(
+            request.model_dump(exclude={"format"}),
+            request.format,
+            lambda: advisory_executor.run(advise, request_dict, request.format),
+        )
             
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@app.post("/advise/batch")
+async def get_batch_signal_advice(
+    requests: List[TrafficRequest] = Body(..., max_length=MAX_BATCH_SIZE)
+):
+    """
+    Recommendations for many intersections in one round trip
+
+    The body is a JSON array of /advise request bodies; results come back
+    in the same order, each in its own requested format. All
+    intersections are optimised together in one vectorised pass.
+    """
+    if not requests:
+        return []
+
+    try:
+        keys = [
+            request_key(request.model_dump(exclude={"format"}), request.format)
+            for request in requests
+        ]
+        bodies = [advisory_cache.get(key) for key in keys]
+        missing = [i for i, body in enumerate(bodies) if body is None]
+
+        if missing:
+            computed = await advisory_executor.run(
+                advise_batch,
+                [requests[i].model_dump() for i in missing],
+                [requests[i].format for i in missing],
+            )
+            for i, body in zip(missing, computed):
+                bodies[i] = body
+                advisory_cache.put(keys[i], body)
+
+        return bodies
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.get("/advise/cache")
+async def advisory_cache_stats():
+    """Advisory cache size, hit rate, evictions and expirations"""
+    return advisory_cache.stats()
+
+@app.get("/stream")
+async def live_stream(request: Request):
+    """
+    Server-Sent Events: one "snapshot" event with every camera's state,
+    then "delta" events with only the fields that changed
+    ({camera_id: {field: value}}; nested, removed fields listed under "$removed")
+    """
+    async def events():
+        async for event in live_hub.subscribe(heartbeat=15.0):
+            if await request.is_disconnected():
+                break
+            yield sse_format(event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: VideoJobRequest):
+    """
+    Queue a video (file under $JOB_VIDEO_ROOT or allowlisted stream URL)
+    for analysis; poll GET /jobs/{job_id} for progress and the resulting
+    trafficData
+    """
+    options = request.model_dump(exclude={"video_path"})
+    try:
+        job = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: job_manager.submit(request.video_path, **options)
+        )
+    except JobRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return job_manager.describe(job, include_result=False)
+
+@app.get("/jobs")
+async def list_jobs():
+    """Queued, running and recently finished jobs (without results)"""
+    return [job_manager.describe(job, include_result=False) for job in job_manager.jobs()]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_manager.describe(job)
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued job, or stop a running one at its next progress update"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_manager.describe(job, include_result=False)
+
 @app.get("/quick_advice")
 async def quick_advice(
     north_cars: int = Query(0, ge=0),
@@ -191,17 +414,45 @@ async def quick_advice(
             return {"error": "No traffic data provided"}
         
         # Get advice
-        response = chatbot.process_request(request_data)
-        return ResponseFormatter.to_plain_text(response)
+        return await advisory_cache.get_or_compute_async(
+            request_data,
+            "text",
+            lambda: advisory_executor.run(advise, request_data, "text"),
+        )
         
     except Exception as e:
         return {"error": str(e)}
 
-if __name__ == "__main__":
+def main(argv=None):
+    """
+    Production: one worker process by default, so /jobs and /stream see a
+    single job manager and live feed; --workers / $API_WORKERS for more
+    (advisories only). Development: --reload, one process.
+    """
+    parser = argparse.ArgumentParser(description="Run the traffic advisory API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("API_WORKERS", 1)),
+                        help="worker processes; /jobs and /stream need exactly one")
+    parser.add_argument("--reload", action="store_true",
+                        help="development: restart on code changes (single process)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    if args.reload:
+        options = {"reload": True}
+    else:
+        # every worker has its own cache, job manager and live feed
+        options = {"workers": args.workers}
+
     uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+        "api.main:app",
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        **options
+    )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Per-frame cost of ObjectTracker.update against object count
+
+Run:
+python -m benchmarks.bench_object_tracker
+"""
+
+import random
+import time
+
+from detector.object_tracker import ObjectTracker
+
+FRAME_W, FRAME_H = 720, 1280
+OBJECT_COUNTS = [10, 50, 100, 200, 500, 1000]
+FRAMES = 50
+
+
+def make_scene(n_objects, seed=0):
+    rng = random.Random(seed)
+    positions = [
+        [rng.uniform(0, FRAME_W), rng.uniform(0, FRAME_H)]
+        for _ in range(n_objects)
+    ]
+    velocities = [
+        (rng.uniform(-4, 4), rng.uniform(-4, 4)) for _ in range(n_objects)
+    ]
+    return positions, velocities
+
+
+def bench_tracker(n_objects, frames=FRAMES):
+    positions, velocities = make_scene(n_objects)
+    tracker = ObjectTracker()
+    elapsed = 0.0
+
+    for _ in range(frames):
+        for pos, (vx, vy) in zip(positions, velocities):
+            pos[0] += vx
+            pos[1] += vy
+
+        detections = [
+            {"center": (int(x), int(y)), "label": "car"} for x, y in positions
+        ]
+
+        start = time.perf_counter()
+        tracker.update(detections)
+        elapsed += time.perf_counter() - start
+
+    return elapsed / frames
+
+
+if __name__ == "__main__":
+    print(f"{'objects':>8} | {'ms / frame':>10}")
+    print("-" * 22)
+    for n in OBJECT_COUNTS:
+        print(f"{n:>8} | {bench_tracker(n) * 1000:>10.3f}")
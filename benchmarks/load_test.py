@@ -0,0 +1,169 @@
+"""
+Load test: /advise latency against concurrency
+
+For each concurrency level, that many clients send POST /advise
+back-to-back until the level's request budget is spent. Every body is
+distinct (approach_payload with a fresh seed), so the advisory cache
+never answers; --repeat N cycles through only N bodies to measure the
+cached path instead. Reports p50 / p99 latency, throughput and errors
+per level.
+
+Run against a running server:
+python -m benchmarks.load_test --url http://127.0.0.1:8000
+
+or let the harness start one (python -m api.main) and stop it afterwards:
+python -m benchmarks.load_test --serve --workers 4 --executor process
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import approach_payload
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+DEFAULT_CONCURRENCY = "1,4,16,64"
+
+
+async def _client(client, url, bodies, next_index, latencies, errors):
+    while True:
+        i = next(next_index, None)
+        if i is None:
+            return
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json=bodies[i % len(bodies)])
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        if not ok:
+            errors.append(i)
+
+
+async def run_level(
+    base_url: str, concurrency: int, requests: int, bodies: List[Dict]
+) -> Dict:
+    latencies: List[float] = []
+    errors: List[int] = []
+    next_index = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _client(client, f"{base_url}/advise", bodies, next_index, latencies, errors)
+            for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "concurrency": concurrency,
+        "requests": len(ms),
+        "errors": len(errors),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+        "mean_ms": round(float(ms.mean()), 2),
+        "throughput_rps": round(len(ms) / elapsed, 1),
+    }
+
+
+# ------------------------------
+# LOCAL SERVER (--serve)
+# ------------------------------
+def start_server(port: int, workers: int, executor: Optional[str]) -> subprocess.Popen:
+    env = dict(os.environ)
+    if executor:
+        env["ADVISORY_EXECUTOR"] = executor
+    return subprocess.Popen(
+        [sys.executable, "-m", "api.main", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+
+
+def wait_healthy(base_url: str, server: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} not healthy after {timeout:.0f} s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY,
+                        help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=500,
+                        help="requests per concurrency level")
+    parser.add_argument("--repeat", type=int, default=0,
+                        help="cycle through N distinct bodies (cache hits)")
+    parser.add_argument("--format", default="json", choices=("text", "json", "html"))
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--serve", action="store_true",
+                        help="start python -m api.main on --url's port first")
+    parser.add_argument("--workers", type=int, default=1, help="with --serve")
+    parser.add_argument("--executor", help="with --serve: ADVISORY_EXECUTOR")
+    args = parser.parse_args(argv)
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    distinct = args.repeat or args.requests * len(levels)
+    bodies = [approach_payload(seed=i, fmt=args.format) for i in range(distinct)]
+
+    server = None
+    if args.serve:
+        server = start_server(httpx.URL(args.url).port or 8000, args.workers, args.executor)
+
+    results = []
+    try:
+        if server is not None:
+            wait_healthy(args.url, server)
+
+        print(f"{'clients':>8} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'errors':>7}")
+        for i, concurrency in enumerate(levels):
+            # a fresh slice of bodies per level unless repeating on purpose
+            level_bodies = bodies if args.repeat else bodies[i * args.requests:]
+            result = asyncio.run(
+                run_level(args.url, concurrency, args.requests, level_bodies)
+            )
+            results.append(result)
+            print(f"{concurrency:>8} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                  f"{result['throughput_rps']:>8.1f} {result['errors']:>7}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "url": args.url,
+                "workers": args.workers if args.serve else None,
+                "executor": args.executor,
+                "repeat": args.repeat,
+                "format": args.format,
+                "levels": results,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Per-component benchmark suite on synthetic inputs
+
+Times VideoReader, both trackers, ROI assignment, metrics building,
+SignalOptimizer and the /advise and /advise/batch endpoints separately. Every operation is
+timed on its own, and the median / p95 per operation are reported.
+Results are written as JSON. With --check, the run fails when a median
+exceeds its ceiling in thresholds.json.
+
+Run:
+python -m benchmarks.suite
+python -m benchmarks.suite --quick --check
+python -m benchmarks.suite --only sort_tracker,roi_assignment
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import (
+    approach_payload, detection_stream, render_video
+)
+from detector.object_tracker import ObjectTracker
+from detector.roi_index import get_roi_index
+from detector.roi_mapper import ROIS
+from detector.sort_tracker import SortTracker
+from detector.traffic_metrics import TrafficMetricsProcessor
+from detector.video_pipeline import build_metrics
+from detector.video_reader import VideoReader
+from engine.signal_optimizer import SignalOptimizer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, "results.json")
+DEFAULT_THRESHOLDS = os.path.join(HERE, "thresholds.json")
+
+# (full run, --quick)
+SIZES = {
+    "frames": (300, 60),
+    "video_frames": (150, 40),
+    "objects": (100, 50),
+    "calls": (500, 100),
+}
+
+
+def _summary(samples: List[float], unit: str) -> Dict:
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "unit": unit,
+        "ops": len(ms),
+        "median_ms": round(float(np.median(ms)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+    }
+
+
+def _time_each(ops) -> List[float]:
+    samples = []
+    for op in ops:
+        start = time.perf_counter()
+        op()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+# ------------------------------
+# BENCHMARKS
+# ------------------------------
+def bench_video_reader(size) -> Dict:
+    frames = SIZES["video_frames"][size]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = render_video(os.path.join(tmp, "synthetic.mp4"), frames)
+        reader = VideoReader(path)
+        try:
+            samples = _time_each(reader.read for _ in range(frames))
+        finally:
+            reader.release()
+    return _summary(samples, "ms/frame")
+
+
+def bench_object_tracker(size) -> Dict:
+    tracker = ObjectTracker()
+    frames = [
+        [{"center": tuple(c), "label": l} for c, l in zip(
+            batch.centers.tolist(), batch.labels.tolist()
+        )]
+        for batch in detection_stream(SIZES["frames"][size], SIZES["objects"][size])
+    ]
+    return _summary(
+        _time_each(lambda f=f: tracker.update(f) for f in frames), "ms/frame"
+    )
+
+
+def bench_sort_tracker(size) -> Dict:
+    tracker = SortTracker()
+    frames = [
+        (batch.centers, batch.cls)
+        for batch in detection_stream(SIZES["frames"][size], SIZES["objects"][size])
+    ]
+    return _summary(
+        _time_each(lambda f=f: tracker.update_arrays(*f) for f in frames),
+        "ms/frame",
+    )
+
+
+def bench_roi_assignment(size) -> Dict:
+    roi_index = get_roi_index(ROIS)
+    frames = list(detection_stream(SIZES["frames"][size], SIZES["objects"][size]))
+    return _summary(
+        _time_each(lambda b=b: b.in_rois(roi_index) for b in frames), "ms/frame"
+    )
+
+
+def bench_build_metrics(size) -> Dict:
+    # one call aggregates a window of frames' worth of objects
+    roi_index = get_roi_index(ROIS)
+    objects = [
+        obj
+        for batch in detection_stream(30, SIZES["objects"][size])
+        for obj in batch.in_rois(roi_index).to_dicts(("label", "approach"))
+    ]
+    calls = SIZES["calls"][size] // 5
+    return {
+        **_summary(_time_each(lambda: build_metrics(objects) for _ in range(calls)),
+                   "ms/call"),
+        "objects_per_call": len(objects),
+    }
+
+
+def bench_signal_optimizer(size) -> Dict:
+    optimizer = SignalOptimizer()
+    requests = [
+        TrafficMetricsProcessor.from_dicts(approach_payload(seed=i)["approaches"])
+        for i in range(SIZES["calls"][size])
+    ]
+    return _summary(
+        _time_each(lambda m=m: optimizer.optimize_timings(m, 120) for m in requests),
+        "ms/call",
+    )
+
+
+def bench_advise_endpoint(size) -> Dict:
+    try:
+        from fastapi.testclient import TestClient
+        from api.main import app
+    except ImportError as exc:  # fastapi / httpx missing
+        return {"skipped": str(exc)}
+
+    bodies = [approach_payload(seed=i) for i in range(SIZES["calls"][size] // 2)]
+
+    # `with` runs the app's lifespan (advisory executor, jobs)
+    with TestClient(app) as client:
+        client.post("/advise", json=bodies[0])   # warm up routing / validation
+
+        def call(body):
+            response = client.post("/advise", json=body)
+            response.raise_for_status()
+
+        return _summary(_time_each(lambda b=b: call(b) for b in bodies), "ms/request")
+
+
+def bench_advise_batch_endpoint(size) -> Dict:
+    try:
+        from fastapi.testclient import TestClient
+        from api.main import app
+    except ImportError as exc:
+        return {"skipped": str(exc)}
+
+    batch_size = 100
+    repeats = max(SIZES["calls"][size] // 50, 2)
+    # fresh payloads every repeat, so the advisory cache never answers
+    batches = [
+        [approach_payload(seed=r * batch_size + i) for i in range(batch_size)]
+        for r in range(repeats + 1)
+    ]
+    with TestClient(app) as client:
+        client.post("/advise/batch", json=batches.pop()[:1])
+
+        def call(batch):
+            response = client.post("/advise/batch", json=batch)
+            response.raise_for_status()
+
+        samples = [
+            s / batch_size for s in _time_each(lambda b=b: call(b) for b in batches)
+        ]
+    return {**_summary(samples, "ms/intersection"), "batch_size": batch_size}
+
+
+BENCHMARKS: Dict[str, Callable[[int], Dict]] = {
+    "video_reader": bench_video_reader,
+    "object_tracker": bench_object_tracker,
+    "sort_tracker": bench_sort_tracker,
+    "roi_assignment": bench_roi_assignment,
+    "build_metrics": bench_build_metrics,
+    "signal_optimizer": bench_signal_optimizer,
+    "advise_endpoint": bench_advise_endpoint,
+    "advise_batch_endpoint": bench_advise_batch_endpoint,
+}
+
+
+# ------------------------------
+# RUN / CHECK
+# ------------------------------
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run(names=None, quick=False) -> Dict:
+    size = 1 if quick else 0
+    results = {}
+    for name in names or BENCHMARKS:
+        print(f"  {name} ...", end="", flush=True)
+        results[name] = BENCHMARKS[name](size)
+        print(" skipped" if "skipped" in results[name]
+              else f" {results[name]['median_ms']:.3f} {results[name]['unit']}")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "quick": quick,
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def check(report: Dict, thresholds: Dict) -> List[str]:
+    """
+    Benchmarks whose median exceeds the ceiling for this run size
+    """
+    key = "quick" if report["quick"] else "full"
+    failures = []
+    for name, result in report["results"].items():
+        limit = thresholds.get(name, {}).get(key, {}).get("median_ms")
+        if limit is None or "skipped" in result:
+            continue
+        if result["median_ms"] > limit:
+            failures.append(
+                f"{name}: median {result['median_ms']:.3f} ms > {limit} ms"
+            )
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--quick", action="store_true", help="smaller inputs")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if a median exceeds its threshold")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else None
+    unknown = set(names or ()) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    report = run(names, args.quick)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.check:
+        with open(args.thresholds) as f:
+            failures = check(report, json.load(f))
+        for failure in failures:
+            print("REGRESSION", failure)
+        if failures:
+            return 1
+        print("All benchmarks within thresholds")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Synthetic inputs for the benchmarks (no camera, model, GPU or network)
+
+SyntheticScene moves boxes at constant velocity across a portrait frame,
+wrapping at the edges. The same scene can be rendered to a video file
+(render_video) or emitted directly as per-frame detections
+(detection_stream). Object count sets the density, class_mix the
+proportions of each class. Everything is seeded, so two runs see
+identical inputs.
+"""
+
+from typing import Dict, Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from detector.detection_batch import DetectionBatch
+
+FRAME_W, FRAME_H = 720, 1280
+
+# COCO ids, as YOLO reports them
+NAMES = {0: "person", 1: "bicycle", 2: "car", 3: "motorcycle", 5: "bus", 7: "truck"}
+
+DEFAULT_CLASS_MIX = {
+    "car": 0.5,
+    "motorcycle": 0.25,
+    "bus": 0.07,
+    "truck": 0.08,
+    "bicycle": 0.04,
+    "person": 0.06,
+}
+
+# (width, height) in pixels
+BOX_SIZES = {
+    "car": (48, 80),
+    "motorcycle": (20, 40),
+    "bus": (70, 160),
+    "truck": (64, 140),
+    "bicycle": (18, 36),
+    "person": (16, 32),
+}
+
+# BGR fill per class for rendered video
+COLORS = {
+    "car": (200, 60, 60),
+    "motorcycle": (60, 200, 60),
+    "bus": (60, 60, 200),
+    "truck": (200, 200, 60),
+    "bicycle": (200, 60, 200),
+    "person": (60, 200, 200),
+}
+
+
+class SyntheticScene:
+    """
+    n_objects:  boxes on screen at all times (detection density)
+    class_mix:  {label: weight}, normalised
+    max_speed:  pixels per frame along each axis
+    """
+
+    def __init__(
+        self,
+        n_objects: int = 50,
+        class_mix: Optional[Dict[str, float]] = None,
+        width: int = FRAME_W,
+        height: int = FRAME_H,
+        max_speed: float = 6.0,
+        seed: int = 0,
+    ):
+        mix = class_mix or DEFAULT_CLASS_MIX
+        self.width, self.height = width, height
+        self.rng = np.random.default_rng(seed)
+
+        labels = list(mix)
+        weights = np.array([mix[l] for l in labels], dtype=np.float64)
+        self.labels = np.array(labels, dtype=object)[
+            self.rng.choice(len(labels), n_objects, p=weights / weights.sum())
+        ]
+
+        codes = {label: code for code, label in NAMES.items()}
+        self.cls = np.array([codes[l] for l in self.labels], dtype=np.int16)
+        self.sizes = np.array([BOX_SIZES[l] for l in self.labels], dtype=np.float64)
+        self.positions = self.rng.uniform((0, 0), (width, height), (n_objects, 2))
+        self.velocities = self.rng.uniform(-max_speed, max_speed, (n_objects, 2))
+
+    def step(self):
+        self.positions = (self.positions + self.velocities) % (self.width, self.height)
+
+    @property
+    def xyxy(self) -> np.ndarray:
+        half = self.sizes / 2
+        boxes = np.concatenate([self.positions - half, self.positions + half], axis=1)
+        return np.clip(boxes, 0, (self.width, self.height, self.width, self.height))
+
+    def batch(self) -> DetectionBatch:
+        conf = self.rng.uniform(0.3, 0.95, len(self.cls))
+        return DetectionBatch(self.xyxy, self.cls, conf, names=NAMES)
+
+    def render(self) -> np.ndarray:
+        frame = np.full((self.height, self.width, 3), 90, dtype=np.uint8)
+        for (x1, y1, x2, y2), label in zip(self.xyxy.astype(int).tolist(), self.labels):
+            cv2.rectangle(frame, (x1, y1), (x2, y2), COLORS[label], -1)
+        return frame
+
+
+def detection_stream(
+    frames: int,
+    n_objects: int = 50,
+    class_mix: Optional[Dict[str, float]] = None,
+    seed: int = 0,
+) -> Iterator[DetectionBatch]:
+    """
+    One DetectionBatch per frame (as the detector would produce)
+    """
+    scene = SyntheticScene(n_objects, class_mix, seed=seed)
+    for _ in range(frames):
+        scene.step()
+        yield scene.batch()
+
+
+def render_video(
+    path: str,
+    frames: int = 120,
+    n_objects: int = 30,
+    class_mix: Optional[Dict[str, float]] = None,
+    fps: float = 30.0,
+    seed: int = 0,
+) -> str:
+    """
+    Write the scene to `path` (mp4v) and return the path
+    """
+    scene = SyntheticScene(n_objects, class_mix, seed=seed)
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (scene.width, scene.height)
+    )
+    try:
+        for _ in range(frames):
+            scene.step()
+            writer.write(scene.render())
+    finally:
+        writer.release()
+    return path
+
+
+def approach_payload(
+    approaches=("N", "S", "E", "W"), seed: int = 0, fmt: str = "json"
+) -> Dict:
+    """
+    /advise request body with random but plausible per-approach counts
+    """
+    rng = np.random.default_rng(seed)
+    levels = ["free", "stable", "congested", "severely_congested"]
+    body: List[Dict] = []
+
+    for approach in approaches:
+        counts = {
+            label: int(rng.integers(0, 30))
+            for label in ("car", "motorcycle", "auto", "bus", "truck", "bicycle")
+        }
+        body.append({
+            "approach_id": approach,
+            "vehicle_counts": counts,
+            "queue_length": round(float(rng.uniform(0, 150)), 1),
+            "lanes": int(rng.integers(1, 5)),
+            "congestion_level": levels[int(rng.integers(0, len(levels)))],
+            "pedestrian_count": int(rng.integers(0, 20)),
+            "current_green_time": 30,
+            "link_length": 100.0,
+        })
+
+    return {
+        "approaches": body,
+        "current_cycle_time": 120,
+        "emergency_vehicle_present": False,
+        "format": fmt,
+    }
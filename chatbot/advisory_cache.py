@@ -0,0 +1,159 @@
+"""
+Bounded LRU / TTL cache of formatted advisories
+
+An advisory is a pure function of the validated request apart from its
+timestamp, so identical requests (dashboards polling unchanged inputs)
+can be answered with the body formatted the first time. Entries are keyed
+on the sha256 of the request's canonical JSON plus the output format,
+expire after `ttl` seconds (which also bounds how stale the embedded
+timestamp can get) and are evicted least-recently-used beyond `maxsize`.
+
+The cache is per process; all operations take one lock, so it is safe to
+share between threads / the event loop and a thread-pool executor.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+CACHE_SIZE_ENV = "ADVISORY_CACHE_SIZE"
+CACHE_TTL_ENV = "ADVISORY_CACHE_TTL"
+
+DEFAULT_SIZE = 1024
+DEFAULT_TTL = 10.0  # seconds
+
+
+def request_key(payload: Dict[str, Any], fmt: str = "") -> str:
+    """
+    sha256 of the canonical JSON of `payload` (sorted keys, no
+    whitespace) and the output format
+    """
+    canonical = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(f"{fmt}\n{canonical}".encode()).hexdigest()
+
+
+class AdvisoryCache:
+    """
+    maxsize: entries kept (0 disables caching)
+    ttl:     seconds an entry stays valid
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE, ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "AdvisoryCache":
+        """
+        Size / TTL from $ADVISORY_CACHE_SIZE / $ADVISORY_CACHE_TTL
+        """
+        return cls(
+            maxsize=int(os.environ.get(CACHE_SIZE_ENV, DEFAULT_SIZE)),
+            ttl=float(os.environ.get(CACHE_TTL_ENV, DEFAULT_TTL)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ------------------------------
+    # LOOKUP / STORE
+    # ------------------------------
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any):
+        if not self.enabled:
+            return
+
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(
+        self, payload: Dict[str, Any], fmt: str, compute: Callable[[], Any]
+    ) -> Any:
+        """
+        Cached body for (payload, fmt), computing and storing it on a miss
+        (the computation runs outside the lock)
+        """
+        key = request_key(payload, fmt)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    async def get_or_compute_async(
+        self, payload: Dict[str, Any], fmt: str, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        get_or_compute for handlers that await the computation (e.g. in
+        an executor) instead of running it on the event loop
+        """
+        key = request_key(payload, fmt)
+        value = self.get(key)
+        if value is None:
+            value = await compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # ------------------------------
+    # REPORTING
+    # ------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -50,6 +50,7 @@ class TrafficAdvisoryChatbot:
                     "pedestrian_count": m.pedestrian_count,
                     "current_green_time": m.current_green_time,
                     "link_length": m.link_length,
+                    "demand_flow": m.demand_flow,
                 }
                 for m in metrics
             ],
@@ -65,7 +66,7 @@ class TrafficAdvisoryChatbot:
         if not self._validate_input(input_data):
             raise ValueError("Invalid input data")
 
-        all_metrics = [TrafficMetrics(**a) for a in input_data["approaches"]]
+        all_metrics = TrafficMetricsProcessor.from_dicts(input_data["approaches"])
 
         timings, cycle_time, analysis = self.optimizer.optimize_timings(
             all_metrics,
@@ -79,6 +80,43 @@ class TrafficAdvisoryChatbot:
             timings, cycle_time, analysis, all_metrics, input_data
         )
 
+    def process_batch(
+        self, requests: List[Dict[str, Any]]
+    ) -> List[ChatbotResponse]:
+        """
+        process_request for many intersections: metrics for every
+        approach are built together and optimised in one vectorised pass
+        """
+        for input_data in requests:
+            if not self._validate_input(input_data):
+                raise ValueError("Invalid input data")
+
+        approaches = [a for r in requests for a in r["approaches"]]
+        metrics = TrafficMetricsProcessor.from_dicts(approaches)
+
+        per_request, start = [], 0
+        for input_data in requests:
+            end = start + len(input_data["approaches"])
+            per_request.append(metrics[start:end])
+            start = end
+
+        results = self.optimizer.optimize_timings_batch([
+            (
+                all_metrics,
+                input_data.get(
+                    "current_cycle_time",
+                    TrafficConstants.DEFAULT_CYCLE_TIME,
+                ),
+            )
+            for all_metrics, input_data in zip(per_request, requests)
+        ])
+
+        return [
+            self._build_response(timings, cycle_time, analysis, all_metrics, input_data)
+            for (timings, cycle_time, analysis), all_metrics, input_data
+            in zip(results, per_request, requests)
+        ]
+
     def _validate_input(self, data: Dict) -> bool:
         if "approaches" not in data:
             return False
@@ -112,7 +150,7 @@ class TrafficAdvisoryChatbot:
             m = next(x for x in all_metrics if x.approach_id == t.approach_id)
             reasoning.append(
                 f"Approach {t.approach_id}: "
-                f"Demand = {m.calculate_pcu():.1f} PCU, "
+                f"Demand = {m.demand_pcu:.1f} PCU, "
                 f"Congestion = {m.congestion_level}, "
                 f"Pedestrians = {m.pedestrian_count}. "
                 f"Recommended {t.green_time}s green."
@@ -1,22 +1,25 @@
 from detector.roi_config import ROIS
+from detector.detection_batch import DetectionBatch
+from detector.roi_index import get_roi_index
 
 def get_bbox_center(bbox):
     x1, y1, x2, y2 = bbox
     return ((x1 + x2) // 2, (y1 + y2) // 2)
 
-def assign_approach(detections):
-    assigned = []
+def assign_approach(detections, frame_shape=None):
+    """
+    Keep detections inside an ROI and tag them with their approach
 
-    for det in detections:
-        cx, cy = get_bbox_center(det["bbox"])
+    detections: DetectionBatch (returned as a DetectionBatch) or
+    [{label, bbox}, ...] (returned as [{label, bbox, approach}, ...])
+    """
+    index = get_roi_index(ROIS, frame_shape)
 
-        for approach, (x1, y1, x2, y2) in ROIS.items():
-            if x1 <= cx <= x2 and y1 <= cy <= y2:
-                assigned.append({
-                    "label": det["label"],
-                    "bbox": det["bbox"],
-                    "approach": approach
-                })
-                break
+    if isinstance(detections, DetectionBatch):
+        return detections.in_rois(index)
 
-    return assigned
+    if not detections:
+        return []
+
+    batch = DetectionBatch.from_dicts(detections).in_rois(index)
+    return batch.to_dicts(("label", "bbox", "approach"))
@@ -0,0 +1,310 @@
+"""
+Pluggable inference backends for ObjectDetector
+
+A backend turns a list of BGR frames into one (xyxy, cls, conf) tuple of
+NumPy arrays per frame. Backends register themselves by name so they can
+be chosen per camera from config:
+
+    torch      ultralytics / PyTorch runtime (default)
+    onnx       ONNX Runtime on CPU, optionally dynamic-INT8 quantised
+    synthetic  deterministic fake detections for tests and benchmarks
+"""
+
+import ast
+import os
+import zlib
+from typing import Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from detector.model_registry import get_model, get_or_load
+
+BACKENDS: Dict[str, Callable] = {}
+
+Arrays = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def register_backend(name: str):
+    def decorator(cls):
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def create_backend(name: str = "torch", **options) -> "DetectorBackend":
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown detector backend '{name}' "
+            f"(available: {', '.join(sorted(BACKENDS))})"
+        )
+    return BACKENDS[name](**options)
+
+
+def _empty() -> Arrays:
+    return (
+        np.empty((0, 4), dtype=np.float32),
+        np.empty(0, dtype=int),
+        np.empty(0, dtype=np.float32),
+    )
+
+
+class DetectorBackend:
+    """Interface every backend implements"""
+
+    names: Dict[int, str] = {}
+
+    @property
+    def cache_tag(self) -> str:
+        """
+        Backend name and the options that change its detections, for the
+        DetectionCache key ("" = default torch backend)
+        """
+        raise NotImplementedError
+
+    def predict(self, frames: List[np.ndarray], conf: float) -> List[Arrays]:
+        raise NotImplementedError
+
+
+# ==============================
+# PYTORCH (ULTRALYTICS)
+# ==============================
+@register_backend("torch")
+class UltralyticsBackend(DetectorBackend):
+    def __init__(self, weights="yolov8n.pt", model=None, warmup=False, imgsz=None):
+        self.model = model if model is not None else get_model(weights, warmup=warmup)
+        self.imgsz = imgsz
+
+    @property
+    def names(self):
+        return self.model.names
+
+    @property
+    def cache_tag(self):
+        # untagged, so caches written before backends were tagged stay valid
+        return f"imgsz{self.imgsz}" if self.imgsz else ""
+
+    def predict(self, frames, conf):
+        options = {"conf": conf, "verbose": False}
+        if self.imgsz:
+            options["imgsz"] = self.imgsz
+
+        results = self.model(list(frames), **options)
+
+        # Bulk tensor → NumPy conversion (one copy per field, not per box)
+        return [
+            (
+                r.boxes.xyxy.cpu().numpy(),
+                r.boxes.cls.cpu().numpy().astype(int),
+                r.boxes.conf.cpu().numpy(),
+            )
+            for r in results
+        ]
+
+
+# ==============================
+# ONNX RUNTIME (CPU)
+# ==============================
+def export_onnx(weights: str) -> str:
+    """
+    yolov8n.pt → yolov8n.onnx (dynamic batch), exported once
+    """
+    onnx_path = os.path.splitext(weights)[0] + ".onnx"
+    if not os.path.exists(onnx_path):
+        onnx_path = get_model(weights).export(format="onnx", dynamic=True)
+    return onnx_path
+
+
+def quantize_onnx(onnx_path: str) -> str:
+    """
+    Dynamic INT8 weight quantisation, written next to the fp32 model
+    """
+    int8_path = os.path.splitext(onnx_path)[0] + ".int8.onnx"
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+
+def letterbox(frame, size):
+    """
+    Resize keeping aspect ratio and pad to size x size
+    Returns (image, scale, (pad_x, pad_y))
+    """
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+        frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR
+    )
+    return canvas, scale, (pad_x, pad_y)
+
+
+def batched_nms(boxes, scores, cls_ids, iou, score_threshold=0.0):
+    """
+    Class-aware NMS over xyxy boxes; returns kept indexes
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=int)
+
+    xywh = np.stack(
+        [boxes[:, 0], boxes[:, 1], boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]],
+        axis=1
+    )
+    idx = cv2.dnn.NMSBoxesBatched(
+        xywh.tolist(), scores.tolist(), cls_ids.tolist(), score_threshold, iou
+    )
+    return np.asarray(idx, dtype=int).reshape(-1)
+
+
+def decode_yolo_output(output, conf, iou, scale, pad, frame_shape) -> Arrays:
+    """
+    One image of YOLOv8 head output (4 + n_classes, n_anchors)
+    → NMS-filtered boxes in original frame coordinates
+    """
+    preds = output.T
+    class_scores = preds[:, 4:]
+    cls_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(preds)), cls_ids]
+
+    keep = scores >= conf
+    if not keep.any():
+        return _empty()
+    preds, cls_ids, scores = preds[keep], cls_ids[keep], scores[keep]
+
+    cx, cy, w, h = preds[:, 0], preds[:, 1], preds[:, 2], preds[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+    idx = batched_nms(boxes, scores, cls_ids, iou, conf)
+    boxes, cls_ids, scores = boxes[idx], cls_ids[idx], scores[idx]
+
+    boxes[:, [0, 2]] -= pad[0]
+    boxes[:, [1, 3]] -= pad[1]
+    boxes /= scale
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, frame_shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, frame_shape[0])
+
+    return boxes.astype(np.float32), cls_ids.astype(int), scores.astype(np.float32)
+
+
+@register_backend("onnx")
+class OnnxRuntimeBackend(DetectorBackend):
+    """
+    weights: .onnx file, or .pt weights exported to ONNX on first use
+    quantize: run dynamic INT8 quantisation (cached next to the model)
+    """
+
+    def __init__(
+        self,
+        weights="yolov8n.pt",
+        quantize=False,
+        imgsz=640,
+        iou=0.45,
+        threads=None,
+        warmup=False,
+    ):
+        import onnxruntime as ort
+
+        onnx_path = weights if weights.endswith(".onnx") else export_onnx(weights)
+        if quantize:
+            onnx_path = quantize_onnx(onnx_path)
+
+        def load():
+            options = ort.SessionOptions()
+            if threads:
+                options.intra_op_num_threads = threads
+            return ort.InferenceSession(
+                onnx_path, options, providers=["CPUExecutionProvider"]
+            )
+
+        self.session = get_or_load(("onnx", onnx_path, threads), load)
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+        self.iou = iou
+        self.quantize = quantize
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = (
+            ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+        )
+
+        if warmup:
+            self.predict([np.zeros((imgsz, imgsz, 3), dtype=np.uint8)], 0.25)
+
+    @property
+    def cache_tag(self):
+        precision = "int8" if self.quantize else "fp32"
+        return f"onnx-{precision}-imgsz{self.imgsz}-iou{self.iou:g}"
+
+    def predict(self, frames, conf):
+        if not frames:
+            return []
+
+        batch, transforms = [], []
+        for frame in frames:
+            image, scale, pad = letterbox(frame, self.imgsz)
+            batch.append(image)
+            transforms.append((scale, pad, frame.shape))
+
+        # BGR HWC uint8 → RGB NCHW float32
+        blob = np.ascontiguousarray(
+            np.stack(batch)[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32
+        ) / 255.0
+
+        outputs = self.session.run(None, {self.input_name: blob})[0]
+
+        return [
+            decode_yolo_output(out, conf, self.iou, scale, pad, shape)
+            for out, (scale, pad, shape) in zip(outputs, transforms)
+        ]
+
+
+# ==============================
+# SYNTHETIC (TESTS / BENCHMARKS)
+# ==============================
+@register_backend("synthetic")
+class SyntheticBackend(DetectorBackend):
+    """
+    Deterministic detections derived from frame content: the same frame
+    always yields the same boxes, with no model or network needed
+    """
+
+    DEFAULT_NAMES = {0: "person", 2: "car", 3: "motorcycle", 5: "bus", 7: "truck"}
+
+    def __init__(self, objects=8, seed=0, names=None, **_):
+        self.objects = objects
+        self.seed = seed
+        self.names = dict(names or self.DEFAULT_NAMES)
+        self._class_ids = np.array(sorted(self.names))
+
+    @property
+    def cache_tag(self):
+        return f"synthetic-n{self.objects}-seed{self.seed}"
+
+    def predict(self, frames, conf):
+        results = []
+
+        for frame in frames:
+            h, w = frame.shape[:2]
+            digest = zlib.crc32(np.ascontiguousarray(frame[::16, ::16]).tobytes())
+            rng = np.random.default_rng([self.seed, digest])
+
+            n = int(rng.integers(0, 2 * self.objects + 1))
+            x1 = rng.uniform(0, w * 0.9, n)
+            y1 = rng.uniform(0, h * 0.9, n)
+            bw = rng.uniform(min(20, w * 0.1), w * 0.1, n)
+            bh = rng.uniform(min(20, h * 0.1), h * 0.1, n)
+            boxes = np.stack(
+                [x1, y1, np.minimum(x1 + bw, w), np.minimum(y1 + bh, h)], axis=1
+            ).astype(np.float32)
+            cls_ids = rng.choice(self._class_ids, n)
+            scores = rng.uniform(0.1, 1.0, n).astype(np.float32)
+
+            keep = scores >= conf
+            results.append((boxes[keep], cls_ids[keep], scores[keep]))
+
+        return results
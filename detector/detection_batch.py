@@ -0,0 +1,236 @@
+"""
+Columnar detections for one frame
+
+Stages pass one DetectionBatch (parallel NumPy arrays: boxes, class
+codes, scores, track IDs, approach codes, speeds) instead of a list of
+per-object dicts. Dicts are only built at the API boundary, through
+to_dicts() or by iterating the batch.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from detector.roi_index import NO_APPROACH
+
+NO_TRACK = -1
+
+APPROACHES = ("N", "S", "E", "W")
+
+_LABEL_TABLES: Dict[int, Tuple[Dict, np.ndarray]] = {}
+
+
+def label_table(names: Dict[int, str]) -> np.ndarray:
+    """
+    {class id: label} → object array indexed by class id (cached per dict)
+    """
+    cached = _LABEL_TABLES.get(id(names))
+    if cached is not None and cached[0] is names:
+        return cached[1]
+
+    size = max(names, default=-1) + 1
+    table = np.array([names.get(i) for i in range(size)] + [None], dtype=object)
+    _LABEL_TABLES[id(names)] = (names, table)
+    return table
+
+
+class DetectionBatch:
+    """
+    xyxy:     (N, 4) float32 boxes in frame pixels
+    cls:      (N,) int16 class codes, labels in `names`
+    conf:     (N,) float32 scores
+    track_id: (N,) int64, NO_TRACK until a tracker has run
+    approach: (N,) int8 codes into `approaches`, NO_APPROACH if unassigned
+    speed:    (N,) float32 pixels per analysed frame
+    """
+
+    __slots__ = (
+        "xyxy", "cls", "conf", "track_id", "approach", "speed",
+        "names", "approaches",
+    )
+
+    def __init__(
+        self,
+        xyxy,
+        cls,
+        conf=None,
+        track_id=None,
+        approach=None,
+        speed=None,
+        names: Optional[Dict[int, str]] = None,
+        approaches: Sequence[str] = APPROACHES,
+    ):
+        self.cls = np.asarray(cls, dtype=np.int16).reshape(-1)
+        n = len(self.cls)
+
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = (
+            np.ones(n, dtype=np.float32) if conf is None
+            else np.asarray(conf, dtype=np.float32)
+        )
+        self.track_id = (
+            np.full(n, NO_TRACK, dtype=np.int64) if track_id is None
+            else np.asarray(track_id, dtype=np.int64)
+        )
+        self.approach = (
+            np.full(n, NO_APPROACH, dtype=np.int8) if approach is None
+            else np.asarray(approach, dtype=np.int8)
+        )
+        self.speed = (
+            np.zeros(n, dtype=np.float32) if speed is None
+            else np.asarray(speed, dtype=np.float32)
+        )
+        self.names = names if names is not None else {}
+        self.approaches = tuple(approaches)
+
+    # ------------------------------
+    # CONSTRUCTION
+    # ------------------------------
+    @classmethod
+    def empty(cls, names=None, approaches=APPROACHES) -> "DetectionBatch":
+        return cls(np.empty((0, 4)), np.empty(0), names=names, approaches=approaches)
+
+    @classmethod
+    def from_arrays(cls, arrays, names) -> "DetectionBatch":
+        """
+        Detector output (xyxy, cls, conf) → batch
+        """
+        xyxy, cls_ids, confs = arrays
+        return cls(xyxy, cls_ids, confs, names=names)
+
+    @classmethod
+    def from_dicts(
+        cls,
+        objects: Iterable[Dict],
+        names: Optional[Dict[int, str]] = None,
+        approaches: Sequence[str] = APPROACHES,
+    ) -> "DetectionBatch":
+        """
+        [{label, bbox | center, conf, id, approach, speed}, ...] → batch
+        Labels missing from `names` get new class codes.
+        """
+        objects = list(objects)
+        names = dict(names or {})
+        codes = {label: code for code, label in names.items()}
+        approach_codes = {a: i for i, a in enumerate(approaches)}
+
+        cls_ids, boxes = [], []
+        for obj in objects:
+            label = obj["label"]
+            if label not in codes:
+                codes[label] = max(names, default=-1) + 1
+                names[codes[label]] = label
+            cls_ids.append(codes[label])
+
+            if "bbox" in obj:
+                boxes.append(obj["bbox"])
+            elif "center" in obj:
+                cx, cy = obj["center"]
+                boxes.append((cx, cy, cx, cy))
+            else:
+                boxes.append((0, 0, 0, 0))
+
+        return cls(
+            boxes,
+            cls_ids,
+            [obj.get("conf", 1.0) for obj in objects],
+            [obj.get("id", NO_TRACK) for obj in objects],
+            [approach_codes.get(obj.get("approach"), NO_APPROACH) for obj in objects],
+            [obj.get("speed", 0.0) for obj in objects],
+            names=names,
+            approaches=approaches,
+        )
+
+    # ------------------------------
+    # COLUMNS
+    # ------------------------------
+    def __len__(self):
+        return len(self.cls)
+
+    @property
+    def centers(self) -> np.ndarray:
+        """(N, 2) int box centers, same rounding as the dict pipeline"""
+        boxes = self.xyxy.astype(np.int64)
+        return np.stack(
+            [(boxes[:, 0] + boxes[:, 2]) // 2, (boxes[:, 1] + boxes[:, 3]) // 2],
+            axis=1
+        )
+
+    @property
+    def labels(self) -> np.ndarray:
+        return label_table(self.names)[self.cls]
+
+    @property
+    def approach_labels(self) -> np.ndarray:
+        return np.array(list(self.approaches) + [None], dtype=object)[self.approach]
+
+    @property
+    def tracked(self) -> bool:
+        return bool(len(self)) and bool((self.track_id != NO_TRACK).all())
+
+    def select(self, index) -> "DetectionBatch":
+        """
+        Rows picked by a boolean mask or index array
+        """
+        return DetectionBatch(
+            self.xyxy[index], self.cls[index], self.conf[index],
+            self.track_id[index], self.approach[index], self.speed[index],
+            names=self.names, approaches=self.approaches,
+        )
+
+    def in_rois(self, roi_index) -> "DetectionBatch":
+        """
+        Assign approach codes from an ROIIndex and keep rows inside an ROI
+        """
+        if not len(self):
+            return DetectionBatch.empty(self.names, roi_index.labels)
+
+        codes = roi_index.lookup(self.centers)
+        inside = codes != NO_APPROACH
+
+        batch = self.select(inside)
+        batch.approach = codes[inside].astype(np.int8)
+        batch.approaches = tuple(roi_index.labels)
+        return batch
+
+    def count_matrix(self) -> np.ndarray:
+        """
+        (len(approaches), n_classes) object counts, one bincount
+        """
+        n_classes = max(max(self.names, default=-1) + 1, int(self.cls.max(initial=-1)) + 1)
+        shape = (len(self.approaches), n_classes)
+
+        valid = self.approach != NO_APPROACH
+        flat = self.approach[valid].astype(np.int64) * n_classes + self.cls[valid]
+        return np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+
+    # ------------------------------
+    # API BOUNDARY
+    # ------------------------------
+    def to_dicts(self, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Rows as dicts; fields default to label / bbox / conf plus
+        id / center / speed once tracked and approach once assigned
+        """
+        if fields is None:
+            fields = ["label", "bbox", "conf"]
+            if self.tracked:
+                fields += ["id", "center", "speed"]
+            if (self.approach != NO_APPROACH).any():
+                fields.append("approach")
+
+        columns = {
+            "label": lambda: self.labels.tolist(),
+            "bbox": lambda: map(tuple, self.xyxy.astype(int).tolist()),
+            "conf": lambda: self.conf.tolist(),
+            "id": lambda: self.track_id.tolist(),
+            "center": lambda: map(tuple, self.centers.tolist()),
+            "speed": lambda: self.speed.tolist(),
+            "approach": lambda: self.approach_labels.tolist(),
+        }
+        values = [columns[field]() for field in fields]
+
+        return [dict(zip(fields, row)) for row in zip(*values)]
+
+    def __iter__(self):
+        return iter(self.to_dicts())
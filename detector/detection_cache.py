@@ -0,0 +1,276 @@
+"""
+Persistent per-frame detection cache
+
+Layout (one directory per video fingerprint / model / threshold):
+
+    <root>/<video sha256>/<weights sha256>-conf<conf>[-<tag>]/
+        meta.json
+        shard_000000/frames.npy  offsets.npy  boxes.npy  cls.npy  conf.npy
+        shard_000001/...
+
+<tag> is the detector's cache_tag: its backend and the options that
+change its output (ONNX precision, input size, ROI tiling, ...). The
+default torch backend is untagged.
+
+Each shard holds up to `shard_size` consecutive frame indexes in columnar
+form and is opened memory-mapped, so re-reading detections costs a page
+fault instead of a forward pass.
+
+Shards are written to a temporary directory and renamed into place, so
+a crash or a second job on the same video never leaves a half-written
+shard behind; shards that fail validation are treated as missing.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+CACHE_DIR_ENV = "DETECTION_CACHE_DIR"
+
+_DIGESTS: Dict[Tuple, str] = {}
+
+
+def default_cache_dir() -> Optional[str]:
+    """
+    Cache root from $DETECTION_CACHE_DIR (None = caching disabled)
+    """
+    return os.environ.get(CACHE_DIR_ENV) or None
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    sha256 of a file, memoised per (path, size, mtime)
+    Falls back to hashing the name for paths that do not exist
+    (e.g. weights that ultralytics will download, stream URLs)
+    """
+    if not os.path.isfile(path):
+        return hashlib.sha256(path.encode()).hexdigest()
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _DIGESTS:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                digest.update(block)
+        _DIGESTS[key] = digest.hexdigest()
+    return _DIGESTS[key]
+
+
+SHARD_COLUMNS = ("frames", "offsets", "boxes", "cls", "conf")
+
+
+def _read_shard(shard_dir: str) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Memory-map one shard; None if it is missing or inconsistent
+    (a miss, so the frames are detected again)
+    """
+    try:
+        shard = {
+            name: np.load(os.path.join(shard_dir, f"{name}.npy"), mmap_mode="r")
+            for name in SHARD_COLUMNS
+        }
+    except (OSError, ValueError):
+        return None
+
+    offsets = shard["offsets"]
+    n_boxes = len(shard["boxes"])
+    if (
+        len(offsets) != len(shard["frames"]) + 1
+        or offsets[-1] != n_boxes
+        or len(shard["cls"]) != n_boxes
+        or len(shard["conf"]) != n_boxes
+    ):
+        return None
+    return shard
+
+
+def _swap_dir(src: str, dst: str):
+    """
+    Move the directory src to dst, replacing any dst
+    (os.replace cannot overwrite a non-empty directory)
+    """
+    while True:
+        try:
+            os.rename(src, dst)
+            return
+        except OSError:
+            if not os.path.isdir(dst):
+                raise
+        # another writer's shard, or ours from an earlier flush: retire it
+        old = f"{dst}.old-{os.getpid()}"
+        shutil.rmtree(old, ignore_errors=True)
+        try:
+            os.rename(dst, old)
+        except FileNotFoundError:
+            pass  # someone else retired it first
+        shutil.rmtree(old, ignore_errors=True)
+
+
+class DetectionCache:
+    """
+    get(frame_index) / put(frame_index, (xyxy, cls, conf)) over shards
+    """
+
+    def __init__(
+        self,
+        root: str,
+        video_path: str,
+        model_path: str = "yolov8n.pt",
+        conf: float = 0.25,
+        shard_size: int = 1000,
+        tag: str = "",
+    ):
+        self.shard_size = shard_size
+        self.path = os.path.join(
+            root,
+            file_digest(video_path)[:32],
+            f"{file_digest(model_path)[:32]}-conf{conf:g}"
+            + (f"-{tag}" if tag else ""),
+        )
+        os.makedirs(self.path, exist_ok=True)
+
+        self._meta_path = os.path.join(self.path, "meta.json")
+        self.meta = {"video": video_path, "model": model_path, "conf": conf}
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                self.meta.update(json.load(f))
+
+        self._shards: Dict[int, Optional[Dict[str, np.ndarray]]] = {}
+        self._pending: Dict[int, Dict[int, Tuple]] = {}
+
+    # ------------------------------
+    # METADATA
+    # ------------------------------
+    @property
+    def frame_count(self) -> Optional[int]:
+        """Total frames in the video, once a pass has reached its end"""
+        return self.meta.get("frame_count")
+
+    @property
+    def names(self) -> Optional[Dict[int, str]]:
+        names = self.meta.get("names")
+        return {int(k): v for k, v in names.items()} if names else None
+
+    @names.setter
+    def names(self, names: Dict[int, str]):
+        self.meta["names"] = {str(k): v for k, v in dict(names).items()}
+
+    def mark_end(self, frame_count: int):
+        self.meta["frame_count"] = int(frame_count)
+
+    # ------------------------------
+    # LOOKUP
+    # ------------------------------
+    def get(self, frame_index: int) -> Optional[Tuple]:
+        shard_id = frame_index // self.shard_size
+
+        pending = self._pending.get(shard_id)
+        if pending and frame_index in pending:
+            return pending[frame_index]
+
+        shard = self._load_shard(shard_id)
+        if shard is None:
+            return None
+
+        frames = shard["frames"]
+        pos = int(np.searchsorted(frames, frame_index))
+        if pos >= len(frames) or frames[pos] != frame_index:
+            return None
+
+        start, end = shard["offsets"][pos], shard["offsets"][pos + 1]
+        return (
+            shard["boxes"][start:end],
+            shard["cls"][start:end],
+            shard["conf"][start:end],
+        )
+
+    def has(self, frame_index: int) -> bool:
+        return self.get(frame_index) is not None
+
+    def _shard_dir(self, shard_id: int) -> str:
+        return os.path.join(self.path, f"shard_{shard_id:06d}")
+
+    def _load_shard(self, shard_id: int):
+        if shard_id not in self._shards:
+            self._shards[shard_id] = _read_shard(self._shard_dir(shard_id))
+        return self._shards[shard_id]
+
+    # ------------------------------
+    # STORE
+    # ------------------------------
+    def put(self, frame_index: int, arrays: Tuple):
+        xyxy, cls_ids, confs = arrays
+        shard_id = frame_index // self.shard_size
+
+        self._pending.setdefault(shard_id, {})[frame_index] = (
+            np.asarray(xyxy, dtype=np.float32).reshape(-1, 4),
+            np.asarray(cls_ids, dtype=np.int16),
+            np.asarray(confs, dtype=np.float32),
+        )
+
+        if len(self._pending[shard_id]) >= self.shard_size:
+            self._flush_shard(shard_id)
+
+    def flush(self):
+        for shard_id in list(self._pending):
+            self._flush_shard(shard_id)
+
+        tmp_path = f"{self._meta_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _flush_shard(self, shard_id: int):
+        entries = self._pending.pop(shard_id, {})
+        if not entries:
+            return
+
+        # Merge with frames already on disk for this shard
+        existing = self._load_shard(shard_id)
+        if existing is not None:
+            for pos, frame_index in enumerate(existing["frames"].tolist()):
+                if frame_index not in entries:
+                    start, end = existing["offsets"][pos], existing["offsets"][pos + 1]
+                    entries[frame_index] = (
+                        np.array(existing["boxes"][start:end]),
+                        np.array(existing["cls"][start:end]),
+                        np.array(existing["conf"][start:end]),
+                    )
+
+        frames = np.array(sorted(entries), dtype=np.int64)
+        sizes = [len(entries[i][1]) for i in frames.tolist()]
+        columns = {
+            "frames": frames,
+            "offsets": np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64),
+            "boxes": np.concatenate(
+                [entries[i][0] for i in frames.tolist()]
+            ).reshape(-1, 4),
+            "cls": np.concatenate([entries[i][1] for i in frames.tolist()]),
+            "conf": np.concatenate([entries[i][2] for i in frames.tolist()]),
+        }
+
+        # Write a complete new shard beside the old one, then swap it in:
+        # readers and other writers only ever see a whole shard
+        self._shards.pop(shard_id, None)
+        shard_dir = self._shard_dir(shard_id)
+        tmp_dir = f"{shard_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+        _swap_dir(tmp_dir, shard_dir)
+
+    def close(self):
+        self.flush()
+        self._shards.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
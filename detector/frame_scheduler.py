@@ -0,0 +1,131 @@
+"""
+Latency-budget frame scheduling for live feeds
+
+Frame i of a live source is available at start + i / fps. The scheduler
+keeps an EWMA of what each pipeline stage costs per frame and, before the
+next frame is read, drops as many frames as needed so that frame will be
+finished within target_latency of when the camera produced it. A fresh
+count is worth more than a complete one, so when analysis is slower than
+the source the pipeline falls back to analysing the newest frames instead
+of falling further behind.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class LatencyScheduler:
+    """
+    target_latency: seconds allowed between capture and finished analysis
+    source_fps:     frame rate of the source (None = taken from the reader)
+    alpha:          EWMA weight of the newest cost sample
+    """
+
+    def __init__(
+        self,
+        target_latency: float = 0.5,
+        source_fps: Optional[float] = None,
+        alpha: float = 0.2,
+    ):
+        self.target_latency = target_latency
+        self.source_fps = source_fps
+        self.alpha = alpha
+
+        self.stage_costs: Dict[str, float] = {}
+        self.start()
+
+    def start(self, fps: Optional[float] = None):
+        """
+        (Re)start the clock: frame 0 of the source is "now"
+        """
+        if fps and not self.source_fps:
+            self.source_fps = fps
+
+        self.started_at = time.perf_counter()
+        self.frames_analysed = 0
+        self.frames_dropped = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    # ------------------------------
+    # COST MODEL
+    # ------------------------------
+    @contextmanager
+    def stage(self, name: str, frames: int = 1):
+        """
+        Time one pipeline stage over `frames` frames
+        """
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            if frames > 0:
+                self.observe(name, (time.perf_counter() - began) / frames)
+
+    def observe(self, name: str, seconds_per_frame: float):
+        previous = self.stage_costs.get(name)
+        self.stage_costs[name] = (
+            seconds_per_frame if previous is None
+            else previous + self.alpha * (seconds_per_frame - previous)
+        )
+
+    @property
+    def frame_cost(self) -> float:
+        """Estimated seconds to analyse one frame end to end"""
+        return sum(self.stage_costs.values())
+
+    # ------------------------------
+    # SCHEDULING
+    # ------------------------------
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def frames_to_drop(self, next_index: int, frames: int = 1) -> int:
+        """
+        Source frames to skip before reading frame `next_index` so that
+        the next `frames` analysed frames complete within the latency budget
+        """
+        if not self.source_fps:
+            return 0
+
+        finish = self.elapsed() + frames * self.frame_cost
+        behind = (finish - self.target_latency) * self.source_fps - next_index
+        return max(math.ceil(behind), 0)
+
+    def dropped(self, count: int):
+        self.frames_dropped += count
+
+    def mark(self, frame_index: int):
+        """
+        Frame `frame_index` has been fully analysed
+        """
+        self.frames_analysed += 1
+        if self.source_fps:
+            captured = frame_index / self.source_fps
+            self.lag = max(self.elapsed() - captured, 0.0)
+            self.max_lag = max(self.max_lag, self.lag)
+
+    # ------------------------------
+    # REPORTING
+    # ------------------------------
+    @property
+    def achieved_fps(self) -> float:
+        elapsed = self.elapsed()
+        return self.frames_analysed / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> Dict:
+        return {
+            "target_latency": self.target_latency,
+            "source_fps": self.source_fps,
+            "achieved_fps": round(self.achieved_fps, 2),
+            "lag": round(self.lag, 3),
+            "max_lag": round(self.max_lag, 3),
+            "frames_analysed": self.frames_analysed,
+            "frames_dropped": self.frames_dropped,
+            "stage_ms": {
+                name: round(cost * 1000.0, 2)
+                for name, cost in self.stage_costs.items()
+            },
+        }
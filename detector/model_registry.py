@@ -0,0 +1,63 @@
+"""
+Process-wide, lazily initialised YOLO model registry
+
+Every entry point (ObjectDetector, run_yolo, visualize) asks the registry
+for weights instead of constructing YOLO itself, so each weights file is
+loaded once per process and ultralytics / torch are only imported when a
+model is actually requested.
+"""
+
+import threading
+from typing import Callable, Dict, Hashable
+
+_MODELS: Dict[Hashable, object] = {}
+_WARMED = set()
+_LOCK = threading.RLock()
+
+WARMUP_SHAPE = (640, 640, 3)
+
+
+def get_model(weights: str = "yolov8n.pt", warmup: bool = False):
+    """
+    Shared model for `weights`, loaded on first use
+
+    warmup=True runs one dummy frame through the model so the first real
+    frame does not pay for lazy initialisation
+    """
+    with _LOCK:
+        model = _MODELS.get(weights)
+        if model is None:
+            from ultralytics import YOLO
+
+            model = YOLO(weights)
+            _MODELS[weights] = model
+
+        if warmup and weights not in _WARMED:
+            import numpy as np
+
+            model(np.zeros(WARMUP_SHAPE, dtype=np.uint8), verbose=False)
+            _WARMED.add(weights)
+
+    return model
+
+
+def get_or_load(key: Hashable, loader: Callable[[], object]):
+    """
+    Generic registry entry (e.g. ONNX Runtime sessions): loader() runs
+    once per key per process
+    """
+    with _LOCK:
+        if key not in _MODELS:
+            _MODELS[key] = loader()
+        return _MODELS[key]
+
+
+def is_loaded(weights: str = "yolov8n.pt") -> bool:
+    return weights in _MODELS
+
+
+def clear():
+    """Drop every cached model (frees memory; next get_model reloads)"""
+    with _LOCK:
+        _MODELS.clear()
+        _WARMED.clear()
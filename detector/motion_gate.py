@@ -0,0 +1,117 @@
+"""
+Cheap motion gate in front of the detector
+
+Frames are downsampled to grayscale and compared against the frame the
+detector last ran on (or fed to a MOG2 background subtractor). Detection
+only runs when the fraction of changed pixels inside the ROIs crosses a
+threshold, or when max_skip frames have passed without one.
+"""
+
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from detector.roi_mapper import ROIS
+from detector.roi_index import ROIIndex
+
+
+class MotionGate:
+    """
+    rois: regions watched for motion; defaults to the roi_mapper ROIS the
+    pipeline assigns approaches with (pass the same ROIs used for counting)
+    """
+
+    def __init__(
+        self,
+        rois: Optional[Dict] = None,
+        downscale: int = 4,
+        pixel_threshold: int = 25,
+        motion_ratio: float = 0.002,
+        max_skip: int = 30,
+        method: str = "diff",
+    ):
+        if method not in ("diff", "mog2"):
+            raise ValueError(f"Unknown motion gate method '{method}'")
+
+        self.rois = ROIS if rois is None else rois
+        self.downscale = max(int(downscale), 1)
+        self.pixel_threshold = pixel_threshold
+        self.motion_ratio = motion_ratio
+        self.max_skip = max_skip
+        self.method = method
+
+        self.frames = 0
+        self.detections = 0
+        self.last_ratio = 0.0
+
+        self._shape = None
+        self._mask = None
+        self._reference = None
+        self._since_detection = 0
+        self._subtractor = (
+            cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+            if method == "mog2" else None
+        )
+
+    @property
+    def skip_ratio(self) -> float:
+        return 1.0 - self.detections / self.frames if self.frames else 0.0
+
+    def _prepare(self, frame):
+        h, w = frame.shape[:2]
+        size = (max(w // self.downscale, 1), max(h // self.downscale, 1))
+
+        if self._shape != (h, w):
+            # ROI mask at gate resolution (built once per frame size)
+            full = ROIIndex(self.rois, (h, w)).mask[:h, :w] > 0
+            self._mask = cv2.resize(
+                full.astype(np.uint8), size, interpolation=cv2.INTER_NEAREST
+            ).astype(bool)
+            self._shape = (h, w)
+            self._reference = None
+
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _changed_ratio(self, gray) -> Optional[float]:
+        if self._subtractor is not None:
+            # the subtractor must see every frame to keep its model current
+            changed = self._subtractor.apply(gray) > 0
+            if self._reference is None:
+                return None
+        elif self._reference is None:
+            return None
+        else:
+            changed = cv2.absdiff(gray, self._reference) > self.pixel_threshold
+
+        roi_pixels = int(self._mask.sum())
+        if roi_pixels == 0:
+            return float(changed.mean())
+        return float(np.count_nonzero(changed & self._mask)) / roi_pixels
+
+    def should_detect(self, frame) -> bool:
+        """
+        True when the detector should run on this frame
+        """
+        gray = self._prepare(frame)
+        ratio = self._changed_ratio(gray)
+        self.frames += 1
+
+        run = (
+            ratio is None
+            or ratio >= self.motion_ratio
+            or self._since_detection >= self.max_skip
+        )
+        self.last_ratio = ratio or 0.0
+
+        if run:
+            self.detections += 1
+            self._since_detection = 0
+            self._reference = gray
+        else:
+            self._since_detection += 1
+
+        return run
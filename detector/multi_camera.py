@@ -0,0 +1,371 @@
+"""
+Multi-camera ingestion: one worker process per video source
+"""
+
+import math
+import os
+import queue
+import time
+import traceback
+import multiprocessing as mp
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from detector.traffic_metrics import TrafficMetrics
+
+
+@dataclass
+class CameraSource:
+    """A video file or stream URL (rtsp://, http://, ...) to analyse"""
+
+    camera_id: str
+    url: str
+    # Replay a local file forever (stand-in for a live camera in tests)
+    loop: bool = False
+    stride: int = 1
+    max_frames: Optional[int] = None
+    # Inference backend for this camera (see detector.backends)
+    backend: str = "torch"
+    backend_options: Dict = field(default_factory=dict)
+    # Skip inference on static frames (see detector.motion_gate)
+    motion_gate: bool = False
+    # "union" / "tiles": run the detector on ROI crops (see detector.roi_tiling)
+    tiling: Optional[str] = None
+    tile_size: int = 320
+    # Seconds from capture to analysis; frames that would miss it are
+    # dropped (see detector.frame_scheduler). None = analyse every frame
+    target_latency: Optional[float] = None
+    # {approach: 3x3 pixel → metre homography} for measured queue lengths
+    # (see detector.queue_estimator); approaches without one fall back
+    # to stopped vehicles x VEHICLE_LENGTH_M
+    homographies: Dict = field(default_factory=dict)
+
+
+def load_camera_sources(path: str = "config/config.yaml") -> List[CameraSource]:
+    """
+    Read the `cameras:` list from the YAML config
+    """
+    import yaml
+
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+
+    return [CameraSource(**camera) for camera in config.get("cameras", [])]
+
+
+@dataclass
+class MetricsSnapshot:
+    """Per-approach metrics streamed back by a camera worker"""
+
+    camera_id: str
+    frame_index: int
+    timestamp: float
+    metrics: Dict[str, TrafficMetrics] = field(default_factory=dict)
+    final: bool = False
+    error: Optional[str] = None
+    # LatencyScheduler.stats() (achieved FPS, lag) when target_latency is set
+    stats: Optional[Dict] = None
+    # FlowMonitor.snapshot(): {window: {approach: veh/h, PCU/h, occupancy}}
+    flow: Optional[Dict] = None
+
+
+def plan_core_affinity(n_workers: int, cores: Sequence[int]) -> List[List[int]]:
+    """
+    Split a core budget between workers
+    (round-robin when there are more workers than cores; leftover cores
+    go one each to the first workers)
+    """
+    cores = list(cores)
+    if not cores:
+        return [[] for _ in range(n_workers)]
+
+    if n_workers >= len(cores):
+        return [[cores[i % len(cores)]] for i in range(n_workers)]
+
+    per_worker, extra = divmod(len(cores), n_workers)
+    plan, start = [], 0
+    for i in range(n_workers):
+        end = start + per_worker + (1 if i < extra else 0)
+        plan.append(cores[start:end])
+        start = end
+    return plan
+
+
+def _pin_to_cores(cores: List[int], backend: str = "torch"):
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    n_threads = max(len(cores), 1)
+    try:
+        import cv2
+        cv2.setNumThreads(n_threads)
+    except ImportError:
+        pass
+
+    # only the torch backend needs torch; others never import it
+    if backend == "torch":
+        try:
+            import torch
+            torch.set_num_threads(n_threads)
+        except ImportError:
+            pass
+
+
+def _default_detector(source: CameraSource):
+    from detector.object_detector import ObjectDetector
+    options = dict(source.backend_options)
+    if source.tiling:
+        # crops are tile_size; warm up and infer at that size
+        options["imgsz"] = source.tile_size
+
+    detector = ObjectDetector(backend=source.backend, warmup=True, **options)
+
+    if source.tiling:
+        from detector.roi_tiling import RoiTiler, TiledDetector
+        detector = TiledDetector(
+            detector, RoiTiler(mode=source.tiling, input_size=source.tile_size)
+        )
+    return detector
+
+
+def camera_worker(
+    source: CameraSource,
+    out_queue,
+    stop_event,
+    cores: List[int],
+    snapshot_every: int = 30,
+    batch_size: int = 1,
+    detector_factory: Optional[Callable] = None,
+):
+    """
+    Worker process body: read → detect → assign → metrics snapshot
+
+    detector_factory() overrides the detector built from the source's
+    backend settings
+    """
+    from detector.video_reader import VideoReader
+    from detector.sort_tracker import SortTracker
+    from detector.stream_aggregator import StreamingAggregator
+    from detector.flow_metrics import FlowMonitor
+    from detector.queue_estimator import QueueEstimator
+    from detector.video_pipeline import track_batch
+    from detector.motion_gate import MotionGate
+    from detector.roi_mapper import ROIS
+    from detector.frame_scheduler import LatencyScheduler
+
+    _pin_to_cores(cores, source.backend)
+
+    frame_index = -1
+    try:
+        detector = (
+            detector_factory() if detector_factory else _default_detector(source)
+        )
+        reader = VideoReader(source.url, stride=source.stride, prefetch=batch_size * 2)
+        tracker = SortTracker()
+        aggregator = StreamingAggregator(
+            flow=FlowMonitor(),
+            fps=reader.fps or 30.0,
+            queue=QueueEstimator(homographies=source.homographies),
+        )
+        # watch the same regions track_batch counts in
+        gate = MotionGate(rois=ROIS) if source.motion_gate else None
+        scheduler = (
+            LatencyScheduler(source.target_latency)
+            if source.target_latency is not None else None
+        )
+        if scheduler is not None:
+            scheduler.start(reader.fps)
+        frames_seen = 0
+        # keeps frame numbering monotonic across loop replays
+        replay_offset = 0
+
+        while not stop_event.is_set():
+            if source.max_frames is not None and frames_seen >= source.max_frames:
+                break
+
+            if scheduler is not None:
+                drop = scheduler.frames_to_drop(
+                    reader.frame_index + reader.stride, batch_size
+                )
+                if drop:
+                    skipped = reader.skip(math.ceil(drop / reader.stride))
+                    scheduler.dropped(skipped * reader.stride)
+
+            began = time.perf_counter()
+            frames = []
+            indexes = []
+            while len(frames) < batch_size:
+                frame = reader.read()
+                if frame is None:
+                    break
+                frames.append(frame)
+                indexes.append(reader.frame_index)
+
+            if not frames:
+                if source.loop:
+                    replay_offset += reader.position
+                    reader.release()
+                    reader = VideoReader(
+                        source.url, stride=source.stride, prefetch=batch_size * 2
+                    )
+                    if scheduler is not None:
+                        scheduler.start(reader.fps)
+                    continue
+                break
+
+            # None = static frame, tracks coast instead of running YOLO
+            active = [gate is None or gate.should_detect(f) for f in frames]
+            results = iter(detector.detect_batches(
+                [f for f, run in zip(frames, active) if run]
+            ))
+
+            for frame_index, run in zip(indexes, active):
+                batch = next(results) if run else None
+                aggregator.update(
+                    replay_offset + frame_index,
+                    track_batch(batch, tracker, detector.names)
+                )
+
+            if scheduler is not None:
+                scheduler.observe(
+                    "batch", (time.perf_counter() - began) / len(frames)
+                )
+                for index in indexes:
+                    scheduler.mark(index)
+
+            before = frames_seen // snapshot_every
+            frames_seen += len(frames)
+            if frames_seen // snapshot_every > before:
+                out_queue.put(MetricsSnapshot(
+                    camera_id=source.camera_id,
+                    frame_index=frame_index,
+                    timestamp=time.time(),
+                    metrics=aggregator.snapshot(reset=True),
+                    stats=scheduler.stats() if scheduler is not None else None,
+                    flow=aggregator.flow.snapshot(),
+                ))
+
+        reader.release()
+        out_queue.put(MetricsSnapshot(
+            camera_id=source.camera_id,
+            frame_index=frame_index,
+            timestamp=time.time(),
+            metrics=aggregator.snapshot(),
+            final=True,
+            stats=scheduler.stats() if scheduler is not None else None,
+            flow=aggregator.flow.snapshot(),
+        ))
+
+    except Exception:
+        out_queue.put(MetricsSnapshot(
+            camera_id=source.camera_id,
+            frame_index=frame_index,
+            timestamp=time.time(),
+            final=True,
+            error=traceback.format_exc(),
+        ))
+
+
+class MultiCameraSupervisor:
+    """
+    Runs one camera_worker process per source and merges their
+    snapshots into a single queue
+
+    Each worker owns its decoder and model, so a slow camera only
+    delays its own snapshots.
+    """
+
+    def __init__(
+        self,
+        sources: List[CameraSource],
+        cores: Optional[Sequence[int]] = None,
+        snapshot_every: int = 30,
+        batch_size: int = 1,
+        detector_factory: Optional[Callable] = None,
+    ):
+        if cores is None:
+            cores = (
+                sorted(os.sched_getaffinity(0))
+                if hasattr(os, "sched_getaffinity")
+                else list(range(os.cpu_count() or 1))
+            )
+
+        self.sources = list(sources)
+        self.cores = list(cores)
+        self.snapshot_every = snapshot_every
+        self.batch_size = batch_size
+        self.detector_factory = detector_factory
+
+        # spawn: workers must not inherit decoder threads / model state
+        self._ctx = mp.get_context("spawn")
+        self.queue = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._workers: Dict[str, mp.Process] = {}
+
+    def start(self):
+        affinity = plan_core_affinity(len(self.sources), self.cores)
+
+        for source, cores in zip(self.sources, affinity):
+            proc = self._ctx.Process(
+                target=camera_worker,
+                name=f"camera-{source.camera_id}",
+                args=(source, self.queue, self._stop, cores),
+                kwargs={
+                    "snapshot_every": self.snapshot_every,
+                    "batch_size": self.batch_size,
+                    "detector_factory": self.detector_factory,
+                },
+                daemon=True,
+            )
+            proc.start()
+            self._workers[source.camera_id] = proc
+
+        return self
+
+    def snapshots(self, timeout: Optional[float] = None) -> Iterator[MetricsSnapshot]:
+        """
+        Yield snapshots as they arrive until every worker has finished
+        (or no snapshot arrives within `timeout` seconds)
+        """
+        running = set(self._workers)
+        last_message = time.monotonic()
+
+        while running:
+            try:
+                snapshot = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                # a worker that died without a final snapshot
+                running = {
+                    cid for cid in running if self._workers[cid].is_alive()
+                }
+                if timeout is not None and time.monotonic() - last_message > timeout:
+                    return
+                continue
+
+            last_message = time.monotonic()
+            if snapshot.final:
+                running.discard(snapshot.camera_id)
+            yield snapshot
+
+    def request_stop(self):
+        """
+        Ask every worker to finish; they still send final snapshots, so
+        a thread iterating snapshots() ends normally
+        """
+        self._stop.set()
+
+    def stop(self, timeout: float = 5.0):
+        self.request_stop()
+
+        for proc in self._workers.values():
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+
+        self._workers.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,25 +1,81 @@
-from ultralytics import YOLO
+from detector.backends import create_backend
+from detector.detection_batch import DetectionBatch
 
 class ObjectDetector:
-    def __init__(self, model_path="yolov8n.pt"):
-        self.model = YOLO(model_path)
+    """
+    backend: name registered in detector.backends ("torch", "onnx",
+    "synthetic"); extra keyword arguments are passed to the backend
+    """
+
+    def __init__(
+        self,
+        model_path="yolov8n.pt",
+        conf=0.25,
+        model=None,
+        warmup=False,
+        backend="torch",
+        **backend_options
+    ):
+        if model is not None:
+            backend_options["model"] = model
+
+        self.backend = create_backend(
+            backend, weights=model_path, warmup=warmup, **backend_options
+        )
+        self.model = getattr(self.backend, "model", None)
+        self.model_path = model_path
+        self.conf = conf
+
+    @property
+    def names(self):
+        return self.backend.names
+
+    @property
+    def cache_tag(self):
+        """Backend and its options, part of the DetectionCache key"""
+        return self.backend.cache_tag
 
     def detect(self, frame):
         """
         Returns list of detections:
-        {label, bbox}
+        {label, bbox, conf}
+        """
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        """
+        Run one forward pass over a list of frames.
+        Returns one detection list per frame (same format as detect)
         """
-        results = self.model(frame, verbose=False)[0]
-        detections = []
+        return [
+            to_detections(arrays, self.names)
+            for arrays in self.detect_batch_arrays(frames)
+        ]
 
-        for box in results.boxes:
-            cls_id = int(box.cls[0])
-            label = self.model.names[cls_id]
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
+    def detect_batch_arrays(self, frames):
+        """
+        Like detect_batch, but returns (xyxy, cls, conf) NumPy arrays
+        per frame instead of dicts
+        """
+        if not frames:
+            return []
+
+        return self.backend.predict(list(frames), self.conf)
+
+    def detect_batches(self, frames):
+        """
+        Like detect_batch, but returns one columnar DetectionBatch
+        per frame (the format used between pipeline stages)
+        """
+        names = self.names
+        return [
+            DetectionBatch.from_arrays(arrays, names)
+            for arrays in self.detect_batch_arrays(frames)
+        ]
 
-            detections.append({
-                "label": label,
-                "bbox": (x1, y1, x2, y2)
-            })
 
-        return detections
+def to_detections(arrays, names):
+    """
+    (xyxy, cls, conf) arrays → [{label, bbox, conf}, ...]
+    """
+    return DetectionBatch.from_arrays(arrays, names).to_dicts()
@@ -1,29 +1,64 @@
 import math
+from collections import defaultdict
 
 class ObjectTracker:
+    """
+    Centroid tracker with spatial-hash nearest-neighbour matching
+
+    Existing objects are bucketed into a grid of max_distance-sized
+    cells, so each detection only looks at its 3x3 neighbourhood.
+    Candidate pairs are assigned nearest-first and one-to-one.
+    """
+
     def __init__(self, max_distance=50):
         self.next_id = 0
         self.objects = {}  # id -> (cx, cy)
         self.max_distance = max_distance
 
-    def update(self, detections):
-        updated = {}
+    def _cell(self, x, y):
+        return (int(x // self.max_distance), int(y // self.max_distance))
+
+    def _build_grid(self):
+        grid = defaultdict(list)
+        for obj_id, (ox, oy) in self.objects.items():
+            grid[self._cell(ox, oy)].append((obj_id, ox, oy))
+        return grid
+
+    def _candidate_pairs(self, detections):
+        grid = self._build_grid()
+        pairs = []
 
-        for det in detections:
+        for i, det in enumerate(detections):
             cx, cy = det["center"]
-            assigned = False
+            gx, gy = self._cell(cx, cy)
+
+            for nx in (gx - 1, gx, gx + 1):
+                for ny in (gy - 1, gy, gy + 1):
+                    for obj_id, ox, oy in grid.get((nx, ny), ()):
+                        dist = math.hypot(cx - ox, cy - oy)
+                        if dist < self.max_distance:
+                            pairs.append((dist, i, obj_id))
+
+        pairs.sort()
+        return pairs
+
+    def update(self, detections):
+        updated = {}
+        assigned = set()
 
-            for obj_id, (ox, oy) in self.objects.items():
-                dist = math.hypot(cx - ox, cy - oy)
-                if dist < self.max_distance:
-                    updated[obj_id] = (cx, cy)
-                    det["id"] = obj_id
-                    assigned = True
-                    break
+        # Nearest pairs first; each detection and each object used once
+        for _, i, obj_id in self._candidate_pairs(detections):
+            if i in assigned or obj_id in updated:
+                continue
+            det = detections[i]
+            det["id"] = obj_id
+            updated[obj_id] = det["center"]
+            assigned.add(i)
 
-            if not assigned:
+        for i, det in enumerate(detections):
+            if i not in assigned:
                 det["id"] = self.next_id
-                updated[self.next_id] = (cx, cy)
+                updated[self.next_id] = det["center"]
                 self.next_id += 1
 
         self.objects = updated
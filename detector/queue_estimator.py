@@ -1,27 +1,182 @@
+"""
+Stopped-vehicle queue detection and metric queue lengths
+
+Track state (id, last center, last update seen) is held in sorted arrays
+so one update matches, measures and evicts every track at once, and
+tracks unseen for `ttl` updates are dropped: memory is bounded by the
+vehicles in view, not by uptime.
+
+With a pixel → metre homography per approach (road plane, origin on the
+stop line, +y running upstream), the queue length is the distance from
+the stop line to the back of the farthest stopped vehicle. Approaches
+without one fall back to stopped vehicles x VEHICLE_LENGTH_M.
+"""
+
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+from detector.aggregation import PEDESTRIAN_LABEL, VEHICLE_LENGTH_M
+from detector.detection_batch import DetectionBatch
+
+
+def homography_from_points(image_points, world_points) -> np.ndarray:
+    """
+    3x3 pixel → metre homography from four (x, y) correspondences
+    """
+    return cv2.getPerspectiveTransform(
+        np.asarray(image_points, dtype=np.float32).reshape(4, 2),
+        np.asarray(world_points, dtype=np.float32).reshape(4, 2),
+    )
+
+
 class QueueEstimator:
     """
     Speed-based queue detection
     Returns LIST of queued objects (NOT length)
+
+    speed_threshold: L1 pixel displacement per update below which a
+                     track counts as stopped
+    ttl:             updates a track may go unseen before it is evicted
+    homographies:    {approach: 3x3 matrix} (see homography_from_points)
     """
 
-    def __init__(self, speed_threshold=2):
-        self.last_positions = {}
+    def __init__(
+        self,
+        speed_threshold=2,
+        ttl=30,
+        homographies: Optional[Dict] = None,
+        vehicle_length=VEHICLE_LENGTH_M,
+    ):
         self.speed_threshold = speed_threshold
+        self.ttl = ttl
+        self.vehicle_length = vehicle_length
+        self.homographies = {
+            approach: np.asarray(h, dtype=np.float64).reshape(3, 3)
+            for approach, h in (homographies or {}).items()
+        }
+
+        self.tick = 0
+        self.ids = np.empty(0, dtype=np.int64)        # sorted
+        self.positions = np.empty((0, 2))
+        self.last_seen = np.empty(0, dtype=np.int64)
+
+        # metres per approach, from the latest update
+        self.queue_lengths: Dict[str, float] = {}
+
+    @property
+    def last_positions(self) -> Dict[int, tuple]:
+        """Track id → last center (read-only view of the arrays)"""
+        return dict(zip(self.ids.tolist(), map(tuple, self.positions.tolist())))
+
+    def __len__(self):
+        return len(self.ids)
 
     def update(self, tracked_objects):
-        queued_objects = []
+        """
+        tracked_objects: DetectionBatch, or list of {id, center[, bbox,
+        approach]}. Returns the stopped ones in the same form.
+        """
+        if isinstance(tracked_objects, DetectionBatch):
+            batch = tracked_objects
+            stopped = self.update_arrays(batch.track_id, batch.centers)
+            vehicles = stopped & (batch.labels != PEDESTRIAN_LABEL)
+            self._measure(self._ground_points(batch.xyxy)[vehicles],
+                          batch.approach_labels[vehicles])
+            return batch.select(stopped)
+
+        objects = list(tracked_objects)
+        ids = np.array([obj["id"] for obj in objects], dtype=np.int64)
+        centers = np.array(
+            [obj["center"] for obj in objects], dtype=np.float64
+        ).reshape(-1, 2)
+
+        stopped = self.update_arrays(ids, centers)
+
+        queued = [obj for obj, s in zip(objects, stopped.tolist()) if s]
+        vehicles = [obj for obj in queued if obj.get("label") != PEDESTRIAN_LABEL]
+        ground = np.array(
+            [obj["bbox"] if "bbox" in obj else (*obj["center"], *obj["center"])
+             for obj in vehicles],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+        self._measure(
+            self._ground_points(ground),
+            np.array([obj.get("approach") for obj in vehicles], dtype=object),
+        )
+
+        return queued   # ✅ ALWAYS LIST
+
+    def update_arrays(self, ids, centers) -> np.ndarray:
+        """
+        ids: (N,) track ids, centers: (N, 2) pixels
+        Returns the boolean stopped mask aligned with the input rows
+        """
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        self.tick += 1
+
+        slots = np.searchsorted(self.ids, ids)
+        slots = np.minimum(slots, max(len(self.ids) - 1, 0))
+        known = (
+            (self.ids[slots] == ids) if len(self.ids)
+            else np.zeros(len(ids), dtype=bool)
+        )
+
+        speed = np.full(len(ids), np.inf)
+        speed[known] = np.abs(centers[known] - self.positions[slots[known]]).sum(axis=1)
+        stopped = speed < self.speed_threshold
+
+        # an id repeated within one update: only its last row is stored
+        last = np.zeros(len(ids), dtype=bool)
+        last[len(ids) - 1 - np.unique(ids[::-1], return_index=True)[1]] = True
+
+        update = known & last
+        self.positions[slots[update]] = centers[update]
+        self.last_seen[slots[update]] = self.tick
+
+        # new tracks, then restore sort order and drop stale ones
+        new = ~known & last
+        all_ids = np.concatenate([self.ids, ids[new]])
+        all_positions = np.concatenate([self.positions, centers[new]])
+        all_seen = np.concatenate(
+            [self.last_seen, np.full(int(new.sum()), self.tick, dtype=np.int64)]
+        )
+        keep = all_seen > self.tick - self.ttl
+        order = np.argsort(all_ids[keep], kind="stable")
+
+        self.ids = all_ids[keep][order]
+        self.positions = all_positions[keep][order]
+        self.last_seen = all_seen[keep][order]
+
+        return stopped
+
+    @staticmethod
+    def _ground_points(xyxy) -> np.ndarray:
+        # bottom-centre of the box: where the vehicle touches the road
+        xyxy = np.asarray(xyxy, dtype=np.float64).reshape(-1, 4)
+        return np.stack([(xyxy[:, 0] + xyxy[:, 2]) / 2, xyxy[:, 3]], axis=1)
 
-        for obj in tracked_objects:
-            obj_id = obj["id"]
-            cx, cy = obj["center"]
+    def _measure(self, ground, approaches):
+        """
+        Queue length (m) per approach from the stopped vehicles' ground points
+        """
+        lengths = {}
 
-            if obj_id in self.last_positions:
-                px, py = self.last_positions[obj_id]
-                speed = abs(cx - px) + abs(cy - py)
+        for approach in set(approaches.tolist()) - {None}:
+            mask = approaches == approach
+            homography = self.homographies.get(approach)
 
-                if speed < self.speed_threshold:
-                    queued_objects.append(obj)
+            if homography is None:
+                lengths[approach] = round(int(mask.sum()) * self.vehicle_length, 1)
+                continue
 
-            self.last_positions[obj_id] = (cx, cy)
+            world = cv2.perspectiveTransform(
+                ground[mask].reshape(-1, 1, 2), homography
+            ).reshape(-1, 2)
+            # front of the farthest stopped vehicle + its length
+            extent = float(world[:, 1].max()) + self.vehicle_length
+            lengths[approach] = round(max(extent, 0.0), 1)
 
-        return queued_objects   # ✅ ALWAYS LIST
+        self.queue_lengths = lengths
@@ -0,0 +1,123 @@
+"""
+Rasterised ROI lookup: approach assignment as one array gather
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+NO_APPROACH = -1
+
+
+def roi_bounds(roi) -> Tuple[int, int, int, int]:
+    """
+    Axis-aligned (x1, y1, x2, y2) of a polygon or rectangle ROI
+    """
+    pts = ROIIndex._as_shape(roi)
+    x1, y1 = pts.min(axis=0)
+    x2, y2 = pts.max(axis=0)
+    return int(x1), int(y1), int(x2), int(y2)
+
+
+class ROIIndex:
+    """
+    Label mask at frame resolution built once from ROI definitions
+
+    rois: {approach: polygon (N x 2 array)} or {approach: (x1, y1, x2, y2)}
+    Overlapping regions resolve to the first approach in dict order,
+    matching the original linear scans.
+    """
+
+    def __init__(self, rois: Dict, frame_shape: Optional[Tuple[int, int]] = None):
+        self.labels: List[str] = list(rois)
+        shapes = [self._as_shape(r) for r in rois.values()]
+
+        # Cover the full ROI extent so boundary points still hit the mask
+        extent_w = max((int(s[:, 0].max()) + 1 for s in shapes), default=0)
+        extent_h = max((int(s[:, 1].max()) + 1 for s in shapes), default=0)
+        height, width = frame_shape[:2] if frame_shape is not None else (0, 0)
+        height, width = max(height, extent_h), max(width, extent_w)
+
+        # 0 = outside every ROI, k = labels[k - 1]
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+
+        # Paint in reverse so earlier approaches win on overlaps
+        for code in reversed(range(len(shapes))):
+            roi = rois[self.labels[code]]
+            if self._is_rect(roi):
+                x1, y1, x2, y2 = (int(v) for v in roi)
+                self.mask[max(y1, 0):y2 + 1, max(x1, 0):x2 + 1] = code + 1
+            else:
+                cv2.fillPoly(self.mask, [shapes[code]], code + 1)
+
+        self._label_array = np.array(self.labels + [None], dtype=object)
+
+    @staticmethod
+    def _is_rect(roi) -> bool:
+        return np.ndim(roi) == 1 and len(roi) == 4
+
+    @classmethod
+    def _as_shape(cls, roi) -> np.ndarray:
+        if cls._is_rect(roi):
+            x1, y1, x2, y2 = roi
+            roi = [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+        return np.asarray(roi, dtype=np.int32).reshape(-1, 2)
+
+    def lookup(self, centers) -> np.ndarray:
+        """
+        centers: (N, 2) array of x, y
+        Returns int array of approach codes (index into self.labels),
+        NO_APPROACH for points outside every ROI
+        """
+        centers = np.asarray(centers)
+        if centers.size == 0:
+            return np.empty(0, dtype=np.int16)
+
+        if centers.dtype.kind == "f":
+            centers = np.floor(centers)
+        xs = centers[:, 0].astype(np.int64)
+        ys = centers[:, 1].astype(np.int64)
+        height, width = self.mask.shape
+
+        inside = (xs >= 0) & (ys >= 0) & (xs < width) & (ys < height)
+        codes = np.zeros(len(xs), dtype=np.int16)
+        codes[inside] = self.mask[ys[inside], xs[inside]]
+        return codes - 1
+
+    def assign(self, centers) -> List[Optional[str]]:
+        """
+        Vectorised lookup returning approach ids (None outside)
+        """
+        return self._label_array[self.lookup(centers)].tolist()
+
+    def assign_point(self, cx, cy) -> Optional[str]:
+        height, width = self.mask.shape
+        # floor, like lookup(): int() would pull -0.5 onto pixel 0
+        cx, cy = math.floor(cx), math.floor(cy)
+        if 0 <= cx < width and 0 <= cy < height:
+            code = self.mask[cy, cx]
+            return self.labels[code - 1] if code else None
+        return None
+
+
+_INDEXES: Dict[Tuple, ROIIndex] = {}
+
+
+def get_roi_index(
+    rois: Dict,
+    frame_shape: Optional[Sequence[int]] = None,
+    camera_id: str = "default",
+) -> ROIIndex:
+    """
+    Per-camera ROIIndex, built on first use and reused afterwards
+    """
+    shape = tuple(frame_shape[:2]) if frame_shape is not None else None
+    key = (camera_id, id(rois), shape)
+
+    index = _INDEXES.get(key)
+    if index is None:
+        index = ROIIndex(rois, shape)
+        _INDEXES[key] = index
+    return index
@@ -3,6 +3,8 @@
 #         if x1 <= x <= x2 and y1 <= y <= y2:
 #             return approach
 #     return None
+from detector.roi_index import get_roi_index
+
 # Adjust these based on your camera view
 # detector/roi_config.py
 
@@ -18,7 +20,11 @@ def assign_approach(cx, cy):
     """
     Assign object to N/S/E/W based on center point
     """
-    for approach, (x1, y1, x2, y2) in ROIS.items():
-        if x1 <= cx <= x2 and y1 <= cy <= y2:
-            return approach
-    return None
+    return get_roi_index(ROIS).assign_point(cx, cy)
+
+
+def assign_approaches(centers):
+    """
+    Vectorised assign_approach for an (N, 2) array of centers
+    """
+    return get_roi_index(ROIS).assign(centers)
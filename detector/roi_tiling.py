@@ -0,0 +1,186 @@
+"""
+ROI-cropped / tiled inference
+
+Only the approach regions matter, so instead of sending the full frame to
+the detector we send either the bounding box of all ROIs ("union") or one
+tile per approach ("tiles"), resized to a smaller input size. Tiles of a
+whole batch of frames go through a single forward pass and boxes are
+mapped back to frame coordinates.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from detector.backends import batched_nms
+from detector.detection_batch import DetectionBatch
+from detector.object_detector import to_detections
+from detector.roi_index import roi_bounds
+from detector.roi_mapper import ROIS
+
+Region = Tuple[int, int, int, int]
+
+
+class RoiTiler:
+    """
+    rois: {approach: polygon or (x1, y1, x2, y2)} (default: roi_mapper.ROIS)
+    mode: "union" (one crop) or "tiles" (one crop per approach); union
+          only saves pixels when the ROIs leave part of the frame out
+    input_size: longest side of each crop after resizing
+    margin: pixels added around each region so edge vehicles are whole
+    """
+
+    def __init__(
+        self,
+        rois: Optional[Dict] = None,
+        mode: str = "union",
+        input_size: int = 320,
+        margin: int = 16,
+    ):
+        if mode not in ("union", "tiles"):
+            raise ValueError(f"Unknown tiling mode '{mode}'")
+
+        self.rois = ROIS if rois is None else rois
+        self.mode = mode
+        self.input_size = input_size
+        self.margin = margin
+        self._regions: Dict[Tuple[int, int], List[Region]] = {}
+
+    def regions(self, frame_shape) -> List[Region]:
+        """
+        Crop rectangles for this frame size (computed once per size)
+        """
+        h, w = frame_shape[:2]
+        if (h, w) not in self._regions:
+            boxes = [roi_bounds(roi) for roi in self.rois.values()]
+
+            if self.mode == "union":
+                boxes = [(
+                    min(b[0] for b in boxes), min(b[1] for b in boxes),
+                    max(b[2] for b in boxes), max(b[3] for b in boxes),
+                )]
+
+            regions = []
+            for x1, y1, x2, y2 in boxes:
+                x1, y1 = max(x1 - self.margin, 0), max(y1 - self.margin, 0)
+                x2, y2 = min(x2 + self.margin, w), min(y2 + self.margin, h)
+                if x2 > x1 and y2 > y1:
+                    regions.append((x1, y1, x2, y2))
+
+            self._regions[(h, w)] = regions
+        return self._regions[(h, w)]
+
+    def crops(self, frame):
+        """
+        [(resized crop, (offset_x, offset_y), scale), ...]
+        """
+        out = []
+        for x1, y1, x2, y2 in self.regions(frame.shape):
+            crop = frame[y1:y2, x1:x2]
+            scale = self.input_size / max(crop.shape[:2])
+            if scale != 1.0:
+                crop = cv2.resize(
+                    crop,
+                    (max(int(round(crop.shape[1] * scale)), 1),
+                     max(int(round(crop.shape[0] * scale)), 1)),
+                    interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR,
+                )
+            out.append((crop, (x1, y1), scale))
+        return out
+
+
+class TiledDetector:
+    """
+    Drop-in for ObjectDetector (detect / detect_batch / detect_batches /
+    detect_batch_arrays)
+    that runs on ROI crops instead of full frames
+    """
+
+    def __init__(self, detector, tiler: Optional[RoiTiler] = None, iou: float = 0.5):
+        self.detector = detector
+        self.tiler = tiler or RoiTiler()
+        self.iou = iou
+
+        # crops are already input_size: run the model at that size too,
+        # not at its default (640), which would upscale them again
+        backend = getattr(detector, "backend", None)
+        if hasattr(backend, "imgsz"):
+            backend.imgsz = self.tiler.input_size
+
+        # tiled detections differ from full-frame ones: cache them apart
+        self.cache_tag = "-".join(filter(None, (
+            getattr(detector, "cache_tag", ""),
+            f"{self.tiler.mode}{self.tiler.input_size}",
+        )))
+
+    @property
+    def names(self):
+        return self.detector.names
+
+    @property
+    def model_path(self):
+        return self.detector.model_path
+
+    @property
+    def conf(self):
+        return self.detector.conf
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
+
+    def detect_batch(self, frames):
+        return [
+            to_detections(arrays, self.names)
+            for arrays in self.detect_batch_arrays(frames)
+        ]
+
+    def detect_batches(self, frames):
+        names = self.names
+        return [
+            DetectionBatch.from_arrays(arrays, names)
+            for arrays in self.detect_batch_arrays(frames)
+        ]
+
+    def detect_batch_arrays(self, frames):
+        if not frames:
+            return []
+
+        tiles, owners = [], []
+        for i, frame in enumerate(frames):
+            for crop, offset, scale in self.tiler.crops(frame):
+                tiles.append(crop)
+                owners.append((i, offset, scale))
+
+        # every tile of every frame in one forward pass
+        tile_results = self.detector.detect_batch_arrays(tiles)
+
+        per_frame = [[] for _ in frames]
+        for (i, (ox, oy), scale), (xyxy, cls_ids, confs) in zip(owners, tile_results):
+            boxes = np.asarray(xyxy, dtype=np.float32) / scale
+            boxes[:, [0, 2]] += ox
+            boxes[:, [1, 3]] += oy
+            per_frame[i].append((boxes, np.asarray(cls_ids), np.asarray(confs)))
+
+        results = []
+        for parts in per_frame:
+            if not parts:
+                results.append((
+                    np.empty((0, 4), dtype=np.float32),
+                    np.empty(0, dtype=int),
+                    np.empty(0, dtype=np.float32),
+                ))
+                continue
+
+            boxes = np.concatenate([p[0] for p in parts])
+            cls_ids = np.concatenate([p[1] for p in parts]).astype(int)
+            confs = np.concatenate([p[2] for p in parts])
+
+            # overlapping tiles can see the same vehicle twice
+            if len(parts) > 1:
+                keep = batched_nms(boxes, confs, cls_ids, self.iou)
+                boxes, cls_ids, confs = boxes[keep], cls_ids[keep], confs[keep]
+
+            results.append((boxes, cls_ids, confs))
+
+        return results
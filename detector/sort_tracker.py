@@ -1,78 +1,194 @@
-import math
 import numpy as np
-from filterpy.kalman import KalmanFilter
+from scipy.optimize import linear_sum_assignment
+
+from monitoring import timed
+
+# Constant-velocity model, state = [x, y, vx, vy]
+F = np.array([[1, 0, 1, 0],
+              [0, 1, 0, 1],
+              [0, 0, 1, 0],
+              [0, 0, 0, 1]], dtype=np.float64)
+Q = np.eye(4)
+R = np.eye(2) * 5
+P0 = np.eye(4) * 10
+
 
 class SortTracker:
+    """
+    SORT-style tracker with every track's Kalman state held in stacked
+    arrays: one batched predict per frame and a global (Hungarian)
+    assignment between predicted positions and detections
+    """
+
     def __init__(self, max_age=10, match_distance=50):
-        self.trackers = []
         self.track_id = 0
         self.max_age = max_age
         self.match_distance = match_distance
 
-    def _create_tracker(self, x, y):
-        kf = KalmanFilter(dim_x=4, dim_z=2)
-        kf.x = np.array([x, y, 0, 0])
-        kf.F = np.array([[1, 0, 1, 0],
-                         [0, 1, 0, 1],
-                         [0, 0, 1, 0],
-                         [0, 0, 0, 1]])
-        kf.H = np.array([[1, 0, 0, 0],
-                         [0, 1, 0, 0]])
-        kf.P *= 10
-        kf.R *= 5
-
-        self.track_id += 1
-        return {
-            "id": self.track_id,
-            "kf": kf,
-            "age": 0,
-            "last_pos": (x, y)
-        }
+        self.ids = np.empty(0, dtype=np.int64)
+        self.x = np.empty((0, 4))             # state per track
+        self.P = np.empty((0, 4, 4))          # covariance per track
+        self.age = np.empty(0, dtype=np.int64)
+        self.last_pos = np.empty((0, 2))
+        self.labels = np.empty(0, dtype=object)
+
+    def __len__(self):
+        return len(self.ids)
 
     def update(self, detections):
         """
         detections: list of dicts
         { "center": (x,y), "label": str }
         """
-        tracked_objects = []
-
-        for det in detections:
-            x, y = det["center"]
-            label = det["label"]
-            matched = False
-
-            for t in self.trackers:
-                t["kf"].predict()
-                px, py = t["kf"].x[:2]
-
-                if math.hypot(px - x, py - y) < self.match_distance:
-                    t["kf"].update(np.array([x, y]))
-                    speed = math.hypot(x - t["last_pos"][0], y - t["last_pos"][1])
-                    t["last_pos"] = (x, y)
-                    t["age"] = 0
-
-                    tracked_objects.append({
-                        "id": t["id"],
-                        "center": (x, y),
-                        "speed": speed,
-                        "label": label
-                    })
-                    matched = True
-                    break
-
-            if not matched:
-                t = self._create_tracker(x, y)
-                tracked_objects.append({
-                    "id": t["id"],
-                    "center": (x, y),
-                    "speed": 0.0,
-                    "label": label
-                })
-                self.trackers.append(t)
-
-        for t in self.trackers:
-            t["age"] += 1
-
-        self.trackers = [t for t in self.trackers if t["age"] < self.max_age]
-
-        return tracked_objects
+        centers = np.array(
+            [det["center"] for det in detections], dtype=np.float64
+        ).reshape(-1, 2)
+
+        labels = [det["label"] for det in detections]
+        ids, speeds = self.update_arrays(centers, labels)
+
+        return [
+            {
+                "id": track_id,
+                "center": det["center"],
+                "speed": speed,
+                "label": det["label"]
+            }
+            for det, track_id, speed in zip(
+                detections, ids.tolist(), speeds.tolist()
+            )
+        ]
+
+    @timed("track")
+    def update_arrays(self, centers, labels=None):
+        """
+        centers: (N, 2) array (labels: optional per-row class labels)
+        Returns (track ids, speeds) aligned with the input rows
+        """
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        n_dets = len(centers)
+
+        self._predict()
+
+        ids = np.empty(n_dets, dtype=np.int64)
+        speeds = np.zeros(n_dets)
+
+        track_idx, det_idx = self._associate(centers)
+
+        labels = np.asarray(
+            labels if labels is not None else [None] * n_dets, dtype=object
+        )
+
+        if len(track_idx):
+            z = centers[det_idx]
+            self._correct(track_idx, z)
+
+            speeds[det_idx] = np.hypot(*(z - self.last_pos[track_idx]).T)
+            ids[det_idx] = self.ids[track_idx]
+            self.last_pos[track_idx] = z
+            self.age[track_idx] = 0
+            self.labels[track_idx] = labels[det_idx]
+
+        unmatched = np.setdiff1d(np.arange(n_dets), det_idx, assume_unique=True)
+        if len(unmatched):
+            ids[unmatched] = self._spawn(centers[unmatched], labels[unmatched])
+
+        self.age += 1
+        self._prune(self.age < self.max_age)
+
+        return ids, speeds
+
+    # ------------------------------
+    # KALMAN STEPS (all tracks at once)
+    # ------------------------------
+    def _predict(self):
+        if not len(self.ids):
+            return
+        self.x = self.x @ F.T
+        self.P = F @ self.P @ F.T + Q
+
+    def _correct(self, track_idx, z):
+        x = self.x[track_idx]
+        P = self.P[track_idx]
+
+        # H = [I 0], so H·x, P·Hᵀ and H·P·Hᵀ are slices
+        innovation = z - x[:, :2]
+        S = P[:, :2, :2] + R
+        K = P[:, :, :2] @ np.linalg.inv(S)
+
+        self.x[track_idx] = x + (K @ innovation[:, :, None])[:, :, 0]
+        self.P[track_idx] = P - K @ P[:, :2, :]
+
+    def _associate(self, centers):
+        empty = np.empty(0, dtype=np.int64)
+        if not len(self.ids) or not len(centers):
+            return empty, empty
+
+        predicted = self.x[:, :2]
+        cost = np.linalg.norm(predicted[:, None, :] - centers[None, :, :], axis=2)
+
+        # Gate impossible pairs so the solver never prefers them
+        gated = np.where(cost < self.match_distance, cost, 1e9)
+        track_idx, det_idx = linear_sum_assignment(gated)
+
+        keep = cost[track_idx, det_idx] < self.match_distance
+        return track_idx[keep], det_idx[keep]
+
+    def coast(self):
+        """
+        Carry tracks forward on a frame where detection was skipped:
+        one Kalman predict, no aging. Returns the tracks confirmed on the
+        last detection frame in update() format, at predicted positions.
+        """
+        ids, centers, speeds, labels = self.coast_arrays()
+
+        return [
+            {
+                "id": track_id,
+                "center": (int(round(cx)), int(round(cy))),
+                "speed": speed,
+                "label": label
+            }
+            for track_id, (cx, cy), speed, label in zip(
+                ids.tolist(), centers.tolist(), speeds.tolist(), labels.tolist()
+            )
+        ]
+
+    def coast_arrays(self):
+        """
+        coast() as arrays: (ids, predicted centers, speeds, labels)
+        """
+        self._predict()
+
+        live = np.flatnonzero(self.age <= 1)
+        return (
+            self.ids[live],
+            self.x[live, :2],
+            np.hypot(self.x[live, 2], self.x[live, 3]),
+            self.labels[live],
+        )
+
+    def _spawn(self, centers, labels):
+        n = len(centers)
+        new_ids = np.arange(self.track_id + 1, self.track_id + n + 1)
+        self.track_id += n
+
+        states = np.zeros((n, 4))
+        states[:, :2] = centers
+
+        self.ids = np.concatenate([self.ids, new_ids])
+        self.x = np.concatenate([self.x, states])
+        self.P = np.concatenate([self.P, np.repeat(P0[None], n, axis=0)])
+        self.age = np.concatenate([self.age, np.zeros(n, dtype=np.int64)])
+        self.last_pos = np.concatenate([self.last_pos, centers])
+        self.labels = np.concatenate([self.labels, labels])
+
+        return new_ids
+
+    def _prune(self, keep):
+        self.ids = self.ids[keep]
+        self.x = self.x[keep]
+        self.P = self.P[keep]
+        self.age = self.age[keep]
+        self.last_pos = self.last_pos[keep]
+        self.labels = self.labels[keep]
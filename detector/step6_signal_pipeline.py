@@ -1,4 +1,4 @@
-from detector.traffic_metrics import TrafficMetrics
+from detector.aggregation import AggregationEngine
 from chatbot.traffic_advisor import TrafficAdvisoryChatbot
 
 # PCU values (IRC-style)
@@ -28,32 +28,22 @@ def build_metrics_from_queue(queue_data):
         ...
     }
     """
-    metrics = {}
-
-    for approach, data in queue_data.items():
-        pcu = calculate_pcu(data["vehicles"])
-
-        # Congestion classification
-        if pcu > 300:
-            congestion = "severely_congested"
-        elif pcu > 150:
-            congestion = "congested"
-        elif pcu > 50:
-            congestion = "stable"
-        else:
-            congestion = "free"
-
-        metrics[approach] = TrafficMetrics(
-            approach_id=approach,
-            vehicle_counts=data["vehicles"],
-            queue_length=data["queue_length"],
-            lanes=LANES[approach],
-            congestion_level=congestion,
-            pedestrian_count=data["pedestrians"],
-            current_green_time=30
-        )
-
-    return metrics
+    # Congestion classification on PCU alone, with measured queues
+    engine = AggregationEngine(
+        approaches=list(queue_data),
+        lanes=LANES,
+        pcu=PCU_MAP,
+        thresholds={"pcu": (50, 150, 300)},
+    )
+
+    vehicle_counts = {a: data["vehicles"] for a, data in queue_data.items()}
+    aggregate = engine.aggregate_counts(
+        vehicle_counts,
+        {a: data["pedestrians"] for a, data in queue_data.items()},
+        queue_length={a: data["queue_length"] for a, data in queue_data.items()},
+    )
+
+    return engine.to_metrics(aggregate, vehicle_counts=vehicle_counts)
 
 
 def run_signal_advisory(queue_data):
@@ -0,0 +1,156 @@
+"""
+Constant-memory aggregation of tracked objects into TrafficMetrics
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from detector.detection_batch import DetectionBatch
+from detector.traffic_metrics import TrafficMetrics
+from detector.aggregation import AggregationEngine
+from detector.flow_metrics import FlowMonitor
+from detector.queue_estimator import QueueEstimator
+
+APPROACHES = ("N", "S", "E", "W")
+
+
+class StreamingAggregator:
+    """
+    Folds per-frame tracked objects into running per-approach,
+    per-class counters
+
+    Each track ID is counted once, on the frame it is first seen.
+    IDs not seen for `track_ttl` frames are evicted, so state is bounded
+    by the number of vehicles currently in view, not by video length.
+
+    With a FlowMonitor, every frame also feeds its sliding-window flow
+    rates (timestamps default to frame_index / fps) and snapshots carry
+    the measured demand_flow. With a QueueEstimator, snapshot queue
+    lengths come from the stopped vehicles' measured positions.
+    """
+
+    def __init__(
+        self,
+        approaches: Iterable[str] = APPROACHES,
+        track_ttl: int = 30,
+        flow: Optional[FlowMonitor] = None,
+        fps: float = 30.0,
+        queue: Optional[QueueEstimator] = None,
+    ):
+        self.approaches = tuple(approaches)
+        self.engine = AggregationEngine(approaches=self.approaches)
+        self.track_ttl = track_ttl
+        self.flow = flow
+        self.queue = queue
+        self.fps = fps
+        self.frames_seen = 0
+        self._last_seen: "OrderedDict[int, int]" = OrderedDict()
+        self.reset()
+
+    def reset(self):
+        """
+        Clear counters (active track IDs are kept, so vehicles still
+        in view are not counted again)
+        """
+        self.vehicle_counts: Dict[str, Dict[str, int]] = {
+            a: {} for a in self.approaches
+        }
+        self.pedestrians: Dict[str, int] = {a: 0 for a in self.approaches}
+
+    def update(self, frame_index: int, objects, timestamp: Optional[float] = None):
+        """
+        objects: DetectionBatch of tracked objects, or a list of dicts
+        with id / label / approach
+        """
+        if self.flow is not None:
+            self.flow.update(
+                frame_index / self.fps if timestamp is None else timestamp,
+                objects
+            )
+        if self.queue is not None:
+            self.queue.update(objects)
+
+        if isinstance(objects, DetectionBatch):
+            rows = zip(
+                objects.track_id.tolist(),
+                objects.labels.tolist(),
+                objects.approach_labels.tolist(),
+            )
+        else:
+            rows = (
+                (obj["id"], obj["label"], obj.get("approach")) for obj in objects
+            )
+
+        for track_id, label, approach in rows:
+            if track_id not in self._last_seen:
+                self._count(label, approach)
+            else:
+                self._last_seen.move_to_end(track_id)
+            self._last_seen[track_id] = frame_index
+
+        self._evict(frame_index)
+        self.frames_seen += 1
+
+    def _count(self, label: str, approach: str):
+        if approach not in self.pedestrians:
+            return
+
+        if label == "person":
+            self.pedestrians[approach] += 1
+        else:
+            counts = self.vehicle_counts[approach]
+            counts[label] = counts.get(label, 0) + 1
+
+    def _evict(self, frame_index: int):
+        # _last_seen is ordered by last sighting, oldest first
+        while self._last_seen:
+            track_id, last = next(iter(self._last_seen.items()))
+            if frame_index - last <= self.track_ttl:
+                break
+            del self._last_seen[track_id]
+
+    @property
+    def active_tracks(self) -> int:
+        return len(self._last_seen)
+
+    def snapshot(self, reset: bool = False) -> Dict[str, TrafficMetrics]:
+        """
+        Current per-approach TrafficMetrics
+        """
+        engine = self.engine
+        vehicle_counts = {a: dict(self.vehicle_counts[a]) for a in self.approaches}
+        aggregate = engine.aggregate_counts(
+            vehicle_counts,
+            self.pedestrians,
+            queue_length=self.queue.queue_lengths if self.queue is not None else None,
+        )
+        metrics = engine.to_metrics(
+            aggregate,
+            vehicle_counts=vehicle_counts,
+            demand_flow=self.flow.demand_flow() if self.flow is not None else None,
+        )
+        if reset:
+            self.reset()
+        return metrics
+
+
+def aggregate_stream(
+    frames: Iterable[Tuple[int, List[Dict]]],
+    snapshot_every: Optional[int] = None,
+    aggregator: Optional[StreamingAggregator] = None,
+) -> Iterator[Dict[str, TrafficMetrics]]:
+    """
+    Generator stage over iter_tracked_frames output
+
+    Yields a snapshot every `snapshot_every` frames (if set) and a final
+    one when the input is exhausted.
+    """
+    aggregator = aggregator or StreamingAggregator()
+
+    for frame_index, objects in frames:
+        aggregator.update(frame_index, objects)
+
+        if snapshot_every and aggregator.frames_seen % snapshot_every == 0:
+            yield aggregator.snapshot()
+
+    yield aggregator.snapshot()
@@ -1,4 +1,6 @@
-from collections import defaultdict
+import numpy as np
+
+from detector.detection_batch import DetectionBatch, label_table
 
 VEHICLE_CLASSES = {
     "car", "bus", "truck", "motorcycle", "bicycle", "auto"
@@ -6,29 +8,36 @@ VEHICLE_CLASSES = {
 
 def count_by_approach(assigned_objects):
     """
-    Input: list of {label, approach}
+    Input: DetectionBatch, or list of {label, approach}
     Output: dict keyed by approach
     """
+    batch = (
+        assigned_objects if isinstance(assigned_objects, DetectionBatch)
+        else DetectionBatch.from_dicts(assigned_objects)
+    )
 
     counts = {}
 
     for approach in ["N", "S", "E", "W"]:
         counts[approach] = {
-            "vehicle_counts": defaultdict(int),
+            "vehicle_counts": {},
             "pedestrian_count": 0
         }
 
-    for obj in assigned_objects:
-        approach = obj["approach"]
-        label = obj["label"]
+    # one bincount over (approach, class) instead of a dict update per object
+    matrix = batch.count_matrix()
+    labels = label_table(batch.names)
+
+    for row, approach in enumerate(batch.approaches):
+        if approach not in counts:
+            continue
 
-        if label == "person":
-            counts[approach]["pedestrian_count"] += 1
-        elif label in VEHICLE_CLASSES:
-            counts[approach]["vehicle_counts"][label] += 1
+        for cls_id in np.flatnonzero(matrix[row]).tolist():
+            label, n = labels[cls_id], int(matrix[row, cls_id])
 
-    # convert defaultdict → normal dict
-    for a in counts:
-        counts[a]["vehicle_counts"] = dict(counts[a]["vehicle_counts"])
+            if label == "person":
+                counts[approach]["pedestrian_count"] += n
+            elif label in VEHICLE_CLASSES:
+                counts[approach]["vehicle_counts"][label] = n
 
     return counts
@@ -1,37 +1,161 @@
 """
 Process computer vision outputs into structured traffic metrics
+
+Vehicle counts are held as a fixed-order vector over VEHICLE_CLASSES
+(the TrafficConstants.VEHICLE_PCU keys), so demand PCU is one dot product
+with PCU_WEIGHTS, computed once at construction. Instances use __slots__
+to keep long metric histories small; from_counts() builds a whole batch
+from a 2-D count array with a single matrix product.
 """
 
-from typing import Dict, Optional
-from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
 from config.constants import TrafficConstants
 
+VEHICLE_CLASSES = tuple(TrafficConstants.VEHICLE_PCU)
+PCU_WEIGHTS = np.array(
+    [TrafficConstants.VEHICLE_PCU[v] for v in VEHICLE_CLASSES], dtype=np.float64
+)
+_CLASS_INDEX = {v: i for i, v in enumerate(VEHICLE_CLASSES)}
+
 
-@dataclass
 class TrafficMetrics:
     """Structured traffic metrics from computer vision"""
 
-    approach_id: str
-    vehicle_counts: Dict[str, int]
-    queue_length: float
-    lanes: int
-    congestion_level: str
-    pedestrian_count: int
-    current_green_time: float
-    link_length: Optional[float] = None
+    __slots__ = (
+        "approach_id",
+        "counts",          # (len(VEHICLE_CLASSES),) int32
+        "extra_counts",    # labels outside VEHICLE_CLASSES (PCU 1.0), or None
+        "count_labels",    # labels vehicle_counts reports, in the caller's order
+        "queue_length",
+        "lanes",
+        "congestion_level",
+        "pedestrian_count",
+        "current_green_time",
+        "link_length",
+        # Measured flow (PCU/hour) from detector.flow_metrics, when available
+        "demand_flow",
+        # ✅ expose demand_pcu (required by optimizer)
+        "demand_pcu",
+    )
+
+    def __init__(
+        self,
+        approach_id: str,
+        vehicle_counts: Dict[str, int],
+        queue_length: float,
+        lanes: int,
+        congestion_level: str,
+        pedestrian_count: int,
+        current_green_time: float,
+        link_length: Optional[float] = None,
+        demand_flow: Optional[float] = None,
+    ):
+        self.approach_id = approach_id
+        self.queue_length = queue_length
+        self.lanes = lanes
+        self.congestion_level = congestion_level
+        self.pedestrian_count = pedestrian_count
+        self.current_green_time = current_green_time
+        self.link_length = link_length
+        self.demand_flow = demand_flow
+        self.vehicle_counts = vehicle_counts
+
+    @classmethod
+    def from_counts(
+        cls,
+        approach_ids: Sequence[str],
+        counts,
+        queue_length: Sequence[float],
+        lanes: Sequence[int],
+        congestion_level: Sequence[str],
+        pedestrian_count: Sequence[int],
+        current_green_time: Sequence[float],
+        link_length: Optional[Sequence[Optional[float]]] = None,
+        demand_flow: Optional[Sequence[Optional[float]]] = None,
+        labels: Sequence[str] = VEHICLE_CLASSES,
+        row_labels: Optional[Sequence[Sequence[str]]] = None,
+    ) -> List["TrafficMetrics"]:
+        """
+        One TrafficMetrics per row of a (n_approaches, len(labels)) count
+        array; labels name the columns (default: VEHICLE_CLASSES order).
+        row_labels: the labels each row's vehicle_counts reports, in order
+        (default: the row's non-zero columns)
+        """
+        counts = np.asarray(counts).reshape(len(approach_ids), len(labels))
+        known = [i for i, label in enumerate(labels) if label in _CLASS_INDEX]
+        extra = [i for i, label in enumerate(labels) if label not in _CLASS_INDEX]
+
+        vectors = np.zeros((len(approach_ids), len(VEHICLE_CLASSES)), dtype=np.int32)
+        vectors[:, [_CLASS_INDEX[labels[i]] for i in known]] = counts[:, known]
+        extras = counts[:, extra].astype(np.int64)
+        pcu = (vectors @ PCU_WEIGHTS + extras.sum(axis=1)).tolist()
 
-    # ✅ expose demand_pcu (required by optimizer)
-    demand_pcu: float = field(init=False)
+        n = len(approach_ids)
+        link_length = [None] * n if link_length is None else link_length
+        demand_flow = [None] * n if demand_flow is None else demand_flow
+        if row_labels is None:
+            row_labels = [
+                [labels[c] for c in np.flatnonzero(row).tolist()] for row in counts
+            ]
+
+        metrics = []
+        for i, approach in enumerate(approach_ids):
+            m = cls.__new__(cls)
+            m.approach_id = approach
+            m.counts = vectors[i]
+            m.extra_counts = {
+                labels[c]: n for c, n in zip(extra, extras[i].tolist()) if n
+            } or None
+            m.count_labels = tuple(row_labels[i])
+            m.demand_pcu = pcu[i]
+            m.queue_length = queue_length[i]
+            m.lanes = lanes[i]
+            m.congestion_level = congestion_level[i]
+            m.pedestrian_count = pedestrian_count[i]
+            m.current_green_time = current_green_time[i]
+            m.link_length = link_length[i]
+            m.demand_flow = demand_flow[i]
+            metrics.append(m)
+        return metrics
+
+    # ------------------------------
+    # VEHICLE COUNTS
+    # ------------------------------
+    @property
+    def vehicle_counts(self) -> Dict[str, int]:
+        """{label: count} view of the count vector, with the labels given"""
+        counts = self.counts.tolist()
+        extra = self.extra_counts or {}
+        return {
+            label: (
+                counts[_CLASS_INDEX[label]] if label in _CLASS_INDEX
+                else extra.get(label, 0)
+            )
+            for label in self.count_labels
+        }
 
-    def __post_init__(self):
+    @vehicle_counts.setter
+    def vehicle_counts(self, vehicle_counts: Dict[str, int]):
+        self.counts = np.zeros(len(VEHICLE_CLASSES), dtype=np.int32)
+        extra = {}
+        for v_type, count in vehicle_counts.items():
+            index = _CLASS_INDEX.get(v_type)
+            if index is None:
+                extra[v_type] = extra.get(v_type, 0) + count
+            else:
+                self.counts[index] += count
+        self.extra_counts = {k: n for k, n in extra.items() if n} or None
+        self.count_labels = tuple(vehicle_counts)
         self.demand_pcu = self.calculate_pcu()
 
     def calculate_pcu(self) -> float:
         """Convert vehicle counts to PCU"""
-        total_pcu = 0.0
-        for v_type, count in self.vehicle_counts.items():
-            pcu = TrafficConstants.VEHICLE_PCU.get(v_type, 1.0)
-            total_pcu += count * pcu
+        total_pcu = float(self.counts @ PCU_WEIGHTS)
+        if self.extra_counts:
+            total_pcu += sum(self.extra_counts.values())   # unknown types: 1.0
         return total_pcu
 
     # ✅ ✅ CORRECT PLACE FOR DENSITY
@@ -54,6 +178,34 @@ class TrafficMetrics:
             ) >= TrafficConstants.QUEUE_SPILLBACK_RATIO
         return False
 
+    # ------------------------------
+    # DATACLASS COMPATIBILITY
+    # ------------------------------
+    def to_dict(self) -> Dict:
+        """Constructor arguments as a dict (from_dict round-trips it)"""
+        return {
+            "approach_id": self.approach_id,
+            "vehicle_counts": self.vehicle_counts,
+            "queue_length": self.queue_length,
+            "lanes": self.lanes,
+            "congestion_level": self.congestion_level,
+            "pedestrian_count": self.pedestrian_count,
+            "current_green_time": self.current_green_time,
+            "link_length": self.link_length,
+            "demand_flow": self.demand_flow,
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, TrafficMetrics):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items())
+        return f"TrafficMetrics({fields}, demand_pcu={self.demand_pcu!r})"
+
 
 # ✅ REQUIRED FOR CHATBOT IMPORTS
 class TrafficMetricsProcessor:
@@ -70,4 +222,36 @@ class TrafficMetricsProcessor:
             pedestrian_count=data["pedestrian_count"],
             current_green_time=data["current_green_time"],
             link_length=data.get("link_length"),
+            demand_flow=data.get("demand_flow"),
+        )
+
+    @staticmethod
+    def from_dicts(data: Sequence[Dict]) -> List[TrafficMetrics]:
+        """
+        Many approaches at once: counts are stacked into one array and
+        PCU comes out of a single matrix product
+        """
+        labels = list(VEHICLE_CLASSES)
+        labels += sorted(
+            {l for d in data for l in d["vehicle_counts"]} - set(VEHICLE_CLASSES)
+        )
+        column = {label: i for i, label in enumerate(labels)}
+
+        counts = np.zeros((len(data), len(labels)), dtype=np.int64)
+        for row, d in enumerate(data):
+            for v_type, count in d["vehicle_counts"].items():
+                counts[row, column[v_type]] += count
+
+        return TrafficMetrics.from_counts(
+            [d["approach_id"] for d in data],
+            counts,
+            [d["queue_length"] for d in data],
+            [d["lanes"] for d in data],
+            [d["congestion_level"] for d in data],
+            [d["pedestrian_count"] for d in data],
+            [d["current_green_time"] for d in data],
+            link_length=[d.get("link_length") for d in data],
+            demand_flow=[d.get("demand_flow") for d in data],
+            labels=labels,
+            row_labels=[list(d["vehicle_counts"]) for d in data],
         )
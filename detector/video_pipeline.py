@@ -1,16 +1,20 @@
+import math
+from contextlib import nullcontext
 from typing import List, Dict
+
+import numpy as np
+
 from detector.traffic_metrics import TrafficMetrics
 from detector.object_detector import ObjectDetector
+from detector.detection_batch import DetectionBatch
+from detector.detection_cache import DetectionCache, default_cache_dir
 from detector.video_reader import VideoReader
-from detector.roi_mapper import assign_approach
+from detector.sort_tracker import SortTracker
+from detector.roi_mapper import ROIS
+from detector.roi_index import get_roi_index
+from detector.aggregation import VEHICLE_LENGTH_M, default_engine
 from config.constants import TrafficConstants
-
-# ==============================
-# CONSTANTS (SAFE ENGINEERING)
-# ==============================
-VEHICLE_LENGTH_M = 5.5  # avg vehicle + gap (meters)
-LANES = {"N": 3, "S": 3, "E": 2, "W": 1}
-
+from monitoring import DETECTIONS, FRAMES, count, timed
 
 # ==============================
 # QUEUE + CONGESTION HELPERS
@@ -42,106 +46,273 @@ def classify_congestion(queue_length: float, density: float) -> str:
 # ==============================
 # STEP 1: EXTRACT TRACKED OBJECTS
 # ==============================
-def extract_tracked_objects(video_path, max_frames=100):
-    """
-    Convert video into tracked_objects list
+def _read_batches(reader, batch_size=1, max_frames=None, scheduler=None):
     """
-    reader = VideoReader(video_path)
-    detector = ObjectDetector()
+    Yield lists of (frame_index, frame), at most batch_size long,
+    until the reader is exhausted or max_frames have been read
 
-    tracked_objects = []
+    With a LatencyScheduler, frames that could no longer be analysed
+    within its latency budget are skipped before each batch is read
+    """
+    batch_size = max(int(batch_size), 1)
     frame_count = 0
 
-    while True:
-        frame = reader.read()
-        if frame is None or frame_count >= max_frames:
-            break
+    while max_frames is None or frame_count < max_frames:
+        if scheduler is not None:
+            drop = scheduler.frames_to_drop(
+                reader.frame_index + reader.stride, batch_size
+            )
+            if drop:
+                skipped = reader.skip(math.ceil(drop / reader.stride))
+                scheduler.dropped(skipped * reader.stride)
+
+        batch = []
+        while len(batch) < batch_size and (
+            max_frames is None or frame_count + len(batch) < max_frames
+        ):
+            with timed("decode"), (
+                scheduler.stage("decode") if scheduler is not None
+                else nullcontext()
+            ):
+                frame = reader.read()
+            if frame is None:
+                break
+            batch.append((reader.frame_index, frame))
+
+        if not batch:
+            return
+
+        frame_count += len(batch)
+        yield batch
+
+
+def detect_frames(video_path, *args, **kwargs):
+    """
+    Yield (frame_index, detections) for every analysed frame, where
+    detections is a [{label, bbox, conf}, ...] list (None for frames
+    skipped by a motion gate); see detect_frame_batches for options
+    """
+    for frame_index, batch in detect_frame_batches(video_path, *args, **kwargs):
+        yield frame_index, batch.to_dicts() if batch is not None else None
+
+
+def detect_frame_batches(
+    video_path,
+    max_frames=None,
+    batch_size=1,
+    stride=1,
+    prefetch=0,
+    cache_dir=None,
+    model_path="yolov8n.pt",
+    conf=0.25,
+    detector=None,
+    motion_gate=None,
+    scheduler=None,
+):
+    """
+    Yield (frame_index, DetectionBatch) for every analysed frame
 
-        detections = detector.detect(frame)
+    With a cache_dir (or $DETECTION_CACHE_DIR) detections are read from
+    the on-disk DetectionCache when present and written to it otherwise.
+    A fully cached video is replayed without decoding a single frame or
+    loading the model.
 
-        for det in detections:
-            x1, y1, x2, y2 = det["bbox"]
-            cx = (x1 + x2) // 2
-            cy = (y1 + y2) // 2
+    With a MotionGate, frames it rejects are not sent to the detector and
+    are yielded with detections=None (callers carry their state forward).
 
-            approach = assign_approach(cx, cy)
-            if approach is None:
-                continue
+    With a LatencyScheduler (live feeds), decode / detect / downstream
+    cost is measured per frame and frames are dropped so the ones that
+    are analysed stay within its latency budget; scheduler.stats()
+    reports the achieved analysis FPS and lag.
+
+    model_path / conf only configure the default detector; a detector
+    passed in is used (and cached) with its own settings.
+    """
+    cache_dir = cache_dir or default_cache_dir()
+    cache = None
+    if cache_dir:
+        if detector is not None:
+            # key on the detector that actually runs, not the defaults above
+            try:
+                model_path, conf = detector.model_path, detector.conf
+            except AttributeError:
+                raise ValueError(
+                    f"{type(detector).__name__} has no model_path / conf "
+                    "to key the detection cache on"
+                ) from None
+        cache = DetectionCache(
+            cache_dir, video_path, model_path, conf,
+            tag=getattr(detector, "cache_tag", "")
+        )
 
-            tracked_objects.append({
-                "label": det["label"],
-                "approach": approach,
-                # Speed retained for future Kalman / SORT integration
-                "speed": det.get("speed", 0.0)
-            })
+    if cache is not None and cache.frame_count is not None and cache.names:
+        indexes = range(stride - 1, cache.frame_count, stride)
+        if max_frames is not None:
+            indexes = indexes[:max_frames]
+        if all(cache.has(i) for i in indexes):
+            names = cache.names
+            for i in indexes:
+                with timed("cache"):
+                    arrays = cache.get(i)
+                count(FRAMES, source="cache")
+                count(DETECTIONS, len(arrays[1]))
+                yield i, DetectionBatch.from_arrays(arrays, names)
+            return
+
+    reader = VideoReader(video_path, stride=stride, prefetch=prefetch)
+    frames_read = 0
+    if scheduler is not None:
+        scheduler.start(reader.fps)
+
+    def scheduled(stage, frames=1):
+        return scheduler.stage(stage, frames) if scheduler else nullcontext()
+
+    try:
+        for batch in _read_batches(reader, batch_size, max_frames, scheduler):
+            frames_read += len(batch)
+            count(FRAMES, len(batch), source="decoded")
+            results = {}
+            missing = []
+
+            for frame_index, frame in batch:
+                cached = cache.get(frame_index) if cache is not None else None
+                if cached is not None:
+                    results[frame_index] = cached
+                elif motion_gate is not None and not motion_gate.should_detect(frame):
+                    results[frame_index] = None
+                    count(FRAMES, source="gated")
+                else:
+                    missing.append((frame_index, frame))
+
+            names = cache.names if cache is not None else None
+            if missing or names is None:
+                detector = detector or ObjectDetector(model_path, conf)
+                names = detector.names
+
+            if missing:
+                # amortised over the batch: gated frames cost no inference
+                with scheduled("detect", len(batch)), timed("detect"):
+                    arrays = detector.detect_batch_arrays([f for _, f in missing])
+                for (frame_index, _), frame_arrays in zip(missing, arrays):
+                    results[frame_index] = frame_arrays
+                    if cache is not None:
+                        cache.put(frame_index, frame_arrays)
+
+            for frame_index, _ in batch:
+                arrays = results[frame_index]
+                if arrays is not None:
+                    count(DETECTIONS, len(arrays[1]))
+                # time spent by the consumer (tracking, metrics, ...)
+                with scheduled("downstream"):
+                    yield frame_index, (
+                        DetectionBatch.from_arrays(arrays, names)
+                        if arrays is not None else None
+                    )
+                if scheduler is not None:
+                    scheduler.mark(frame_index)
+
+        if cache is not None and (max_frames is None or frames_read < max_frames):
+            cache.mark_end(reader.position)
+
+    finally:
+        reader.release()
+        if cache is not None:
+            if detector is not None:
+                cache.names = detector.names
+            cache.close()
+
+
+def extract_tracked_objects(
+    video_path, max_frames=100, batch_size=1, stride=1, prefetch=0,
+    cache_dir=None, motion_gate=None, scheduler=None
+):
+    """
+    Convert video into tracked_objects list
 
-        frame_count += 1
+    batch_size frames are decoded, stacked and sent through
+    the detector in a single forward pass; stride / prefetch are
+    passed to VideoReader (max_frames counts analysed frames)
+    """
+    tracked_objects = []
+    assigned = []
+    roi_index = get_roi_index(ROIS)
+
+    for _, batch in detect_frame_batches(
+        video_path, max_frames, batch_size, stride, prefetch, cache_dir,
+        motion_gate=motion_gate, scheduler=scheduler
+    ):
+        # static frame (motion gate): the scene is unchanged
+        if batch is not None:
+            with timed("roi"):
+                batch = batch.in_rois(roi_index)
+            assigned = batch.to_dicts(
+                ("label", "approach", "speed")
+            )
+        tracked_objects.extend(assigned)
 
-    reader.release()
     return tracked_objects
 
 
+def iter_tracked_frames(
+    video_path, max_frames=None, batch_size=1, stride=1, prefetch=0,
+    cache_dir=None, motion_gate=None, scheduler=None, detector=None
+):
+    """
+    Streaming variant of extract_tracked_objects
+
+    Yields (frame_index, objects) per analysed frame, where objects is a
+    DetectionBatch of tracked objects inside an ROI (iterating it gives
+    dicts with a SORT track "id" alongside label / approach / center /
+    speed). Nothing is accumulated, so memory does not grow with video
+    length. `detector` replaces the default ObjectDetector.
+    """
+    tracker = SortTracker()
+    names = None
+
+    for frame_index, batch in detect_frame_batches(
+        video_path, max_frames, batch_size, stride, prefetch, cache_dir,
+        detector=detector, motion_gate=motion_gate, scheduler=scheduler
+    ):
+        if batch is not None:
+            names = batch.names
+        yield frame_index, track_batch(batch, tracker, names)
+
+
+def track_batch(batch, tracker, names=None):
+    """
+    Track one frame: DetectionBatch in, DetectionBatch of tracked
+    objects inside an ROI out (batch=None: frame skipped by the motion
+    gate, tracks coast, labels taken from `names`)
+    """
+    if batch is None:
+        ids, centers, speeds, cls_ids = tracker.coast_arrays()
+        centers = np.round(centers)
+        batch = DetectionBatch(
+            np.concatenate([centers, centers], axis=1),
+            cls_ids.astype(np.int16),
+            track_id=ids,
+            speed=speeds,
+            names=names,
+        )
+    else:
+        batch.track_id, batch.speed = tracker.update_arrays(batch.centers, batch.cls)
+        batch.speed = batch.speed.astype(np.float32)
+
+    with timed("roi"):
+        return batch.in_rois(get_roi_index(ROIS))
+
+
 # ==============================
 # STEP 2–3: BUILD METRICS
 # ==============================
+@timed("aggregate")
 def build_metrics(tracked_objects: List[Dict]) -> Dict[str, TrafficMetrics]:
     """
     Convert tracked objects into TrafficMetrics for each approach
+    (one pass through the aggregation engine)
     """
-    metrics = {}
-
-    for approach in ["N", "S", "E", "W"]:
-        vehicle_counts = {}
-        pedestrians = 0
-
-        for obj in tracked_objects:
-            if obj.get("approach") != approach:
-                continue
-
-            if obj.get("label") == "person":
-                pedestrians += 1
-            else:
-                vehicle_counts[obj["label"]] = (
-                    vehicle_counts.get(obj["label"], 0) + 1
-                )
-
-        # ------------------------------
-        # QUEUE LENGTH (meters)
-        # ------------------------------
-        queue_length = estimate_queue_length(vehicle_counts)
-
-        # Temporary metrics (PCU calculation only)
-        temp_metrics = TrafficMetrics(
-            approach_id=approach,
-            vehicle_counts=vehicle_counts,
-            queue_length=queue_length,
-            lanes=LANES[approach],
-            congestion_level="free",  # placeholder
-            pedestrian_count=pedestrians,
-            current_green_time=30
-        )
-
-        # ------------------------------
-        # DENSITY (PCU per lane)
-        # ------------------------------
-        density = temp_metrics.demand_pcu / max(LANES[approach], 1)
-
-        # ------------------------------
-        # HYBRID CONGESTION
-        # ------------------------------
-        congestion = classify_congestion(queue_length, density)
-
-        metrics[approach] = TrafficMetrics(
-            approach_id=approach,
-            vehicle_counts=vehicle_counts,
-            queue_length=queue_length,
-            lanes=LANES[approach],
-            congestion_level=congestion,
-            pedestrian_count=pedestrians,
-            current_green_time=30
-        )
-
-    return metrics
+    engine = default_engine()
+    return engine.to_metrics(engine.aggregate_objects(tracked_objects))
 
 
 # ==============================
@@ -176,8 +347,16 @@ def build_traffic_data(metrics: Dict[str, TrafficMetrics]) -> Dict:
 if __name__ == "__main__":
     video_path = "traffic.mp4"
 
-    tracked = extract_tracked_objects(video_path, max_frames=50)
+    tracked = extract_tracked_objects(video_path, max_frames=50, batch_size=8)
     metrics = build_metrics(tracked)
     traffic_data = build_traffic_data(metrics)
 
     print(traffic_data)
+
+    # Constant-memory alternative: each tracked vehicle counted once
+    from detector.stream_aggregator import aggregate_stream
+
+    for snapshot in aggregate_stream(
+        iter_tracked_frames(video_path, max_frames=50, batch_size=8)
+    ):
+        print(build_traffic_data(snapshot))
@@ -1,14 +1,176 @@
+import queue
+import threading
+
 import cv2
 
+_END = object()
+
+
 class VideoReader:
-    def __init__(self, source):
+    """
+    Frame source around cv2.VideoCapture
+
+    stride:     return every Nth frame; skipped frames are grab()-ed
+                but never retrieve()-d, so they are not decoded
+    prefetch:   size of the decoded-frame queue filled by a background
+                decoder thread (0 = decode synchronously in read())
+    start_time: optional seek position in seconds
+    """
+
+    def __init__(self, source, stride=1, prefetch=0, start_time=None):
         self.cap = cv2.VideoCapture(source)
+        self.stride = max(int(stride), 1)
+        self.frame_index = -1  # index of the last frame returned by read()
+        self._next_index = 0
+
+        if start_time is not None:
+            self.seek(start_time)
+
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._error = None  # exception raised by the decoder thread
+        self._min_index = 0  # prefetch: frames below this were skip()-ped
+
+        if prefetch > 0:
+            self._queue = queue.Queue(maxsize=prefetch)
+            self._thread = threading.Thread(target=self._decode_loop, daemon=True)
+            self._thread.start()
+
+    @property
+    def fps(self):
+        return self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+
+    @property
+    def position(self):
+        """Number of frames consumed from the source so far"""
+        return self._next_index
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def seek(self, seconds):
+        """
+        Jump to a timestamp (only before prefetching starts)
+        """
+        self.cap.set(cv2.CAP_PROP_POS_MSEC, seconds * 1000.0)
+        self._next_index = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
 
     def read(self):
-        ret, frame = self.cap.read()
-        if not ret:
+        if self._stop.is_set():   # released
+            return None
+
+        if self._queue is None:
+            item = self._read_next()
+        else:
+            item = self._queue.get()
+            # decoded ahead of a skip(): drop it
+            while item is not _END and item[0] < self._min_index:
+                item = self._queue.get()
+            if item is _END:
+                # keep returning None to every later caller
+                self._queue.put(_END)
+                if self._error is not None:
+                    raise self._error
+
+        if item is None or item is _END:
             return None
+
+        self.frame_index, frame = item
         return frame
 
+    def skip(self, count):
+        """
+        Drop the next `count` frames without decoding them
+        Returns the number of frames dropped (with prefetch, the number
+        requested: the decoder thread drops them as it gets there)
+        """
+        if self._queue is None:
+            dropped = 0
+            for _ in range(count * self.stride):
+                if not self._grab():
+                    break
+                dropped += 1
+            self.frame_index = self._next_index - 1
+            return dropped // self.stride
+
+        # The decoder may be up to `prefetch` frames ahead: it grabs past
+        # everything below _min_index, and read() discards what it had
+        # already decoded, so skipping is not limited to the queue
+        self._min_index = self.frame_index + count * self.stride + 1
+        self.frame_index = self._min_index - 1
+        return count
+
     def release(self):
-        self.cap.release()
+        self._stop.set()
+
+        if self._thread is not None:
+            # unblock a decoder waiting on a full queue
+            self._drain()
+            self._thread.join()
+            # and any reader still waiting in another thread
+            self._drain()
+            self._queue.put_nowait(_END)
+
+        with self._lock:
+            self.cap.release()
+
+    # ------------------------------
+    # INTERNALS
+    # ------------------------------
+    def _grab(self):
+        with self._lock:
+            ok = self.cap.grab()
+        if ok:
+            self._next_index += 1
+        return ok
+
+    def _read_next(self):
+        for _ in range(self.stride - 1):
+            if not self._grab():
+                return None
+
+        with self._lock:
+            ok, frame = self.cap.read()
+        if not ok:
+            return None
+
+        index = self._next_index
+        self._next_index += 1
+        return index, frame
+
+    def _drain(self):
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _decode_loop(self):
+        try:
+            while not self._stop.is_set():
+                # skipped by the consumer: grab, never decode
+                if self._next_index < self._min_index:
+                    if not self._grab():
+                        break
+                    continue
+
+                item = self._read_next()
+                if item is None:
+                    break
+
+                self._put(item)
+        except Exception as exc:
+            self._error = exc   # re-raised by read()
+        finally:
+            # the stream always ends, even if decoding failed
+            self._put(_END)
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
@@ -1,9 +1,12 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
+from detector.model_registry import get_model
 from detector.roi_config import ROIS
+from detector.roi_index import get_roi_index
 from detector.object_tracker import ObjectTracker
 from detector.queue_estimator import QueueEstimator
+from detector.video_reader import VideoReader
+from detector.motion_gate import MotionGate
 
 # ✅ INIT TRACKER & QUEUE ESTIMATOR (ONCE)
 tracker = ObjectTracker()
@@ -16,19 +19,23 @@ COLORS = {
     "W": (255, 255, 0),
 }
 
-def point_in_polygon(point, polygon):
-    return cv2.pointPolygonTest(polygon, point, False) >= 0
-
-
-def visualize(video_path):
-    cap = cv2.VideoCapture(video_path)
-
-    if not cap.isOpened():
+def visualize(video_path, frame_skip=5, motion_gate=True):
+    # 🔴 FRAME SKIP (VERY IMPORTANT FOR PERFORMANCE)
+    # skipped frames are grabbed but never decoded; decoding of the
+    # kept frames overlaps with YOLO on a background thread
+    reader = VideoReader(video_path, stride=frame_skip, prefetch=4)
+    # static scenes (night / off-peak) reuse the last tracked objects
+    gate = MotionGate(rois=ROIS) if motion_gate else None
+    tracked = []
+    queue_ids = set()
+
+    if not reader.is_opened():
         print("❌ Cannot open video")
+        reader.release()
         return
 
-    # ✅ LOAD YOLO ONCE
-    model = YOLO("yolov8n.pt")
+    # ✅ LOAD YOLO ONCE (shared with every other detector in the process)
+    model = get_model("yolov8n.pt", warmup=True)
 
     print("🎥 YOLO + ROI + TRACKING + QUEUE (STABLE)")
     print("➡ Press Q or ESC to exit")
@@ -37,53 +44,49 @@ def visualize(video_path):
     cv2.namedWindow(window, cv2.WINDOW_NORMAL)
     cv2.resizeWindow(window, 1280, 720)
 
-    frame_id = 0
-
     while True:
-        ret, frame = cap.read()
-        if not ret:
+        frame = reader.read()
+        if frame is None:
             break
 
-        frame_id += 1
+        roi_index = get_roi_index(ROIS, frame.shape)
 
-        # 🔴 FRAME SKIP (VERY IMPORTANT FOR PERFORMANCE)
-        if frame_id % 5 != 0:
-            continue
+        # 🔴 MOTION GATE: static frame → keep previous tracks
+        if gate is None or gate.should_detect(frame):
+            # ===============================
+            # 1️⃣ YOLO DETECTION
+            # ===============================
+            results = model(frame, conf=0.4, verbose=False)[0]
 
-        # ===============================
-        # 1️⃣ YOLO DETECTION
-        # ===============================
-        results = model(frame, conf=0.4, verbose=False)[0]
+            detections = []
 
-        detections = []
+            for box in results.boxes:
+                cls = int(box.cls[0])
+                label = model.names[cls]
 
-        for box in results.boxes:
-            cls = int(box.cls[0])
-            label = model.names[cls]
+                if label not in ["car", "bus", "truck", "motorcycle", "person"]:
+                    continue
 
-            if label not in ["car", "bus", "truck", "motorcycle", "person"]:
-                continue
+                x1, y1, x2, y2 = map(int, box.xyxy[0])
+                cx = (x1 + x2) // 2
+                cy = (y1 + y2) // 2
 
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            cx = (x1 + x2) // 2
-            cy = (y1 + y2) // 2
+                detections.append({
+                    "bbox": (x1, y1, x2, y2),
+                    "center": (cx, cy),
+                    "label": label
+                })
 
-            detections.append({
-                "bbox": (x1, y1, x2, y2),
-                "center": (cx, cy),
-                "label": label
-            })
+            # ===============================
+            # 2️⃣ TRACK OBJECTS (ID ASSIGNMENT)
+            # ===============================
+            tracked = tracker.update(detections)
 
-        # ===============================
-        # 2️⃣ TRACK OBJECTS (ID ASSIGNMENT)
-        # ===============================
-        tracked = tracker.update(detections)
-
-        # ===============================
-        # 3️⃣ QUEUE ESTIMATION (STOPPED VEHICLES)
-        # ===============================
-        queue_objects = queue_estimator.update(tracked)
-        queue_ids = {obj["id"] for obj in queue_objects}
+            # ===============================
+            # 3️⃣ QUEUE ESTIMATION (STOPPED VEHICLES)
+            # ===============================
+            queue_objects = queue_estimator.update(tracked)
+            queue_ids = {obj["id"] for obj in queue_objects}
 
         # ===============================
         # 4️⃣ DRAW ROIs
@@ -104,34 +107,35 @@ def visualize(video_path):
         # ===============================
         # 5️⃣ DRAW TRACKED OBJECTS
         # ===============================
-        for obj in tracked:
+        # one raster lookup for every tracked center
+        approaches = roi_index.assign([obj["center"] for obj in tracked])
+
+        for obj, approach in zip(tracked, approaches):
+            if approach is None:
+                continue
+
             x1, y1, x2, y2 = obj["bbox"]
-            cx, cy = obj["center"]
             label = obj["label"]
             obj_id = obj["id"]
 
-            for approach, pts in ROIS.items():
-                if point_in_polygon((cx, cy), pts):
-
-                    # 🔴 QUEUE VEHICLE → RED
-                    if obj_id in queue_ids:
-                        color = (0, 0, 255)
-                        text = f"ID {obj_id} QUEUE"
-                    else:
-                        color = COLORS[approach]
-                        text = f"{label}-{approach}-ID{obj_id}"
-
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    cv2.putText(
-                        frame,
-                        text,
-                        (x1, y1 - 7),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        color,
-                        2
-                    )
-                    break
+            # 🔴 QUEUE VEHICLE → RED
+            if obj_id in queue_ids:
+                color = (0, 0, 255)
+                text = f"ID {obj_id} QUEUE"
+            else:
+                color = COLORS[approach]
+                text = f"{label}-{approach}-ID{obj_id}"
+
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(
+                frame,
+                text,
+                (x1, y1 - 7),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.6,
+                color,
+                2
+            )
 
         cv2.imshow(window, frame)
 
@@ -139,6 +143,6 @@ def visualize(video_path):
         if key == ord("q") or key == 27:
             break
 
-    cap.release()
+    reader.release()
     cv2.destroyAllWindows()
     print("✅ Visualization closed")
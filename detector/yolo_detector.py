@@ -1,39 +1,41 @@
-from ultralytics import YOLO
-import cv2
+from detector.model_registry import get_model
+from detector.object_detector import ObjectDetector
+from detector.video_pipeline import detect_frames
+
+
+def __getattr__(name):
+    # `model` used to be loaded at import time; keep it reachable,
+    # but only load it (once, via the registry) when accessed
+    if name == "model":
+        return get_model("yolov8n.pt")
+    raise AttributeError(name)
 
-# Load YOLO model once
-model = YOLO("yolov8n.pt")
 
 # COCO classes we care about
 VALID_CLASSES = {
     "car", "bus", "truck", "motorcycle", "person"
 }
 
-def run_yolo(video_path="traffic.mp4"):
-    cap = cv2.VideoCapture(video_path)
+def run_yolo(video_path="traffic.mp4", cache_dir=None):
+    """
+    Detections for every frame of the video
+    (served from the detection cache when cache_dir / $DETECTION_CACHE_DIR
+    points at one that already holds them)
+    """
     detections = []
+    detector = ObjectDetector(conf=0.4)
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        results = model(frame, conf=0.4, verbose=False)
-
-        for r in results:
-            for box in r.boxes:
-                cls_id = int(box.cls[0])
-                label = model.names[cls_id]
-
-                if label not in VALID_CLASSES:
-                    continue
-
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
+    for _, frame_detections in detect_frames(
+        video_path, batch_size=8, cache_dir=cache_dir, conf=0.4,
+        detector=detector
+    ):
+        for det in frame_detections:
+            if det["label"] not in VALID_CLASSES:
+                continue
 
-                detections.append({
-                    "label": label,
-                    "bbox": (x1, y1, x2, y2)
-                })
+            detections.append({
+                "label": det["label"],
+                "bbox": det["bbox"]
+            })
 
-    cap.release()
     return detections
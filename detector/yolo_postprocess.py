@@ -2,31 +2,44 @@
 Post-processing for YOLO object detection for traffic monitoring
 """
 
-import cv2
 import numpy as np
 from typing import Dict, List, Tuple
 from collections import defaultdict
+from detector.roi_index import ROIIndex
 
 class YOLOTrafficProcessor:
     def __init__(self, class_names: List[str], roi_zones: List[Tuple]):
         self.class_names = class_names
         self.roi_zones = roi_zones  # Regions of interest for different approaches
+        self._zone_indexes = {}  # frame_shape -> ROIIndex
+        
+    def _zone_index(self, frame_shape: Tuple) -> ROIIndex:
+        """Zone label raster for this frame size (built once)"""
+        shape = tuple(frame_shape[:2])
+        if shape not in self._zone_indexes:
+            self._zone_indexes[shape] = ROIIndex(
+                dict(enumerate(self.roi_zones)), shape
+            )
+        return self._zone_indexes[shape]
         
     def count_vehicles_by_zone(self, detections: List, frame_shape: Tuple) -> Dict:
         """Count vehicles in each approach zone"""
         zone_counts = defaultdict(lambda: defaultdict(int))
+        if len(detections) == 0:
+            return zone_counts
+        
+        dets = np.asarray(detections, dtype=np.float64).reshape(-1, 6)
+        centers = np.stack(
+            [(dets[:, 0] + dets[:, 2]) / 2, (dets[:, 1] + dets[:, 3]) / 2], axis=1
+        )
+        
+        # Find which zone each vehicle is in (one raster lookup for all)
+        zone_ids = self._zone_index(frame_shape).lookup(centers)
         
-        for detection in detections:
-            x1, y1, x2, y2, conf, cls = detection
-            center_x = (x1 + x2) / 2
-            center_y = (y1 + y2) / 2
-            
-            # Find which zone the vehicle is in
-            for zone_id, zone_polygon in enumerate(self.roi_zones):
-                if self._point_in_polygon(center_x, center_y, zone_polygon):
-                    vehicle_type = self.class_names[int(cls)]
-                    zone_counts[zone_id][vehicle_type] += 1
-                    break
+        for zone_id, cls in zip(zone_ids.tolist(), dets[:, 5].astype(int).tolist()):
+            if zone_id >= 0:
+                vehicle_type = self.class_names[cls]
+                zone_counts[zone_id][vehicle_type] += 1
         
         return zone_counts
     
@@ -46,22 +59,3 @@ class YOLOTrafficProcessor:
         
         # Similar logic for other directions
         return 0.0
-    
-    def _point_in_polygon(self, x: float, y: float, polygon: List[Tuple]) -> bool:
-        """Check if point is inside polygon"""
-        n = len(polygon)
-        inside = False
-        
-        p1x, p1y = polygon[0]
-        for i in range(1, n + 1):
-            p2x, p2y = polygon[i % n]
-            if y > min(p1y, p2y):
-                if y <= max(p1y, p2y):
-                    if x <= max(p1x, p2x):
-                        if p1y != p2y:
-                            xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                        if p1x == p2x or x <= xinters:
-                            inside = not inside
-            p1x, p1y = p2x, p2y
-        
-        return inside
\ No newline at end of file
@@ -2,11 +2,14 @@
 Optimize signal timings with safety constraints
 """
 
-from typing import List, Dict, Tuple
-from dataclasses import dataclass
+from typing import List, Dict, Sequence, Tuple
+
+import numpy as np
+
 from config.constants import TrafficConstants
 from engine.traffic_math import TrafficCalculator, SignalTiming
 from detector.traffic_metrics import TrafficMetrics
+from monitoring import timed
 
 class SignalOptimizer:
     """Optimize signal timings for all approaches"""
@@ -14,123 +17,174 @@ class SignalOptimizer:
     def __init__(self, area_type: str = 'urban'):
         self.calculator = TrafficCalculator(area_type)
 
+    @timed("optimize")
     def optimize_timings(
         self,
         all_metrics: List[TrafficMetrics],
         current_cycle_time: float
     ) -> Tuple[List[SignalTiming], float, Dict]:
+        return self.optimize_timings_batch([(all_metrics, current_cycle_time)])[0]
+
+    @timed("optimize_batch")
+    def optimize_timings_batch(
+        self,
+        requests: Sequence[Tuple[List[TrafficMetrics], float]],
+    ) -> List[Tuple[List[SignalTiming], float, Dict]]:
+        """
+        optimize_timings for many intersections at once
+
+        requests: [(all_metrics, current_cycle_time), ...]
+        Every approach of every intersection is one row; per-intersection
+        totals come from np.bincount over the intersection index, so
+        demand ratios, weights, clamping and normalisation are a few
+        array operations whatever the number of intersections.
+
+        Output types match the scalar rules: a green time that ends up
+        as one of the (int) limits is reported as that int ("15s", not
+        "15.0s"), so `is_limit` follows which rows currently hold one.
+        """
+        for all_metrics, _ in requests:
+            if not all_metrics:
+                raise ValueError("Every intersection needs at least one approach")
+
+        metrics = [m for all_metrics, _ in requests for m in all_metrics]
+        sizes = np.array([len(all_metrics) for all_metrics, _ in requests])
+        group = np.repeat(np.arange(len(requests)), sizes)
+        n_groups = len(requests)
+
+        def per_group(values):
+            return np.bincount(group, weights=values, minlength=n_groups)
+
+        cycle = np.array([c for _, c in requests], dtype=np.float64)[group]
 
         # ================================
         # STEP 1: DEMAND-WEIGHTED GREEN TIME
         # ================================
-        total_demand = sum(m.demand_pcu for m in all_metrics)
-
-        # Safety guard: no traffic anywhere
-        if total_demand == 0:
-            equal_green = current_cycle_time / len(all_metrics)
-            required_greens = [
-                (m.approach_id, equal_green, m) for m in all_metrics
-            ]
-        else:
-            required_greens = []
-            for metrics in all_metrics:
-                demand_ratio = metrics.demand_pcu / total_demand
-
-                # Demand dominance weighting
-                if demand_ratio >= 0.35:
-                    weight = 1.5
-                elif demand_ratio >= 0.25:
-                    weight = 1.3
-                elif demand_ratio >= 0.15:
-                    weight = 1.1
-                else:
-                    weight = 1.0
-
-                base_green = current_cycle_time * demand_ratio * weight
-
-                required_greens.append(
-                    (metrics.approach_id, base_green, metrics)
-                )
+        demands = self._demands_batch(metrics, group, n_groups)
+        total_demand = per_group(demands)[group]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            demand_ratio = demands / total_demand
+
+        # Demand dominance weighting
+        weight = np.select(
+            [demand_ratio >= 0.35, demand_ratio >= 0.25, demand_ratio >= 0.15],
+            [1.5, 1.3, 1.1],
+            default=1.0,
+        )
+        green = np.where(
+            total_demand == 0,
+            # Safety guard: no traffic anywhere
+            cycle / sizes[group],
+            cycle * demand_ratio * weight,
+        )
 
         # ================================
         # STEP 2: SAFETY CONSTRAINTS
         # ================================
-        constrained_greens = []
-        for approach_id, green_time, metrics in required_greens:
-            safe_green = max(TrafficConstants.MIN_GREEN_TIME, green_time)
-            safe_green = min(TrafficConstants.MAX_GREEN_TIME, safe_green)
+        min_green = TrafficConstants.MIN_GREEN_TIME
+        max_green = TrafficConstants.MAX_GREEN_TIME
+
+        pedestrians = np.array([m.pedestrian_count for m in metrics], dtype=np.float64)
+        ped_time = self.calculator.calculate_pedestrian_times(pedestrians)
+        # crossing times stay ints unless a large group adds a fraction
+        # (below the capped 10 s extension)
+        ped_is_limit = (pedestrians <= 20) | ((pedestrians - 20) * 0.1 > 10)
 
-            ped_time = self.calculator.calculate_pedestrian_time(
-                metrics.pedestrian_count
-            )
-            safe_green = max(safe_green, ped_time)
+        # ties keep the limit, as max(limit, green) / min(limit, green) do
+        at_min, at_max = green <= min_green, green >= max_green
+        green = np.clip(green, min_green, max_green)
+        is_limit = at_min | at_max
 
-            constrained_greens.append((approach_id, safe_green, metrics))
+        ped_wins = ped_time > green
+        green = np.where(ped_wins, ped_time, green)
+        is_limit = np.where(ped_wins, ped_is_limit, is_limit)
 
         # ================================
         # STEP 3: NORMALIZE TO CYCLE TIME
         # ================================
-        total_required = sum(green for _, green, _ in constrained_greens)
-        total_interphase = len(all_metrics) * (
+        total_required = per_group(green)[group]
+        total_interphase = sizes[group] * (
             TrafficConstants.YELLOW_TIME + TrafficConstants.ALL_RED_TIME
         )
+        available_green = cycle - total_interphase
 
-        available_green = current_cycle_time - total_interphase
-
-        if total_required > available_green:
-            scale_factor = available_green / total_required
-            normalized_greens = []
-            for approach_id, green_time, metrics in constrained_greens:
-                scaled_green = max(
-                    TrafficConstants.MIN_GREEN_TIME,
-                    green_time * scale_factor
-                )
-                normalized_greens.append((approach_id, scaled_green, metrics))
-        else:
-            normalized_greens = constrained_greens
+        over = total_required > available_green
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scaled = green * (available_green / total_required)
+        floored = scaled <= min_green
+        green = np.where(over, np.maximum(min_green, scaled), green)
+        is_limit = np.where(over, floored, is_limit)
 
         # ================================
-        # STEP 4: SIGNAL TIMING OBJECTS
+        # STEP 4: SPILLBACK EXTENSION
         # ================================
-        signal_timings = []
-        analysis = {
-            "spillback_risks": [],
-            "congestion_warnings": [],
-            "pedestrian_alerts": []
-        }
-
-        for approach_id, green_time, metrics in normalized_greens:
-            if metrics.check_spillback_risk():
-                analysis["spillback_risks"].append({
-                    "approach": approach_id,
-                    "queue_length": metrics.queue_length,
-                    "recommendation": "Consider emergency green extension"
-                })
-                green_time = min(
-                    green_time * 1.3,
-                    TrafficConstants.MAX_GREEN_TIME
-                )
+        spillback = np.array([m.check_spillback_risk() for m in metrics], dtype=bool)
+        extended = green * 1.3
+        green = np.where(spillback, np.minimum(extended, max_green), green)
+        is_limit = np.where(spillback, extended > max_green, is_limit)
 
-            if metrics.pedestrian_count > 15:
-                analysis["pedestrian_alerts"].append({
-                    "approach": approach_id,
-                    "pedestrian_count": metrics.pedestrian_count,
-                    "message": "High pedestrian activity"
-                })
-
-            signal_timings.append(
-                SignalTiming(
-                    approach_id=approach_id,
-                    green_time=round(green_time, 1),
-                    pedestrian_time=self.calculator.calculate_pedestrian_time(
-                        metrics.pedestrian_count
+        # ================================
+        # STEP 5: SIGNAL TIMING OBJECTS
+        # ================================
+        results = []
+        greens = [
+            int(g) if limit else round(g, 1)
+            for g, limit in zip(green.tolist(), is_limit.tolist())
+        ]
+        ped_times = [
+            int(t) if limit else t
+            for t, limit in zip(ped_time.tolist(), ped_is_limit.tolist())
+        ]
+        flags = spillback.tolist()
+        offsets = np.concatenate([[0], np.cumsum(sizes)]).tolist()
+
+        for g, (all_metrics, _) in enumerate(requests):
+            signal_timings = []
+            analysis = {
+                "spillback_risks": [],
+                "congestion_warnings": [],
+                "pedestrian_alerts": []
+            }
+
+            for i, m in enumerate(all_metrics, offsets[g]):
+                if flags[i]:
+                    analysis["spillback_risks"].append({
+                        "approach": m.approach_id,
+                        "queue_length": m.queue_length,
+                        "recommendation": "Consider emergency green extension"
+                    })
+
+                if m.pedestrian_count > 15:
+                    analysis["pedestrian_alerts"].append({
+                        "approach": m.approach_id,
+                        "pedestrian_count": m.pedestrian_count,
+                        "message": "High pedestrian activity"
+                    })
+
+                signal_timings.append(
+                    SignalTiming(
+                        approach_id=m.approach_id,
+                        green_time=greens[i],
+                        pedestrian_time=ped_times[i],
                     )
                 )
-            )
 
-        # ================================
-        # STEP 5: ACTUAL CYCLE TIME
-        # ================================
-        actual_cycle = sum(t.total_time() for t in signal_timings)
+            # actual cycle time
+            actual_cycle = sum(t.total_time() for t in signal_timings)
+            results.append((signal_timings, actual_cycle, analysis))
 
-        return signal_timings, actual_cycle, analysis
+        return results
+
+    def _demands_batch(self, metrics, group, n_groups) -> np.ndarray:
+        """
+        Measured flow rates (PCU/hour) for intersections where every
+        approach has one, otherwise the PCU counts
+        """
+        flows = np.array(
+            [np.nan if m.demand_flow is None else m.demand_flow for m in metrics],
+            dtype=np.float64,
+        )
+        missing = np.bincount(group, weights=np.isnan(flows), minlength=n_groups)
+        pcu = np.array([m.demand_pcu for m in metrics], dtype=np.float64)
+        return np.where(missing[group] == 0, flows, pcu)
@@ -118,3 +118,72 @@ function renderAdvisory(data) {
     policeAction.innerHTML += `<li>${a}</li>`;
   });
 }
+
+// 📡 Live metrics: full snapshot, then deltas with only changed fields
+// (Server-Sent Events from GET /stream; EventSource reconnects itself)
+const liveState = {};
+
+// removed fields come listed under "$removed"; null is a real None value
+function mergeDelta(target, changes) {
+  for (const key of changes["$removed"] || []) {
+    delete target[key];
+  }
+  for (const key in changes) {
+    const value = changes[key];
+    if (key === "$removed") {
+      continue;
+    } else if (value !== null && typeof value === "object" && !Array.isArray(value)) {
+      if (typeof target[key] !== "object" || target[key] === null) {
+        target[key] = {};
+      }
+      mergeDelta(target[key], value);
+    } else {
+      target[key] = value;
+    }
+  }
+}
+
+function renderLive() {
+  const lines = [];
+  for (const camera in liveState) {
+    const state = liveState[camera];
+    lines.push(`📷 ${camera} (frame ${state.frame_index})`);
+    if (state.error) {
+      lines.push(`  ❌ ${state.error.trim().split("\n").pop()}`);
+      continue;
+    }
+    const greens = state.green_times || {};
+    for (const dir in state.approaches || {}) {
+      const a = state.approaches[dir];
+      const green = greens[dir] !== undefined ? `${greens[dir].toFixed(1)}s green` : "";
+      lines.push(
+        `  ${dir}: ${a.vehicles} veh, ${a.pcu} PCU, queue ${a.queue_length} m, ` +
+        `${a.congestion_level}  ${green}`
+      );
+    }
+    if (state.cycle_time !== undefined) {
+      lines.push(`  Cycle: ${state.cycle_time.toFixed(1)}s`);
+    }
+  }
+  document.getElementById("metrics").textContent =
+    lines.join("\n") || "Waiting for live camera data...";
+}
+
+function connectLive() {
+  const source = new EventSource("http://127.0.0.1:8000/stream");
+
+  source.addEventListener("snapshot", e => {
+    for (const camera in liveState) delete liveState[camera];
+    Object.assign(liveState, JSON.parse(e.data));
+    renderLive();
+  });
+
+  source.addEventListener("delta", e => {
+    mergeDelta(liveState, JSON.parse(e.data));
+    renderLive();
+  });
+
+  source.onerror = () => console.warn("Live stream interrupted, reconnecting...");
+}
+
+connectLive();
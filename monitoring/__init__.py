@@ -0,0 +1,16 @@
+from .instruments import (
+    DETECTIONS,
+    FRAMES,
+    HTTP_REQUESTS,
+    HTTP_SECONDS,
+    REGISTRY,
+    STAGE_SECONDS,
+    Counter,
+    Histogram,
+    Registry,
+    count,
+    enabled,
+    render_prometheus,
+    set_enabled,
+    timed,
+)
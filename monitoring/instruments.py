@@ -0,0 +1,293 @@
+"""
+Low-overhead latency histograms and counters
+
+Pipeline stages, the tracker, the optimiser and the API handlers record
+into one process-wide Registry, rendered in the Prometheus text format
+by render_prometheus() (served as GET /metrics).
+
+    with timed("detect"):                 # stage latency
+        ...
+    @timed("optimize")                    # whole-function latency
+    def optimize_timings(...): ...
+    count(FRAMES, len(batch), source="decoded")
+
+Set $TRAFFIC_MONITORING=0 to switch everything off: timed() then returns
+a shared no-op context manager, decorators hand back the undecorated
+function and count() returns immediately.
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+MONITORING_ENV = "TRAFFIC_MONITORING"
+
+# Metric families recorded by this package
+STAGE_SECONDS = "traffic_stage_seconds"
+FRAMES = "traffic_frames_total"
+DETECTIONS = "traffic_detections_total"
+HTTP_SECONDS = "traffic_http_request_seconds"
+HTTP_REQUESTS = "traffic_http_requests_total"
+
+# Seconds; fine enough for per-frame stages, wide enough for requests
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_ENABLED = os.environ.get(MONITORING_ENV, "1").strip().lower() not in (
+    "0", "false", "off", "no"
+)
+
+
+def enabled() -> bool:
+    return _ENABLED
+
+
+def set_enabled(flag: bool):
+    """
+    Switch recording on/off at runtime (functions decorated while
+    disabled stay undecorated)
+    """
+    global _ENABLED
+    _ENABLED = bool(flag)
+
+
+# ------------------------------
+# INSTRUMENTS
+# ------------------------------
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        with self._lock:
+            self.value = 0.0
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; bucket counts are stored per bucket and
+    made cumulative only when rendered
+    """
+
+    __slots__ = ("bounds", "buckets", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)   # last one: +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        slot = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.buckets[slot] += 1
+            self.sum += value
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            self.buckets = [0] * len(self.buckets)
+            self.sum = 0.0
+            self.count = 0
+
+    def cumulative(self) -> List[int]:
+        with self._lock:
+            buckets = list(self.buckets)
+        total, out = 0, []
+        for n in buckets:
+            total += n
+            out.append(total)
+        return out
+
+
+class Registry:
+    """
+    Metric families by name; each family holds one instrument per
+    label combination
+    """
+
+    def __init__(self):
+        self._families: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str,
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        with self._lock:
+            self._families.setdefault(name, {
+                "kind": kind, "help": help_text, "buckets": tuple(buckets),
+                "children": {},
+            })
+
+    def _child(self, name: str, kind: str, labels: Dict[str, str]):
+        family = self._families.get(name)
+        if family is None:
+            self.describe(name, kind, name)
+            family = self._families[name]
+
+        key = tuple(sorted(labels.items()))
+        child = family["children"].get(key)
+        if child is None:
+            with self._lock:
+                child = family["children"].get(key)
+                if child is None:
+                    child = (
+                        Histogram(family["buckets"]) if family["kind"] == "histogram"
+                        else Counter()
+                    )
+                    family["children"][key] = child
+        return child
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._child(name, "counter", labels)
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        return self._child(name, "histogram", labels)
+
+    def clear(self):
+        """Zero every recorded value (instruments stay registered)"""
+        with self._lock:
+            for family in self._families.values():
+                for child in family["children"].values():
+                    child.reset()
+
+    # ------------------------------
+    # PROMETHEUS TEXT FORMAT
+    # ------------------------------
+    def render(self) -> str:
+        lines = []
+        for name, family in sorted(self._families.items()):
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+
+            for key, child in sorted(family["children"].items()):
+                if family["kind"] == "counter":
+                    lines.append(f"{name}{_labels(key)} {_number(child.value)}")
+                    continue
+
+                bounds = [_number(b) for b in child.bounds] + ["+Inf"]
+                for bound, n in zip(bounds, child.cumulative()):
+                    lines.append(
+                        f"{name}_bucket{_labels(key + (('le', bound),))} {n}"
+                    )
+                lines.append(f"{name}_sum{_labels(key)} {_number(child.sum)}")
+                lines.append(f"{name}_count{_labels(key)} {child.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key: Tuple) -> str:
+    if not key:
+        return ""
+    pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in key)
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+REGISTRY = Registry()
+REGISTRY.describe(STAGE_SECONDS, "histogram",
+                  "Wall time per pipeline stage call (seconds)")
+REGISTRY.describe(FRAMES, "counter", "Video frames processed")
+REGISTRY.describe(DETECTIONS, "counter", "Objects detected")
+REGISTRY.describe(HTTP_SECONDS, "histogram", "API request latency (seconds)")
+REGISTRY.describe(HTTP_REQUESTS, "counter", "API requests served")
+
+
+def render_prometheus(registry: Optional[Registry] = None) -> str:
+    return (registry or REGISTRY).render()
+
+
+# ------------------------------
+# RECORDING HELPERS
+# ------------------------------
+# (metric, stage) → histogram, skips the label lookup on the hot path
+_STAGE_HISTOGRAMS: Dict[Tuple[str, str], Histogram] = {}
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __call__(self, func):
+        return func
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("histogram", "_began")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self._began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self._began)
+        return False
+
+    def __call__(self, func):
+        histogram = self.histogram
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _ENABLED:
+                return func(*args, **kwargs)
+            began = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - began)
+
+        return wrapper
+
+
+def timed(stage: str, metric: str = STAGE_SECONDS, **labels):
+    """
+    Context manager / decorator recording wall time into the `metric`
+    histogram, labelled stage=<stage>
+    """
+    if not _ENABLED:
+        return _NULL_TIMER
+    if labels:
+        return _Timer(REGISTRY.histogram(metric, stage=stage, **labels))
+
+    histogram = _STAGE_HISTOGRAMS.get((metric, stage))
+    if histogram is None:
+        histogram = _STAGE_HISTOGRAMS[(metric, stage)] = REGISTRY.histogram(
+            metric, stage=stage
+        )
+    return _Timer(histogram)
+
+
+def count(metric: str, amount: float = 1, **labels):
+    if not _ENABLED or not amount:
+        return
+    REGISTRY.counter(metric, **labels).inc(amount)
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# run from anywhere: the packages live at the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def synthetic_video(tmp_path_factory):
+    """Short rendered video of moving boxes (no camera / model needed)"""
+    from benchmarks.synthetic import render_video
+
+    path = tmp_path_factory.mktemp("video") / "synthetic.mp4"
+    return render_video(str(path), frames=30, n_objects=20)
@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from config.constants import TrafficConstants
+from detector import metrics_builder, video_pipeline
+from detector.aggregation import AggregationEngine
+from detector.detection_batch import DetectionBatch
+
+LANES = {"N": 3, "S": 3, "E": 2, "W": 1}
+LABELS = ["car", "car", "motorcycle", "bus", "truck", "person", "person", "van"]
+
+
+def _objects(seed, n):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "label": rng.choice(LABELS),
+            "approach": rng.choice(["N", "S", "E", "W", None]),
+        }
+        for i in range(n)
+    ]
+
+
+def _classify(queue_length, density):
+    if queue_length > 120 or density > 80:
+        return "severely_congested"
+    elif queue_length > 80 or density > 50:
+        return "congested"
+    elif queue_length > 40 or density > 25:
+        return "stable"
+    return "free"
+
+
+def _loop_metrics(objects):
+    """The per-approach, per-object loop the engine replaced"""
+    expected = {}
+    for approach in ["N", "S", "E", "W"]:
+        vehicle_counts, pedestrians = {}, 0
+        for obj in objects:
+            if obj.get("approach") != approach:
+                continue
+            if obj["label"] == "person":
+                pedestrians += 1
+            else:
+                vehicle_counts[obj["label"]] = vehicle_counts.get(obj["label"], 0) + 1
+
+        queue_length = round(sum(vehicle_counts.values()) * 5.5, 1)
+        pcu = sum(
+            n * TrafficConstants.VEHICLE_PCU.get(label, 1.0)
+            for label, n in vehicle_counts.items()
+        )
+        expected[approach] = {
+            "vehicle_counts": vehicle_counts,
+            "pedestrian_count": pedestrians,
+            "queue_length": queue_length,
+            "demand_pcu": pcu,
+            "lanes": LANES[approach],
+            "congestion_level": _classify(queue_length, pcu / LANES[approach]),
+        }
+    return expected
+
+
+def _check(metrics, expected):
+    assert list(metrics) == list(expected)
+    for approach, m in metrics.items():
+        e = expected[approach]
+        assert m.vehicle_counts == e["vehicle_counts"]
+        assert m.pedestrian_count == e["pedestrian_count"]
+        assert m.queue_length == pytest.approx(e["queue_length"])
+        assert m.demand_pcu == pytest.approx(e["demand_pcu"])
+        assert m.lanes == e["lanes"]
+        assert m.congestion_level == e["congestion_level"]
+
+
+# sizes span every congestion class (up to ~90 objects per approach)
+@pytest.mark.parametrize("seed,n", [(s, n) for s in range(5) for n in (0, 3, 40, 150, 450)])
+def test_build_metrics_matches_loop(seed, n):
+    objects = _objects(seed, n)
+    expected = _loop_metrics(objects)
+
+    _check(video_pipeline.build_metrics(objects), expected)
+    _check(metrics_builder.build_metrics(objects), expected)
+    _check(
+        metrics_builder.build_metrics(DetectionBatch.from_dicts(objects)), expected
+    )
+
+
+def test_groups_aggregate_independently():
+    engine = AggregationEngine()
+    groups = [_objects(seed, 200) for seed in range(3)]
+    labels = sorted(set(LABELS))
+
+    rows = [(g, obj) for g, objects in enumerate(groups) for obj in objects]
+    aggregate = engine.aggregate(
+        [engine.approaches.index(o["approach"]) if o["approach"] else -1 for _, o in rows],
+        [labels.index(o["label"]) for _, o in rows],
+        labels,
+        group=[g for g, _ in rows],
+    )
+
+    for g, objects in enumerate(groups):
+        _check(engine.to_metrics(aggregate, group=g), _loop_metrics(objects))
@@ -0,0 +1,33 @@
+import pytest
+
+fastapi_testclient = pytest.importorskip("fastapi.testclient")
+
+from api import main  # noqa: E402
+from benchmarks.synthetic import approach_payload  # noqa: E402
+
+
+def test_lifespan_starts_resources_and_stops_them_in_reverse(monkeypatch):
+    calls = []
+
+    class Feed:
+        def stop(self):
+            calls.append("camera_feed")
+
+    monkeypatch.setattr(main, "start_camera_feed", lambda: Feed())
+    monkeypatch.setattr(
+        main.AdvisoryExecutor, "shutdown", lambda self: calls.append("advisory_executor")
+    )
+    monkeypatch.setattr(
+        main.JobManager, "shutdown", lambda self: calls.append("job_manager")
+    )
+
+    with fastapi_testclient.TestClient(main.app) as client:
+        assert isinstance(main.advisory_executor, main.AdvisoryExecutor)
+        assert isinstance(main.job_manager, main.JobManager)
+
+        response = client.post("/advise", json=approach_payload(seed=0))
+        assert response.status_code == 200
+        assert client.get("/jobs").json() == []
+        assert calls == []
+
+    assert calls == ["camera_feed", "job_manager", "advisory_executor"]
@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+import pytest
+
+from detector.detection_cache import DetectionCache
+from detector.object_detector import ObjectDetector
+from detector.roi_tiling import TiledDetector
+from detector.stream_aggregator import aggregate_stream
+from detector.video_pipeline import build_traffic_data, iter_tracked_frames
+
+
+def _run(video, detector, cache_dir=None):
+    *_, metrics = aggregate_stream(iter_tracked_frames(
+        video, max_frames=20, cache_dir=cache_dir, detector=detector
+    ))
+    return build_traffic_data(metrics)
+
+
+def _entries(cache_dir):
+    (video_dir,) = os.listdir(cache_dir)
+    return sorted(os.listdir(os.path.join(cache_dir, video_dir)))
+
+
+def test_cache_keyed_on_detector_conf(synthetic_video, tmp_path):
+    uncached = _run(synthetic_video, ObjectDetector(conf=0.25, backend="synthetic"))
+
+    # a strict detector must not fill the entry a default one replays
+    _run(synthetic_video, ObjectDetector(conf=0.9, backend="synthetic"), str(tmp_path))
+    cached = _run(synthetic_video, ObjectDetector(conf=0.25, backend="synthetic"), str(tmp_path))
+
+    assert cached == uncached
+    assert [e.split("-")[1] for e in _entries(tmp_path)] == ["conf0.25", "conf0.9"]
+
+
+def test_cache_keyed_on_backend_options(synthetic_video, tmp_path):
+    for seed in (0, 1):
+        _run(synthetic_video, ObjectDetector(backend="synthetic", seed=seed), str(tmp_path))
+
+    replayed = _run(synthetic_video, ObjectDetector(backend="synthetic", seed=1), str(tmp_path))
+    assert replayed == _run(synthetic_video, ObjectDetector(backend="synthetic", seed=1))
+    assert [e.split("-", 2)[2] for e in _entries(tmp_path)] == [
+        "synthetic-n8-seed0", "synthetic-n8-seed1"
+    ]
+
+
+def test_cache_tags():
+    detector = ObjectDetector(backend="synthetic", objects=3)
+    assert detector.cache_tag == "synthetic-n3-seed0"
+    assert TiledDetector(detector).cache_tag == "synthetic-n3-seed0-union320"
+
+
+def test_detector_without_settings_rejected(synthetic_video, tmp_path):
+    class Bare:
+        names = {2: "car"}
+
+    with pytest.raises(ValueError, match="model_path / conf"):
+        _run(synthetic_video, Bare(), str(tmp_path))
+
+
+def _arrays(frame_index):
+    n = frame_index % 3 + 1
+    return (
+        np.full((n, 4), frame_index, dtype=np.float32),
+        np.full(n, 2, dtype=np.int16),
+        np.full(n, 0.5, dtype=np.float32),
+    )
+
+
+def test_writers_sharing_a_shard_keep_it_whole(synthetic_video, tmp_path):
+    first = DetectionCache(str(tmp_path), synthetic_video, shard_size=100)
+    second = DetectionCache(str(tmp_path), synthetic_video, shard_size=100)
+    for i in range(5):
+        first.put(i, _arrays(i))
+        second.put(i + 5, _arrays(i + 5))
+    first.flush()
+    second.flush()      # merges with the shard the first writer swapped in
+
+    reader = DetectionCache(str(tmp_path), synthetic_video, shard_size=100)
+    for i in range(10):
+        np.testing.assert_array_equal(reader.get(i)[0], _arrays(i)[0])
+    assert sorted(os.listdir(reader.path)) == ["meta.json", "shard_000000"]
+
+
+def test_inconsistent_shard_is_a_miss(synthetic_video, tmp_path):
+    cache = DetectionCache(str(tmp_path), synthetic_video, shard_size=100)
+    for i in range(3):
+        cache.put(i, _arrays(i))
+    cache.close()
+
+    # a shard whose offsets run past its boxes (e.g. an interrupted write)
+    shard_dir = os.path.join(cache.path, "shard_000000")
+    np.save(os.path.join(shard_dir, "boxes.npy"), np.zeros((1, 4), dtype=np.float32))
+
+    reopened = DetectionCache(str(tmp_path), synthetic_video, shard_size=100)
+    assert reopened.get(0) is None
+    reopened.put(0, _arrays(0))
+    reopened.close()
+    assert DetectionCache(str(tmp_path), synthetic_video, shard_size=100).has(0)
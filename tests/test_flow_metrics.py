@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from config.constants import TrafficConstants
+from detector.flow_metrics import FlowMonitor, RingSeries
+
+WINDOWS = {"short": 3.0, "long": 7.0}
+
+
+def _brute_force(events, head, n_bins):
+    """Sum of every value added to bins (head - n_bins, head]"""
+    total = np.zeros((2, 4))
+    for index, values in events:
+        if head - n_bins < index <= head:
+            total += values
+    return total
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_window_sums_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    series = RingSeries(rows=2, windows=WINDOWS, resolution=1.0)
+    events = []
+
+    t = 0.0
+    for _ in range(400):   # the 7-bin ring wraps many times
+        # mostly small steps, sometimes a gap longer than every window
+        t += rng.choice([0.0, 0.3, 1.0, 2.5, 12.0], p=[0.2, 0.4, 0.2, 0.15, 0.05])
+        # and sometimes a late sample for an earlier bin
+        stamp = t - rng.choice([0.0, 0.0, 0.0, 2.0, 9.0])
+        values = rng.integers(0, 5, (2, 4)).astype(float)
+
+        series.add(stamp, values)
+        events.append((int(np.floor(stamp)), values))
+
+        for name, seconds in WINDOWS.items():
+            np.testing.assert_allclose(
+                series.window(name),
+                _brute_force(events, series.head, int(seconds)),
+                atol=1e-9,
+            )
+
+
+def test_demand_flow_is_pcu_per_hour_over_the_shortest_window():
+    monitor = FlowMonitor(approaches=("N", "S"), windows={"30s": 30.0, "5min": 300.0})
+    bus = TrafficConstants.VEHICLE_PCU["bus"]
+
+    # a new bus enters N every second; S sees one car that stays put
+    for frame in range(120):
+        t = frame * 0.5
+        objects = [{"id": 1000, "label": "car", "approach": "S"}]
+        if frame % 2 == 0:
+            objects.append({"id": frame, "label": "bus", "approach": "N"})
+        monitor.update(t, objects)
+
+    flow = monitor.demand_flow()
+    assert flow["N"] == pytest.approx(bus * 3600.0)
+    assert flow["S"] == 0.0
+
+    rates = monitor.rates("30s")
+    assert rates["N"]["vehicles_per_hour"] == pytest.approx(3600.0)
+    assert rates["S"]["occupancy"] == pytest.approx(1.0)
@@ -0,0 +1,131 @@
+import os
+import time
+
+import pytest
+
+from api.jobs import (
+    CANCELLED, COMPLETED, FINISHED, JobManager, JobPolicy, JobRejected
+)
+from detector.object_detector import ObjectDetector
+from detector.stream_aggregator import aggregate_stream
+from detector.video_pipeline import build_traffic_data, iter_tracked_frames
+
+OPTIONS = {"backend": "synthetic", "model_path": "yolov8n.pt", "max_frames": 20}
+
+
+@pytest.fixture
+def policy(synthetic_video):
+    return JobPolicy(
+        video_root=os.path.dirname(synthetic_video),
+        video_urls=("rtsp://cameras.local/",),
+        backends=("synthetic",),
+    )
+
+
+@pytest.fixture
+def manager(policy):
+    manager = JobManager(max_workers=1, max_queued=2, policy=policy)
+    yield manager
+    manager.shutdown()
+
+
+def _wait(manager, job, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while job.status not in FINISHED:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.05)
+    return manager.describe(job)
+
+
+def _expected(video, conf=0.25):
+    *_, metrics = aggregate_stream(iter_tracked_frames(
+        video, max_frames=20,
+        detector=ObjectDetector(conf=conf, backend="synthetic"),
+    ))
+    return build_traffic_data(metrics)["approaches"]
+
+
+# ------------------------------
+# POLICY
+# ------------------------------
+def test_policy_resolves_videos_inside_root(policy, synthetic_video):
+    name = os.path.basename(synthetic_video)
+    assert policy.resolve_video(name) == os.path.realpath(synthetic_video)
+    assert policy.resolve_video("rtsp://cameras.local/1") == "rtsp://cameras.local/1"
+
+
+@pytest.mark.parametrize("video", [
+    "../../../etc/passwd",
+    "/etc/passwd",
+    "missing.mp4",
+    "http://example.com/video.mp4",
+    "rtsp://cameras.local.evil/1",
+])
+def test_policy_rejects_videos(policy, video):
+    with pytest.raises(JobRejected):
+        policy.resolve_video(video)
+
+
+def test_policy_rejects_symlink_out_of_root(policy, tmp_path):
+    link = os.path.join(policy.video_root, "escape.mp4")
+    target = tmp_path / "outside.mp4"
+    target.write_bytes(b"")
+    os.symlink(target, link)
+    try:
+        with pytest.raises(JobRejected, match="outside"):
+            policy.resolve_video("escape.mp4")
+    finally:
+        os.unlink(link)
+
+
+@pytest.mark.parametrize("options", [
+    {"model_path": "/tmp/evil.pt", "backend": "synthetic"},
+    {"model_path": "https://example.com/evil.pt", "backend": "synthetic"},
+    {"model_path": "yolov8n.pt", "backend": "torch"},
+])
+def test_policy_rejects_models_and_backends(policy, options):
+    with pytest.raises(JobRejected):
+        policy.check_options(options)
+
+
+# ------------------------------
+# JOBS
+# ------------------------------
+def test_job_streams_video_to_traffic_data(manager, synthetic_video):
+    job = manager.submit(os.path.basename(synthetic_video), **OPTIONS)
+    info = _wait(manager, job)
+
+    assert info["status"] == COMPLETED, info["error"]
+    assert info["progress"]["frames_analysed"] == 20
+    assert info["progress"]["fraction"] == 1.0
+    assert info["trafficData"]["approaches"] == _expected(synthetic_video)
+
+
+def test_job_caches_under_its_own_conf(manager, synthetic_video, tmp_path, monkeypatch):
+    expected = {conf: _expected(synthetic_video, conf) for conf in (0.9, 0.25)}
+    assert expected[0.9] != expected[0.25]
+
+    # workers are spawned after this, so they inherit the cache directory
+    monkeypatch.setenv("DETECTION_CACHE_DIR", str(tmp_path))
+    name = os.path.basename(synthetic_video)
+
+    for conf in (0.9, 0.25, 0.25):   # the last run replays the cache
+        info = _wait(manager, manager.submit(name, **OPTIONS, conf=conf))
+        assert info["trafficData"]["approaches"] == expected[conf]
+
+
+def test_rejected_job_is_not_queued(manager):
+    with pytest.raises(JobRejected):
+        manager.submit("../outside.mp4", **OPTIONS)
+    assert manager.jobs() == []
+
+
+def test_cancelled_job_never_completes(manager, synthetic_video):
+    name = os.path.basename(synthetic_video)
+    running = manager.submit(name, **OPTIONS)
+    queued = manager.submit(name, **OPTIONS)
+
+    manager.cancel(queued.job_id)
+    assert manager.describe(queued)["cancel_requested"]
+    assert _wait(manager, queued)["status"] == CANCELLED
+    assert _wait(manager, running)["status"] == COMPLETED
@@ -0,0 +1,32 @@
+from api.live_stream import REMOVED, diff_state
+
+
+def _merge(target, changes):
+    # what frontend/app.js mergeDelta does with a delta
+    for key in changes.get(REMOVED, ()):
+        target.pop(key, None)
+    for key, value in changes.items():
+        if key == REMOVED:
+            continue
+        if isinstance(value, dict):
+            _merge(target.setdefault(key, {}), value)
+        else:
+            target[key] = value
+    return target
+
+
+def test_none_values_are_not_removals():
+    old = {"approaches": {"N": {"demand_flow": 120.0, "pcu": 4}}, "cycle_time": 90}
+    new = {"approaches": {"N": {"demand_flow": None, "pcu": 4}}}
+
+    delta = diff_state(old, new)
+    assert delta == {
+        "approaches": {"N": {"demand_flow": None}},
+        REMOVED: ["cycle_time"],
+    }
+    assert _merge(old, delta) == new
+
+
+def test_unchanged_state_has_empty_delta():
+    state = {"approaches": {"S": {"pcu": 1.5}}, "final": False}
+    assert diff_state(state, dict(state)) == {}
@@ -0,0 +1,36 @@
+import numpy as np
+
+from detector import roi_mapper
+from detector.motion_gate import MotionGate
+
+FRAME_SHAPE = (1280, 720, 3)
+
+
+def _frames_with_motion(y1, y2):
+    still = np.full(FRAME_SHAPE, 90, dtype=np.uint8)
+    moved = still.copy()
+    moved[y1:y2, 200:500] = 250
+    return still, moved
+
+
+def test_motion_in_counted_region_triggers_detection():
+    # inside roi_mapper's N rectangle, which track_batch counts in
+    still, moved = _frames_with_motion(50, 250)
+
+    gate = MotionGate(max_skip=1000)
+    assert gate.should_detect(still)          # first frame always runs
+    assert gate.should_detect(moved)
+    assert gate.last_ratio > 0
+
+
+def test_default_rois_are_the_counting_rois():
+    assert MotionGate().rois is roi_mapper.ROIS
+
+
+def test_static_scene_is_skipped():
+    still, _ = _frames_with_motion(0, 0)
+
+    gate = MotionGate(max_skip=1000)
+    gate.should_detect(still)
+    assert not gate.should_detect(still.copy())
+    assert gate.skip_ratio == 0.5
@@ -0,0 +1,18 @@
+from detector.queue_estimator import QueueEstimator
+
+
+def test_duplicate_ids_in_one_update_keep_state_consistent():
+    estimator = QueueEstimator()
+    estimator.update_arrays([1, 2], [(10, 10), (50, 50)])
+
+    # id 2 twice (new), id 1 twice (known): one state row each
+    stopped = estimator.update_arrays([1, 3, 1, 3], [(10, 10), (0, 0), (90, 90), (5, 5)])
+
+    assert estimator.ids.tolist() == [1, 2, 3]
+    assert len(estimator.positions) == len(estimator.last_seen) == 3
+    assert estimator.last_positions[1] == (90.0, 90.0)
+    assert estimator.last_positions[3] == (5.0, 5.0)
+    assert stopped.tolist() == [True, False, False, False]
+
+    # the state keeps working afterwards
+    assert estimator.update_arrays([3], [(5, 5)]).tolist() == [True]
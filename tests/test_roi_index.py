@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from detector.roi_index import ROIIndex
+from detector.roi_mapper import ROIS
+
+POLYGONS = {
+    "N": [(100, 0), (600, 0), (500, 300)],
+    "S": (0, 900, 720, 1280),
+}
+
+
+@pytest.mark.parametrize("rois", [ROIS, POLYGONS], ids=["rects", "polygons"])
+def test_scalar_and_vectorised_lookup_agree(rois):
+    index = ROIIndex(rois, (1280, 720))
+    rng = np.random.default_rng(0)
+
+    integer = rng.integers(-20, 1300, size=(2000, 2))
+    fractional = rng.uniform(-20, 1300, size=(2000, 2))
+    # just outside / inside the frame and on ROI edges
+    edges = np.array([
+        [-0.01, 10], [10, -0.01], [-0.99, 950], [0.0, 0.0], [0.5, 0.5],
+        [719.99, 1279.99], [720.0, 1000], [270.5, 500], [449.99, 500],
+    ])
+
+    for centers in (integer, fractional, edges):
+        expected = index.assign(centers)
+        assert [index.assign_point(x, y) for x, y in centers.tolist()] == expected
+
+
+def test_point_just_left_of_frame_is_outside():
+    index = ROIIndex(ROIS, (1280, 720))
+    assert index.assign_point(-0.01, 100) is None
+    assert index.assign_point(0.0, 100) == "N"
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from detector.multi_camera import CameraSource, _default_detector
+from detector.object_detector import ObjectDetector
+from detector.roi_tiling import RoiTiler, TiledDetector
+
+FRAME_SHAPE = (1280, 720, 3)
+
+
+class _Tensor:
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class _RecordingModel:
+    """Stands in for an ultralytics model: no detections, records imgsz"""
+
+    names = {2: "car"}
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, frames, **options):
+        self.calls.append(options.get("imgsz"))
+        boxes = SimpleNamespace(
+            xyxy=_Tensor(np.empty((0, 4), dtype=np.float32)),
+            cls=_Tensor(np.empty(0)),
+            conf=_Tensor(np.empty(0, dtype=np.float32)),
+        )
+        return [SimpleNamespace(boxes=boxes) for _ in frames]
+
+
+def test_tiled_detector_runs_backend_at_tile_size():
+    model = _RecordingModel()
+    detector = ObjectDetector(model=model)
+    assert detector.backend.imgsz is None      # ultralytics default (640)
+
+    tiled = TiledDetector(detector, RoiTiler(mode="tiles", input_size=320))
+    tiled.detect_batch_arrays([np.zeros(FRAME_SHAPE, dtype=np.uint8)])
+
+    assert detector.backend.imgsz == 320
+    assert model.calls == [320]
+    assert "imgsz320" in tiled.cache_tag
+
+
+def test_crops_fit_the_input_size():
+    tiler = RoiTiler(mode="tiles", input_size=320)
+    for crop, _, _ in tiler.crops(np.zeros(FRAME_SHAPE, dtype=np.uint8)):
+        assert max(crop.shape[:2]) == 320
+
+
+def test_default_detector_builds_backend_at_tile_size(monkeypatch):
+    from detector import backends
+
+    created = {}
+
+    class _Backend(backends.SyntheticBackend):
+        def __init__(self, imgsz=None, **options):
+            created["imgsz"] = imgsz
+            self.imgsz = imgsz
+            super().__init__(**options)
+
+    monkeypatch.setitem(backends.BACKENDS, "recording", _Backend)
+    source = CameraSource(
+        camera_id="cam", url="video.mp4", backend="recording",
+        tiling="tiles", tile_size=256,
+    )
+
+    detector = _default_detector(source)
+
+    assert created["imgsz"] == 256
+    assert detector.detector.backend.imgsz == 256
@@ -0,0 +1,42 @@
+from detector.traffic_metrics import TrafficMetricsProcessor
+from engine.signal_optimizer import SignalOptimizer
+
+
+def _approach(approach_id, cars, pedestrians=3):
+    return {
+        "approach_id": approach_id,
+        "vehicle_counts": {"car": cars},
+        "queue_length": 10.0,
+        "lanes": 2,
+        "congestion_level": "stable",
+        "pedestrian_count": pedestrians,
+        "current_green_time": 30,
+    }
+
+
+def test_limits_are_reported_as_ints():
+    metrics = TrafficMetricsProcessor.from_dicts(
+        [_approach("N", 40), _approach("S", 1), _approach("E", 1, pedestrians=25)]
+    )
+    timings, _, _ = SignalOptimizer().optimize_timings(metrics, 120)
+    by_id = {t.approach_id: t for t in timings}
+
+    # clamped to MIN_GREEN_TIME: "15s", as the scalar optimiser reported
+    assert by_id["S"].green_time == 15 and isinstance(by_id["S"].green_time, int)
+    assert isinstance(by_id["S"].pedestrian_time, int)
+    # large pedestrian group: fractional crossing time stays a float
+    assert by_id["E"].pedestrian_time == 7.5
+
+
+def test_batch_matches_single_requests():
+    optimizer = SignalOptimizer()
+    requests = [
+        (TrafficMetricsProcessor.from_dicts([_approach("N", n), _approach("W", 3)]), 90)
+        for n in (0, 5, 50)
+    ]
+
+    batch = optimizer.optimize_timings_batch(requests)
+    for (metrics, cycle), (timings, actual_cycle, analysis) in zip(requests, batch):
+        single = optimizer.optimize_timings(metrics, cycle)
+        assert repr(single[0]) == repr(timings)
+        assert single[1] == actual_cycle and single[2] == analysis
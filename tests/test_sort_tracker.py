@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from detector.sort_tracker import F, P0, Q, R, SortTracker
+
+kalman = pytest.importorskip("filterpy.kalman")
+
+
+def _filterpy_track(x, y):
+    # the per-track filter SortTracker used before its state was stacked
+    kf = kalman.KalmanFilter(dim_x=4, dim_z=2)
+    kf.x = np.array([x, y, 0.0, 0.0])
+    kf.F = F.copy()
+    kf.H = np.array([[1.0, 0, 0, 0], [0, 1.0, 0, 0]])
+    kf.P = P0.copy()
+    kf.Q = Q.copy()
+    kf.R = R.copy()
+    return kf
+
+
+def _paths(n_tracks=6, n_frames=25, seed=0):
+    """Well separated, noisy constant-velocity paths: matching is unambiguous"""
+    rng = np.random.default_rng(seed)
+    start = np.stack([np.arange(n_tracks) * 150.0, rng.uniform(0, 50, n_tracks)], axis=1)
+    velocity = rng.uniform(-3, 3, (n_tracks, 2))
+    steps = np.arange(n_frames)[:, None, None]
+    return start + steps * velocity + rng.normal(0, 1.0, (n_frames, n_tracks, 2))
+
+
+def test_stacked_kalman_matches_filterpy():
+    paths = _paths()
+    tracker = SortTracker(max_age=5, match_distance=50)
+    reference = {}
+
+    for frame, centers in enumerate(paths):
+        # one track drops out for a few frames: it is only predicted
+        visible = np.arange(len(centers))
+        if 8 <= frame < 11:
+            visible = visible[1:]
+
+        # update_arrays predicts every live track once, then corrects
+        for kf in reference.values():
+            kf.predict()
+        ids, _ = tracker.update_arrays(centers[visible])
+
+        for track_id, (x, y) in zip(ids.tolist(), centers[visible].tolist()):
+            if track_id in reference:
+                reference[track_id].update(np.array([x, y]))
+            else:
+                reference[track_id] = _filterpy_track(x, y)
+
+        # every live track: same state and covariance as its own filter
+        assert set(tracker.ids.tolist()) == set(reference)
+        for row, track_id in enumerate(tracker.ids.tolist()):
+            np.testing.assert_allclose(tracker.x[row], reference[track_id].x, atol=1e-8)
+            np.testing.assert_allclose(tracker.P[row], reference[track_id].P, atol=1e-8)
+
+    assert len(reference) == paths.shape[1]
+
+
+def test_ids_follow_their_paths():
+    paths = _paths(seed=1)
+    tracker = SortTracker()
+
+    first, _ = tracker.update_arrays(paths[0])
+    for centers in paths[1:]:
+        ids, speeds = tracker.update_arrays(centers)
+        np.testing.assert_array_equal(ids, first)
+        assert (speeds < 10).all()
@@ -0,0 +1,27 @@
+from detector.stream_aggregator import StreamingAggregator
+
+
+def _objects(*rows):
+    return [{"id": i, "label": label, "approach": a} for i, label, a in rows]
+
+
+def test_snapshot_reports_custom_approaches():
+    aggregator = StreamingAggregator(approaches=("NE", "SW"))
+    aggregator.update(0, _objects((1, "car", "NE"), (2, "bus", "SW"), (3, "person", "SW")))
+    aggregator.update(1, _objects((1, "car", "NE"), (4, "car", "NE")))
+
+    metrics = aggregator.snapshot()
+
+    assert list(metrics) == ["NE", "SW"]
+    assert metrics["NE"].vehicle_counts == {"car": 2}
+    assert metrics["SW"].vehicle_counts == {"bus": 1}
+    assert metrics["SW"].pedestrian_count == 1
+
+
+def test_snapshot_reset_keeps_active_tracks():
+    aggregator = StreamingAggregator()
+    aggregator.update(0, _objects((1, "car", "N")))
+    assert aggregator.snapshot(reset=True)["N"].vehicle_counts == {"car": 1}
+
+    aggregator.update(1, _objects((1, "car", "N")))
+    assert aggregator.snapshot()["N"].vehicle_counts == {}
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from config.constants import TrafficConstants
+from detector.traffic_metrics import TrafficMetrics, TrafficMetricsProcessor
+
+LABELS = ["car", "motorcycle", "bus", "truck", "auto", "bicycle", "van"]
+
+
+def _data(seed):
+    rng = random.Random(seed)
+    return {
+        "approach_id": "N",
+        "vehicle_counts": {
+            label: rng.choice([0, 0, 1, 3, 40])
+            for label in rng.sample(LABELS, rng.randint(0, 5))
+        },
+        "queue_length": rng.uniform(0, 200),
+        "lanes": rng.randint(1, 3),
+        "congestion_level": "stable",
+        "pedestrian_count": rng.randint(0, 20),
+        "current_green_time": 30.0,
+    }
+
+
+def _pcu(vehicle_counts):
+    # the original per-label loop
+    return sum(
+        count * TrafficConstants.VEHICLE_PCU.get(label, 1.0)
+        for label, count in vehicle_counts.items()
+    )
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_vehicle_counts_round_trip(seed):
+    data = _data(seed)
+    single = TrafficMetricsProcessor.from_dict(data)
+    (batched,) = TrafficMetricsProcessor.from_dicts([data])
+
+    for m in (single, batched):
+        # same labels, zeros included, in the caller's order
+        assert list(m.vehicle_counts.items()) == list(data["vehicle_counts"].items())
+        assert m.to_dict()["vehicle_counts"] == data["vehicle_counts"]
+        assert m.demand_pcu == pytest.approx(_pcu(data["vehicle_counts"]))
+    assert single == batched
+
+
+def test_setter_replaces_labels():
+    m = TrafficMetricsProcessor.from_dict(_data(0))
+    m.vehicle_counts = {"van": 0, "bus": 2}
+    assert list(m.vehicle_counts.items()) == [("van", 0), ("bus", 2)]
+    assert m.demand_pcu == pytest.approx(_pcu({"bus": 2}))
+
+
+def test_from_counts_reports_non_zero_columns_by_default():
+    (m,) = TrafficMetrics.from_counts(
+        ["N"], [[0, 4, 1]], [0.0], [1], ["free"], [0], [30.0],
+        labels=["bus", "car", "van"],
+    )
+    assert m.vehicle_counts == {"car": 4, "van": 1}
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from benchmarks.synthetic import render_video
+from detector.frame_scheduler import LatencyScheduler
+from detector.video_pipeline import _read_batches
+from detector.video_reader import VideoReader
+
+
+@pytest.fixture(scope="module")
+def fast_video(tmp_path_factory):
+    """100 fps, so a slow consumer must drop more frames than prefetch holds"""
+    path = tmp_path_factory.mktemp("video") / "fast.mp4"
+    return render_video(str(path), frames=300, n_objects=5, fps=100.0)
+
+
+def _indexes(reader, plan):
+    """Read, skipping plan[i] frames after the i-th read"""
+    indexes = []
+    for count in plan:
+        reader.read()
+        indexes.append(reader.frame_index)
+        reader.skip(count)
+    reader.release()
+    return indexes
+
+
+@pytest.mark.parametrize("stride", [1, 2])
+def test_prefetched_skip_matches_synchronous_skip(fast_video, stride):
+    plan = [0, 3, 10, 0, 25, 1, 40]
+    expected = _indexes(VideoReader(fast_video, stride=stride), plan)
+    assert _indexes(VideoReader(fast_video, stride=stride, prefetch=4), plan) == expected
+
+
+def test_scheduler_keeps_up_with_prefetch(fast_video):
+    reader = VideoReader(fast_video, prefetch=4)
+    scheduler = LatencyScheduler(target_latency=0.3)
+    scheduler.start(reader.fps)
+
+    for batch in _read_batches(reader, max_frames=12, scheduler=scheduler):
+        for index, _ in batch:
+            with scheduler.stage("detect"):
+                time.sleep(0.1)
+            scheduler.mark(index)
+    reader.release()
+
+    # without the decoder honouring skips, lag grows ~50 ms per frame here
+    assert scheduler.max_lag < 0.45